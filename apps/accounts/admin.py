@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, UserProfile, Certificate
+from .models import CustomUser, UserProfile, Certificate, EmailOutbox
 
 
 class CustomUserAdmin(UserAdmin):
@@ -28,6 +28,13 @@ class CustomUserAdmin(UserAdmin):
     add_fieldsets = UserAdmin.add_fieldsets + ((None, {"fields": ("email", "role")}),)
 
 
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("to_email", "subject", "status", "attempts", "next_attempt_at")
+    list_filter = ("status",)
+    search_fields = ("to_email", "subject")
+
+
 admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(UserProfile)
 admin.site.register(Certificate)
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
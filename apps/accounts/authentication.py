@@ -0,0 +1,106 @@
+"""
+Authentication classes for the PyNerd API.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.metrics import record_cache
+
+
+def user_cache_key(user_id):
+    return f"accounts:jwt-user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop a user from the JWT user cache (called on save and delete).
+    """
+    caches[settings.JWT_USER_CACHE_ALIAS].delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user from the token's ``user_id``
+    claim through a short-TTL cache instead of querying the database on every
+    request.
+
+    Disabled unless ``JWT_USER_CACHE_TIMEOUT`` is greater than zero. Entries
+    are invalidated by the ``CustomUser`` save/delete signals once the change
+    is committed, but only in the cache of the process that made it: with
+    the default LocMem cache, other workers keep serving the old user (and
+    accepting a deactivated one) until their entry expires. Point
+    ``JWT_USER_CACHE_ALIAS`` at a cache shared by all workers (``CACHE_URL``)
+    for password changes and deactivations to take effect on the next
+    request. ``QuerySet.update()`` does not send signals and is only picked
+    up once the entry expires.
+    """
+
+    def get_user(self, validated_token):
+        timeout = settings.JWT_USER_CACHE_TIMEOUT
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not timeout or user_id is None:
+            return super().get_user(validated_token)
+
+        cache = caches[settings.JWT_USER_CACHE_ALIAS]
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        record_cache("jwt_user", user is not None)
+        if user is None:
+            # Runs the active and revocation checks before caching.
+            user = super().get_user(validated_token)
+            cache.set(key, user, timeout)
+        elif api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                "The user's password has been changed.", code="password_changed"
+            )
+        return user
+
+
+class TokenDispatchAuthentication(BaseAuthentication):
+    """
+    Inspects the ``Authorization`` header once and hands the request to
+    exactly one backend, instead of letting JWT, OAuth2 and social
+    authentication each try (and possibly query the database) in turn.
+
+    - ``Bearer <header>.<payload>.<signature>``: JWT
+    - ``Bearer <backend> <token>``: social login (drf-social-oauth2)
+    - ``Bearer <token>``: django-oauth-toolkit access token
+
+    Requests without a ``Bearer`` header are anonymous. The OAuth2 and social
+    backends are imported on first use, which keeps their stacks out of
+    workers that only see JWTs.
+    """
+
+    jwt_class = CachedJWTAuthentication
+    oauth2_class = "oauth2_provider.contrib.rest_framework.OAuth2Authentication"
+    social_class = "drf_social_oauth2.authentication.SocialAuthentication"
+
+    def get_backend_class(self, request):
+        parts = get_authorization_header(request).split()
+        if not parts or parts[0].lower() != b"bearer":
+            return None
+        if len(parts) == 3:
+            return import_string(self.social_class)
+        if len(parts) == 2 and parts[1].count(b".") != 2:
+            return import_string(self.oauth2_class)
+        # JWTs and malformed headers, which the JWT backend rejects with the
+        # same errors as before.
+        return self.jwt_class
+
+    def authenticate(self, request):
+        backend_class = self.get_backend_class(request)
+        if backend_class is None:
+            return None
+        return backend_class().authenticate(request)
+
+    def authenticate_header(self, request):
+        return self.jwt_class().authenticate_header(request)
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+
+from . import hashing
+
+UserModel = get_user_model()
+
+
+class EmailOrUsernameModelBackend(ModelBackend):
+    """
+    Authenticates against either the username or the email address.
+
+    Both columns are unique and indexed, so the user is resolved in a single
+    query instead of an email lookup followed by ``ModelBackend``'s own
+    username lookup. Password verification runs in the bounded hashing pool
+    (see ``apps.accounts.hashing``).
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = self.select_login_user(list(self.login_queryset(username)), username)
+        if user is None:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user (#20760).
+            hashing.make_password(password)
+            return None
+        if hashing.check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        """See authenticate()."""
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        users = [user async for user in self.login_queryset(username)]
+        user = self.select_login_user(users, username)
+        if user is None:
+            await hashing.amake_password(password)
+            return None
+        if await hashing.acheck_password(user, password) and self.user_can_authenticate(
+            user
+        ):
+            return user
+        return None
+
+    def login_queryset(self, login):
+        return UserModel._default_manager.filter(Q(username=login) | Q(email=login))[:2]
+
+    def select_login_user(self, users, login):
+        """
+        Pick the user matching ``login`` among the username and email matches.
+
+        Inputs containing "@" prefer the email match, other inputs prefer
+        the username match.
+        """
+        if len(users) < 2:
+            return users[0] if users else None
+        field = "email" if "@" in login else "username"
+        return next(user for user in users if getattr(user, field) == login)
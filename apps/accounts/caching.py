@@ -0,0 +1,39 @@
+"""
+Cached ``UserDetailSerializer`` payloads for ``users/me`` and
+``users/{id}/profile``.
+
+Entries are dropped by the signal handlers in ``signals.py`` once a change
+to the user, their profile, their certificates, or a certified course is
+committed. ``USER_DETAIL_CACHE_TIMEOUT`` bounds staleness for changes made
+without signals, such as ``QuerySet.update()``. It defaults to 0 (no
+caching) unless ``CACHE_URL`` points at a cache shared by all workers.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.metrics import record_cache
+
+
+def user_detail_cache_key(user_id):
+    return f"accounts:user-detail:{user_id}"
+
+
+def get_user_detail(user_id, build):
+    """
+    Return the cached payload for ``user_id``, calling ``build()`` on a miss.
+    """
+    timeout = settings.USER_DETAIL_CACHE_TIMEOUT
+    if not timeout:
+        return build()
+    key = user_detail_cache_key(user_id)
+    payload = cache.get(key)
+    record_cache("user_detail", payload is not None)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, timeout)
+    return payload
+
+
+def invalidate_user_detail(*user_ids):
+    cache.delete_many([user_detail_cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,175 @@
+"""
+Email outbox helpers.
+
+Request handlers call ``enqueue_email`` so they return as soon as the message
+is stored. The ``send_outbox_emails`` management command calls
+``send_pending_emails`` to deliver due messages in batches over a single SMTP
+connection, retrying failures with exponential backoff.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def activation_email(user):
+    """
+    Return the outbox row (unsaved) with the account activation link for
+    ``user``.
+    """
+    token = default_token_generator.make_token(user)
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    activation_link = f"http://localhost:8000/api/auth/activate/{uid}/{token}/"
+    return EmailOutbox(
+        subject="Activate your PyNerd Account",
+        body=f"Please click the link to activate: {activation_link}",
+        from_email=settings.EMAIL_HOST_USER or "",
+        to_email=user.email,
+    )
+
+
+def welcome_email(user):
+    """
+    Return the outbox row (unsaved) inviting an imported student to choose
+    a password through the password reset confirmation link.
+    """
+    token = default_token_generator.make_token(user)
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    link = f"http://localhost:8000/api/auth/password-reset-confirm/{uid}/{token}/"
+    return EmailOutbox(
+        subject="Welcome to PyNerd",
+        body=f"Your PyNerd account is ready. Choose your password here: {link}",
+        from_email=settings.EMAIL_HOST_USER or "",
+        to_email=user.email,
+    )
+
+
+def enqueue_email(subject, message, recipient_list, from_email=None):
+    """
+    Store one outbox row per recipient and return the created rows.
+    """
+    if from_email is None:
+        from_email = settings.DEFAULT_FROM_EMAIL
+    return EmailOutbox.objects.bulk_create(
+        [
+            EmailOutbox(
+                subject=subject,
+                body=message,
+                from_email=from_email or "",
+                to_email=recipient,
+            )
+            for recipient in recipient_list
+        ]
+    )
+
+
+def retry_delay(attempts):
+    """
+    Return the backoff delay before the next attempt of a failed message.
+    """
+    base = settings.EMAIL_OUTBOX_RETRY_BACKOFF
+    return timedelta(seconds=base * 2 ** max(attempts - 1, 0))
+
+
+def claim_pending_emails(batch_size):
+    """
+    Claim a batch of due messages: their ``next_attempt_at`` moves
+    ``EMAIL_OUTBOX_CLAIM_TIMEOUT`` ahead, so other workers skip them while
+    they are sent, and pick them up again if this worker dies before
+    recording the result.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked lets several workers drain the outbox on PostgreSQL;
+        # the lock is ignored on SQLite.
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[email.pk for email in batch]).update(
+                next_attempt_at=now
+                + timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+            )
+    return batch
+
+
+def send_pending_emails(batch_size=None, connection=None):
+    """
+    Deliver one batch of due outbox messages over a single connection.
+
+    The batch is claimed in a short transaction and sent outside it, so no
+    lock is held while the relay answers.
+
+    Returns a ``(sent, failed)`` tuple for the processed batch.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    max_attempts = settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+
+    batch = claim_pending_emails(batch_size)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as ex:
+        # The relay is unreachable; count the attempt on the whole batch.
+        for email in batch:
+            _mark_failed(email, ex, max_attempts)
+        EmailOutbox.objects.bulk_update(
+            batch, ["status", "attempts", "last_error", "next_attempt_at"]
+        )
+        logger.warning("Email outbox: could not connect to relay: %s", ex)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email or None,
+                to=[email.to_email],
+                connection=connection,
+            )
+            try:
+                message.send(fail_silently=False)
+            except Exception as ex:
+                _mark_failed(email, ex, max_attempts)
+                failed += 1
+            else:
+                email.status = "sent"
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = ""
+                sent += 1
+    finally:
+        connection.close()
+
+    EmailOutbox.objects.bulk_update(
+        batch,
+        ["status", "attempts", "last_error", "next_attempt_at", "sent_at"],
+    )
+    return sent, failed
+
+
+def _mark_failed(email, error, max_attempts):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = "failed"
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
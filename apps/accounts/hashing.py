@@ -0,0 +1,176 @@
+"""
+Bounded pool for password hashing and verification.
+
+PBKDF2 takes around 100 ms of CPU per call. Running it through a small shared
+pool caps how many hashes a process computes at once, and rejects new work
+with ``503`` once ``PASSWORD_HASHING_MAX_QUEUE`` callers are already waiting,
+so a burst of logins degrades into fast failures instead of occupying every
+worker thread. ``hashlib`` releases the GIL while hashing, so threads are
+enough to use several cores. The running and queued jobs and the rejections
+are exported as Prometheus metrics (``core.metrics``).
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.metrics import record_password_hashing, record_password_hashing_rejection
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many authentication requests. Please try again shortly."
+    default_code = "password_hashing_busy"
+
+
+class PasswordHashingPool:
+    """
+    Thread pool with a hard limit on running plus waiting hashing jobs.
+    """
+
+    def __init__(self, max_workers, max_queue, timeout):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hashing"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def submit(self, func, *args):
+        """
+        Schedule ``func(*args)`` and return its future, or raise
+        ``PasswordHashingBusy`` when the pool and its queue are full.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            record_password_hashing_rejection()
+            logger.warning(
+                "Password hashing pool saturated (%s running, %s queued).",
+                self.running,
+                self.queued,
+            )
+            raise PasswordHashingBusy()
+        with self._lock:
+            self.queued += 1
+            record_password_hashing(self.running, self.queued)
+        return self._executor.submit(self._call, func, args)
+
+    def _call(self, func, args):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            record_password_hashing(self.running, self.queued)
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                record_password_hashing(self.running, self.queued)
+            self._slots.release()
+
+    def run(self, func, *args):
+        try:
+            return self.submit(func, *args).result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordHashingBusy()
+
+    async def arun(self, func, *args):
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(self.submit(func, *args)), self.timeout
+            )
+        except TimeoutError:
+            raise PasswordHashingBusy()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "queued": self.queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordHashingPool(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    max_queue=settings.PASSWORD_HASHING_MAX_QUEUE,
+                    timeout=settings.PASSWORD_HASHING_TIMEOUT,
+                )
+    return _pool
+
+
+def stats():
+    """
+    Return the pool's concurrency and queue-depth counters.
+    """
+    return get_pool().stats()
+
+
+def make_password(raw_password):
+    return get_pool().run(hashers.make_password, raw_password)
+
+
+async def amake_password(raw_password):
+    return await get_pool().arun(hashers.make_password, raw_password)
+
+
+def set_password(user, raw_password):
+    """
+    Pool-backed equivalent of ``user.set_password()``.
+    """
+    user.password = make_password(raw_password)
+    user._password = raw_password
+
+
+def check_password(user, raw_password):
+    """
+    Pool-backed equivalent of ``user.check_password()``, including the
+    rehash when the hasher settings changed.
+    """
+    is_correct, must_update = get_pool().run(
+        hashers.verify_password, raw_password, user.password
+    )
+    if is_correct and must_update:
+        set_password(user, raw_password)
+        user._password = None
+        user.save(update_fields=["password"])
+    return is_correct
+
+
+async def acheck_password(user, raw_password):
+    """See check_password()."""
+    is_correct, must_update = await get_pool().arun(
+        hashers.verify_password, raw_password, user.password
+    )
+    if is_correct and must_update:
+        user.password = await amake_password(raw_password)
+        await user.asave(update_fields=["password"])
+    return is_correct
@@ -0,0 +1,312 @@
+"""
+Bulk student import for enterprise plans.
+
+Rows come from CSV or NDJSON with the columns ``username``, ``email``,
+``first_name``, ``last_name`` and the optional ``password`` and ``course``
+(a course slug to enroll the student in). Rows are validated in memory,
+checked for duplicates with one query per chunk, and written with
+``bulk_create`` for users, profiles, enrollments and activation emails. If
+a concurrent sign-up takes a username or email before the chunk is written,
+the chunk is checked again and written without the conflicting rows, which
+are reported.
+
+Students imported without a password get an unusable password and a welcome
+email with a link to choose one. Password hashing (PBKDF2) dominates the cost of rows that
+carry a password, so it is spread over a process pool.
+"""
+
+import csv
+import io
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from apps.courses.models import Course, Enrollment
+from .emails import welcome_email
+from .models import CustomUser, EmailOutbox, UserProfile
+
+FORMATS = ("csv", "ndjson")
+
+
+class StudentImportRowSerializer(serializers.Serializer):
+    username = serializers.RegexField(r"^[\w.@+-]+\Z", max_length=150)
+    email = serializers.EmailField()
+    first_name = serializers.CharField(
+        max_length=150, required=False, allow_blank=True, default=""
+    )
+    last_name = serializers.CharField(
+        max_length=150, required=False, allow_blank=True, default=""
+    )
+    password = serializers.CharField(required=False, allow_blank=True, default="")
+    course = serializers.SlugField(required=False, allow_blank=True, default="")
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    enrolled: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row, errors):
+        self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "created": self.created,
+            "enrolled": self.enrolled,
+            "failed": len(self.errors),
+            "errors": self.errors,
+        }
+
+
+class ImportFileError(ValueError):
+    """
+    The file cannot be read as UTF-8 text in its format. Rows before the
+    error have already been yielded.
+    """
+
+
+def detect_format(name="", content_type=""):
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type:
+        return "ndjson"
+    return "csv"
+
+
+def parse_rows(stream, fmt):
+    """
+    Yield ``(row_number, data)`` pairs from a text stream. ``data`` is
+    ``None`` for NDJSON lines that are not a JSON object. Raise
+    ``ImportFileError`` when the stream is not UTF-8 or not valid CSV.
+    """
+    number = 1
+    try:
+        if fmt == "csv":
+            # Row 1 is the header.
+            for number, row in enumerate(csv.DictReader(stream), start=2):
+                yield number, {
+                    key.strip(): (value or "").strip()
+                    for key, value in row.items()
+                    if key
+                }
+            return
+
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                data = None
+            yield number, data if isinstance(data, dict) else None
+    except UnicodeDecodeError:
+        raise ImportFileError(
+            f"The file is not UTF-8 encoded (after row {number})."
+        ) from None
+    except csv.Error as ex:
+        raise ImportFileError(f"Invalid CSV after row {number}: {ex}.") from None
+
+
+def _setup_worker():
+    # Spawned workers start from a fresh interpreter.
+    django.setup()
+
+
+def _hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+
+class StudentImporter:
+    """
+    Validates and writes imported students in chunks of ``chunk_size`` rows.
+    """
+
+    def __init__(self, chunk_size=1000, hash_workers=1, plan="enterprise"):
+        self.chunk_size = chunk_size
+        self.hash_workers = hash_workers
+        self.plan = plan
+        self.result = ImportResult()
+        self._executor = None
+        self._courses = {}
+
+    def run(self, rows):
+        """
+        Import ``(row_number, data)`` pairs and return an ``ImportResult``.
+        """
+        try:
+            chunk = []
+            for number, data in rows:
+                chunk.append((number, data))
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self._import_chunk(chunk)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+        return self.result
+
+    def _import_chunk(self, chunk):
+        valid = self._validate(chunk)
+        if not valid:
+            return
+
+        hashes = self._hash([row["password"] for _, row in valid if row["password"]])
+        passwords = {
+            number: next(hashes) if row["password"] else None for number, row in valid
+        }
+        while valid:
+            try:
+                users, enrollments = self._write(valid, passwords)
+            except IntegrityError as ex:
+                # A concurrent sign-up took a username or email in this chunk:
+                # report those rows and write the others.
+                remaining = self._drop_taken(valid)
+                if len(remaining) == len(valid):
+                    for number, _ in valid:
+                        self.result.add_error(number, {"non_field_errors": [str(ex)]})
+                    return
+                valid = remaining
+            else:
+                self.result.created += len(users)
+                self.result.enrolled += len(enrollments)
+                return
+
+    def _write(self, valid, passwords):
+        users = []
+        for number, row in valid:
+            user = CustomUser(
+                username=row["username"],
+                email=row["email"],
+                first_name=row["first_name"],
+                last_name=row["last_name"],
+                role="STUDENT",
+                plan=self.plan,
+                is_approved=True,
+            )
+            if passwords[number] is not None:
+                user.password = passwords[number]
+            else:
+                user.set_unusable_password()
+            users.append(user)
+
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users)
+            UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+            enrollments = [
+                Enrollment(student=user, course_id=self._courses[row["course"]])
+                for user, (_, row) in zip(users, valid)
+                if row["course"]
+            ]
+            Enrollment.objects.bulk_create(enrollments)
+            EmailOutbox.objects.bulk_create(
+                [
+                    welcome_email(user)
+                    for user in users
+                    if not user.has_usable_password()
+                ]
+            )
+        return users, enrollments
+
+    def _taken(self, rows):
+        """
+        Return the ``("username", value)`` and ``("email", value)`` pairs of
+        ``rows`` that existing users already have.
+        """
+        usernames = {row["username"] for _, row in rows}
+        emails = {row["email"] for _, row in rows}
+        taken = set()
+        for username, email in CustomUser.objects.filter(
+            Q(username__in=usernames) | Q(email__in=emails)
+        ).values_list("username", "email"):
+            taken.update((("username", username), ("email", email)))
+        return taken
+
+    def _taken_errors(self, row, taken):
+        return {
+            name: [f"A user with that {name} already exists."]
+            for name in ("username", "email")
+            if (name, row[name]) in taken
+        }
+
+    def _drop_taken(self, valid):
+        taken = self._taken(valid)
+        remaining = []
+        for number, row in valid:
+            errors = self._taken_errors(row, taken)
+            if errors:
+                self.result.add_error(number, errors)
+            else:
+                remaining.append((number, row))
+        return remaining
+
+    def _validate(self, chunk):
+        parsed = []
+        for number, data in chunk:
+            if data is None:
+                self.result.add_error(number, {"non_field_errors": ["Invalid row."]})
+                continue
+            serializer = StudentImportRowSerializer(data=data)
+            if serializer.is_valid():
+                parsed.append((number, serializer.validated_data))
+            else:
+                self.result.add_error(number, serializer.errors)
+
+        taken = self._taken(parsed)
+
+        slugs = {row["course"] for _, row in parsed} - set(self._courses) - {""}
+        self._courses.update(
+            Course.objects.filter(slug__in=slugs).values_list("slug", "id")
+        )
+
+        valid = []
+        for number, row in parsed:
+            errors = self._taken_errors(row, taken)
+            if row["course"] and row["course"] not in self._courses:
+                errors["course"] = [f"Unknown course '{row['course']}'."]
+            if errors:
+                self.result.add_error(number, errors)
+                continue
+            # Later duplicates within the file are rejected too.
+            taken.update((("username", row["username"]), ("email", row["email"])))
+            valid.append((number, row))
+        return valid
+
+    def _hash(self, passwords):
+        if not passwords:
+            return iter(())
+        if self.hash_workers <= 1 or len(passwords) < self.hash_workers * 4:
+            return iter(_hash_passwords(passwords))
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.hash_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_setup_worker,
+            )
+        size = -(-len(passwords) // (self.hash_workers * 4))
+        batches = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+        return (
+            encoded
+            for batch in self._executor.map(_hash_passwords, batches)
+            for encoded in batch
+        )
+
+
+def import_students(stream, fmt="csv", **options):
+    """
+    Import students from a text stream (or bytes) in ``fmt``.
+    """
+    if isinstance(stream, bytes):
+        try:
+            stream = io.StringIO(stream.decode("utf-8-sig"))
+        except UnicodeDecodeError:
+            raise ImportFileError("The file is not UTF-8 encoded.") from None
+    return StudentImporter(**options).run(parse_rows(stream, fmt))
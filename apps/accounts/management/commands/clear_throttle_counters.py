@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.throttling import get_counter_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired rate-throttle counters. Only THROTTLE_STORE=database "
+        "keeps them; run it from cron (hourly is plenty) or with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep deleting expired counters every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=3600,
+            help="Seconds to sleep between runs with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = get_counter_store().clear_expired(time.time())
+            self.stdout.write(f"Deleted {deleted} expired throttle counter(s).")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
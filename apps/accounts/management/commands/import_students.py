@@ -0,0 +1,64 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.importer import (
+    FORMATS,
+    ImportFileError,
+    StudentImporter,
+    detect_format,
+    parse_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Import enterprise students from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file to import.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="File format (detected from the extension by default).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.STUDENT_IMPORT_CHUNK_SIZE,
+            help="Rows validated and written per bulk_create batch.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes used to hash passwords.",
+        )
+        parser.add_argument("--plan", default="enterprise")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["path"])
+        importer = StudentImporter(
+            chunk_size=options["chunk_size"],
+            hash_workers=options["workers"],
+            plan=options["plan"],
+        )
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+                importer.run(parse_rows(stream, fmt))
+        except OSError as ex:
+            raise CommandError(str(ex))
+        except ImportFileError as ex:
+            # Full chunks read before the error are already written.
+            self.report(importer.result)
+            raise CommandError(str(ex))
+        self.report(importer.result)
+
+    def report(self, result):
+        for error in result.errors:
+            self.stderr.write(json.dumps(error))
+        self.stdout.write(
+            f"Created {result.created} student(s), {result.enrolled} enrollment(s), "
+            f"{len(result.errors)} row(s) failed."
+        )
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 
 class CustomUser(AbstractUser):
@@ -17,9 +18,13 @@ class CustomUser(AbstractUser):
     )
 
     email = models.EmailField(unique=True, db_index=True)
-    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default="STUDENT")
+    role = models.CharField(
+        max_length=10, choices=ROLE_CHOICES, default="STUDENT", db_index=True
+    )
     avatar = models.URLField(blank=True)
-    plan = models.CharField(max_length=20, choices=PLAN_CHOICES, default="free")
+    plan = models.CharField(
+        max_length=20, choices=PLAN_CHOICES, default="free", db_index=True
+    )
     study_streak = models.PositiveIntegerField(default=0)
     total_study_time = models.PositiveIntegerField(default=0)  # in seconds
     is_approved = models.BooleanField(default=False)
@@ -32,6 +37,13 @@ class CustomUser(AbstractUser):
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS = ["email"]
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Staff directory filters (see UserDirectoryView)
+            models.Index(fields=["is_active", "id"], name="user_active_id_idx"),
+            models.Index(fields=["date_joined"], name="user_date_joined_idx"),
+        ]
+
     def clean(self):
         """Ensure instructors are approved before activation."""
         if self.role == "INSTRUCTOR" and not self.is_approved:
@@ -79,3 +91,55 @@ class Certificate(models.Model):
 
     def __str__(self):
         return f"Certificate for {self.student.email} - {self.course.title}"
+
+
+class EmailOutbox(models.Model):
+    """
+    Transactional email queued by request handlers and delivered in batches
+    by the ``send_outbox_emails`` management command.
+    """
+
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True, default="")
+    to_email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Email outbox"
+        ordering = ["next_attempt_at", "id"]
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"], name="outbox_status_due_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+
+
+class ThrottleCounter(models.Model):
+    """
+    Sliding-window request counter shared by every worker process
+    (see ``apps.accounts.throttling``).
+    """
+
+    key = models.CharField(max_length=255, primary_key=True)
+    window_start = models.BigIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    previous_count = models.PositiveIntegerField(default=0)
+    expires_at = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
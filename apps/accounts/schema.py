@@ -0,0 +1,12 @@
+"""
+OpenAPI descriptions of the accounts authentication classes, registered with
+drf-spectacular when the app is ready.
+"""
+
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class TokenDispatchScheme(SimpleJWTScheme):
+    # Documented as the JWT bearer scheme it hands most requests to, so the
+    # schema keeps the ``jwtAuth`` security scheme clients authorize with.
+    target_class = "apps.accounts.authentication.TokenDispatchAuthentication"
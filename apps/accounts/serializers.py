@@ -12,34 +12,25 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
     def validate(self, attrs):
-        # Multi-Auth Logic: Check if "username" is an email
-        login_input = attrs.get(self.username_field)
-        if login_input and "@" in login_input:
-            try:
-                user = CustomUser.objects.get(email=login_input)
-                # Swap email for the actual username expected by authenticate()
-                attrs[self.username_field] = user.username
-            except CustomUser.DoesNotExist:
-                # If not found, let standard validation handle the failure
-                pass
-
+        # Multi-Auth: EmailOrUsernameModelBackend accepts an email or a
+        # username in the "username" field.
         data = super().validate(attrs)
-        data.update(
-            {
-                "user": {
-                    "id": self.user.id,
-                    "username": self.user.username,
-                    "name": self.user.get_full_name(),
-                    "email": self.user.email,
-                    "avatar": self.user.avatar,
-                    "plan": self.user.plan,
-                    "studyStreak": self.user.study_streak,
-                    "totalStudyTime": self.user.total_study_time,
-                }
-            }
-        )
+        data["user"] = self.get_user_payload(self.user)
         return data
 
+    @staticmethod
+    def get_user_payload(user):
+        return {
+            "id": user.id,
+            "username": user.username,
+            "name": user.get_full_name(),
+            "email": user.email,
+            "avatar": user.avatar,
+            "plan": user.plan,
+            "studyStreak": user.study_streak,
+            "totalStudyTime": user.total_study_time,
+        }
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -59,6 +50,25 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {"password": {"write_only": True}}
 
 
+class UserDirectorySerializer(serializers.ModelSerializer):
+    """Flat user row for the staff directory."""
+
+    class Meta:
+        model = CustomUser
+        fields = [
+            "id",
+            "username",
+            "email",
+            "first_name",
+            "last_name",
+            "role",
+            "plan",
+            "is_active",
+            "date_joined",
+        ]
+        read_only_fields = fields
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserProfile
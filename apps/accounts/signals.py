@@ -0,0 +1,71 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .caching import invalidate_user_detail
+from .models import Certificate, CustomUser, UserProfile
+
+
+def invalidate_user(user_id, role):
+    invalidate_cached_user(user_id)
+    invalidate_user_detail(user_id)
+    if role == "INSTRUCTOR":
+        # Certificates embed the instructor's name.
+        invalidate_user_detail(
+            *Certificate.objects.filter(course__instructor_id=user_id).values_list(
+                "student_id", flat=True
+            )
+        )
+
+
+def invalidate_course_certificates(course_id):
+    invalidate_user_detail(
+        *Certificate.objects.filter(course_id=course_id).values_list(
+            "student_id", flat=True
+        )
+    )
+
+
+# Cache entries are dropped once the change is committed; dropped earlier, a
+# concurrent request could cache the old rows again.
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_cache(sender, instance, using, **kwargs):
+    """
+    Keep cached request users in sync with password, role and status changes.
+    """
+    transaction.on_commit(
+        partial(invalidate_user, instance.pk, instance.role), using=using
+    )
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_owner(sender, instance, using, **kwargs):
+    transaction.on_commit(
+        partial(invalidate_user_detail, instance.user_id), using=using
+    )
+
+
+@receiver(post_save, sender=Certificate)
+@receiver(post_delete, sender=Certificate)
+def invalidate_certificate_owner(sender, instance, using, **kwargs):
+    transaction.on_commit(
+        partial(invalidate_user_detail, instance.student_id), using=using
+    )
+
+
+@receiver(post_save, sender="courses.Course")
+def invalidate_certified_students(sender, instance, created, using, **kwargs):
+    """
+    Certificates embed the course title.
+    """
+    if not created:
+        transaction.on_commit(
+            partial(invalidate_course_certificates, instance.pk), using=using
+        )
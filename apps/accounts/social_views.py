@@ -0,0 +1,14 @@
+"""
+Social login views. Kept apart from ``views.py`` so drf-social-oauth2 is only
+imported when a social login is first requested (see ``core.lazy``).
+"""
+
+from drf_social_oauth2.views import ConvertTokenView
+
+
+class SocialLoginView(ConvertTokenView):
+    """
+    View to handle social login using drf-social-oauth2.
+    """
+
+    pass
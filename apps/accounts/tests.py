@@ -1,15 +1,122 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import socketserver
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory, TestCase, override_settings
 from django.urls import reverse
-from rest_framework.test import APIClient
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
+from django.utils import timezone
+from drf_social_oauth2.authentication import SocialAuthentication
+from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+from oauth2_provider.models import AccessToken as OAuth2AccessToken, Application
+from apps.accounts.authentication import (
+    CachedJWTAuthentication,
+    TokenDispatchAuthentication,
+    user_cache_key,
+)
+from apps.accounts.emails import claim_pending_emails, send_pending_emails
+from apps.accounts.importer import StudentImporter, import_students
+from apps.accounts.hashing import PasswordHashingBusy, PasswordHashingPool
+from apps.accounts.views import AsyncLoginView
+from apps.accounts.models import (
+    Certificate,
+    EmailOutbox,
+    ThrottleCounter,
+    UserProfile,
+)
+from apps.accounts.throttling import AnonRateThrottle, get_counter_store
+from apps.courses.models import Course
 
 User = get_user_model()
 
 
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue used as a local relay stand-in."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost test relay")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            command = line.split(" ", 1)[0].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif command == "RCPT":
+                address = line.split(":", 1)[1].strip(" <>")
+                if address in self.server.rejected:
+                    self.reply("550 mailbox unavailable")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while (data := self.rfile.readline().decode()) not in (".\r\n", ""):
+                    body.append(data)
+                self.server.messages.append((recipients, "".join(body)))
+                recipients = []
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                # MAIL, RSET, NOOP
+                self.reply("250 OK")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.messages = []
+        self.rejected = set()
+        self.connections = 0
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def settings(self):
+        return override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+        )
+
+
 class AuthTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -61,6 +168,23 @@ class AuthTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("access", response.data)
 
+    def test_login_with_email_uses_single_query(self):
+        data = {"username": "test@example.com", "password": "strong_password_123"}
+        # The user lookup (throttle counters are in the cache).
+        with self.assertNumQueries(1):
+            response = self.client.post(self.login_url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_login_prefers_username_match_without_at_sign(self):
+        # Another account's email equals this user's username.
+        User.objects.create_user(
+            username="other", email="testuser", password="other_password"
+        )
+        data = {"username": "testuser", "password": "strong_password_123"}
+        response = self.client.post(self.login_url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user"]["id"], self.user.id)
+
     def test_login_invalid_credentials(self):
         data = {
             "username": "testuser",
@@ -144,3 +268,625 @@ class AuthTests(TestCase):
         """Test that unauthenticated users cannot access /users/me/"""
         response = self.client.get("/api/users/me/")
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_register_queues_activation_email(self):
+        data = {
+            "username": "queued",
+            "email": "queued@example.com",
+            "password": "password123",
+        }
+        response = self.client.post("/api/auth/register/", data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.to_email, "queued@example.com")
+        self.assertEqual(email.status, "pending")
+        self.assertIn("/api/auth/activate/", email.body)
+
+    def test_register_keeps_user_when_relay_is_down(self):
+        # Nothing listens on port 1: registration must not depend on the relay.
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=1,
+        ):
+            response = self.client.post(
+                "/api/auth/register/",
+                {"username": "down", "email": "down@example.com", "password": "p4ss"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(User.objects.filter(username="down").exists())
+
+    def test_worker_sends_batch_over_one_connection(self):
+        for i in range(3):
+            self.client.post(
+                "/api/auth/password-reset/",
+                {"email": User.objects.create_user(f"u{i}", f"u{i}@example.com").email},
+            )
+        with LocalSMTPServer() as relay, relay.settings():
+            call_command("send_outbox_emails", stdout=StringIO())
+        self.assertEqual(relay.connections, 1)
+        self.assertEqual(len(relay.messages), 3)
+        self.assertEqual(EmailOutbox.objects.filter(status="sent").count(), 3)
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_BACKOFF=60)
+    def test_failed_delivery_is_retried_with_backoff(self):
+        email = EmailOutbox.objects.create(
+            subject="Hi", body="Body", to_email="bounce@example.com"
+        )
+        with LocalSMTPServer() as relay, relay.settings():
+            relay.rejected.add("bounce@example.com")
+            self.assertEqual(send_pending_emails(), (0, 1))
+
+            email.refresh_from_db()
+            self.assertEqual(email.status, "pending")
+            self.assertEqual(email.attempts, 1)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            # Not due yet: nothing is picked up.
+            self.assertEqual(send_pending_emails(), (0, 0))
+
+            EmailOutbox.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(send_pending_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, "failed")
+
+    def test_claimed_batch_is_hidden_from_other_workers(self):
+        EmailOutbox.objects.create(subject="Hi", body="Body", to_email="a@example.com")
+        self.assertEqual(len(claim_pending_emails(10)), 1)
+        self.assertEqual(claim_pending_emails(10), [])
+        # The worker died before recording the result: retried after the claim.
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(len(claim_pending_emails(10)), 1)
+
+
+@override_settings(JWT_USER_CACHE_TIMEOUT=60)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="cached", email="cached@example.com", password="pass"
+        )
+        self.auth = CachedJWTAuthentication()
+        token = AccessToken.for_user(self.user)
+        self.request = APIRequestFactory().get(
+            "/api/categories/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+    def test_cached_user_skips_database(self):
+        with self.assertNumQueries(1):
+            self.auth.authenticate(self.request)
+        with self.assertNumQueries(0):
+            user, _ = self.auth.authenticate(self.request)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_save_invalidates_cached_user(self):
+        self.auth.authenticate(self.request)
+        self.user.first_name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertNumQueries(1):
+            user, _ = self.auth.authenticate(self.request)
+        self.assertEqual(user.first_name, "Renamed")
+
+    def test_cached_user_is_kept_until_commit(self):
+        self.auth.authenticate(self.request)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.save()
+            with self.assertNumQueries(0):
+                self.auth.authenticate(self.request)
+        self.assertTrue(callbacks)
+
+    def test_deactivated_user_is_rejected(self):
+        self.auth.authenticate(self.request)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate(self.request)
+
+    def test_password_change_keeps_newer_fields(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.request.META["HTTP_AUTHORIZATION"])
+        client.get("/api/users/me/")
+        # Not seen by the cached user.
+        User.objects.filter(pk=self.user.pk).update(first_name="Newer")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                "/api/users/change_password/",
+                {"old_password": "pass", "new_password": "new_strong_password_456"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Newer")
+        self.assertTrue(self.user.check_password("new_strong_password_456"))
+        # The cached copy with the old password is gone.
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    @override_settings(JWT_USER_CACHE_TIMEOUT=0)
+    def test_cache_disabled_by_default(self):
+        self.auth.authenticate(self.request)
+        with self.assertNumQueries(1):
+            self.auth.authenticate(self.request)
+
+
+class TokenDispatchAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="dispatch", email="dispatch@example.com", password="pass"
+        )
+        self.auth = TokenDispatchAuthentication()
+        self.factory = APIRequestFactory()
+
+    def request(self, header):
+        return self.factory.get("/api/users/me/", HTTP_AUTHORIZATION=header)
+
+    def test_jwt_does_not_reach_other_backends(self):
+        token = AccessToken.for_user(self.user)
+        with (
+            mock.patch.object(OAuth2Authentication, "authenticate") as oauth2,
+            mock.patch.object(SocialAuthentication, "authenticate") as social,
+        ):
+            user, _ = self.auth.authenticate(self.request(f"Bearer {token}"))
+        self.assertEqual(user, self.user)
+        oauth2.assert_not_called()
+        social.assert_not_called()
+
+    def test_opaque_token_uses_oauth2(self):
+        application = Application.objects.create(
+            name="app",
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_PASSWORD,
+            user=self.user,
+        )
+        OAuth2AccessToken.objects.create(
+            user=self.user,
+            application=application,
+            token="opaque-token",
+            expires=timezone.now() + timedelta(hours=1),
+            scope="read",
+        )
+        user, _ = self.auth.authenticate(self.request("Bearer opaque-token"))
+        self.assertEqual(user, self.user)
+
+    def test_backend_and_token_use_social(self):
+        with mock.patch.object(
+            SocialAuthentication,
+            "authenticate",
+            return_value=(self.user, "abc"),
+        ) as social:
+            user, _ = self.auth.authenticate(self.request("Bearer google abc"))
+        social.assert_called_once()
+        self.assertEqual(user, self.user)
+
+    def test_missing_header_is_anonymous(self):
+        request = self.factory.get("/api/users/me/")
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.auth.authenticate(request))
+
+    def test_unauthenticated_response_keeps_bearer_challenge(self):
+        response = APIClient().get("/api/users/me/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(response["WWW-Authenticate"].startswith("Bearer"))
+
+
+class PasswordHashingPoolTests(TestCase):
+    def test_rejects_work_beyond_queue_limit(self):
+        pool = PasswordHashingPool(max_workers=1, max_queue=1, timeout=5)
+        release = threading.Event()
+        running = pool.submit(release.wait)
+        queued = pool.submit(lambda: None)
+        with self.assertRaises(PasswordHashingBusy):
+            pool.submit(lambda: None)
+        self.assertEqual(pool.stats()["rejected"], 1)
+
+        release.set()
+        running.result()
+        queued.result()
+        stats = pool.stats()
+        self.assertEqual((stats["running"], stats["queued"]), (0, 0))
+        self.assertEqual(stats["completed"], 2)
+
+
+class AsyncLoginViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="async", email="async@example.com", password="async_pass_123"
+        )
+        self.view = AsyncLoginView.as_view()
+
+    def post(self, data):
+        request = AsyncRequestFactory().post(
+            "/api/auth/login/", json.dumps(data), content_type="application/json"
+        )
+        return self.view(request)
+
+    async def test_login_with_email(self):
+        response = await self.post(
+            {"username": "async@example.com", "password": "async_pass_123"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payload = json.loads(response.content)
+        self.assertIn("access", payload)
+        self.assertEqual(payload["user"]["id"], self.user.id)
+
+    async def test_login_invalid_credentials(self):
+        response = await self.post({"username": "async", "password": "wrong"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_login_missing_fields(self):
+        response = await self.post({"username": "async"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("password", json.loads(response.content))
+
+    async def test_login_rejects_malformed_body(self):
+        response = await self.post([])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", json.loads(response.content))
+        response = await self.post({"username": ["async"], "password": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("username", json.loads(response.content))
+
+    @mock.patch.object(AnonRateThrottle, "THROTTLE_RATES", {"anon": "2/min"})
+    async def test_login_is_throttled(self):
+        for _ in range(2):
+            response = await self.post({"username": "async", "password": "wrong"})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.post({"username": "async", "password": "async_pass_123"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+
+
+@override_settings(USER_DETAIL_CACHE_TIMEOUT=300)
+class UserDetailPayloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = User.objects.create_user(
+            username="learner", email="learner@example.com", password="pass"
+        )
+        UserProfile.objects.create(user=self.student, bio="Hi")
+        self.courses = []
+        for i in range(3):
+            instructor = User.objects.create_user(
+                username=f"teacher{i}",
+                email=f"teacher{i}@example.com",
+                role="INSTRUCTOR",
+                first_name=f"Teacher{i}",
+            )
+            course = Course.objects.create(
+                title=f"Course {i}",
+                description="...",
+                instructor=instructor,
+                duration=10,
+                slug=f"course-{i}",
+            )
+            Certificate.objects.create(student=self.student, course=course)
+            self.courses.append(course)
+        self.client.force_authenticate(user=self.student)
+
+    def test_me_queries_do_not_grow_with_certificates(self):
+        # User with profile, certificates with course and instructor.
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/users/me/")
+        self.assertEqual(len(response.data["certificates"]), 3)
+        self.assertEqual(
+            response.data["certificates"][0]["instructor_name"], "Teacher0"
+        )
+
+    def test_me_payload_is_cached(self):
+        self.client.get("/api/users/me/")
+        with self.assertNumQueries(0):
+            response = self.client.get(f"/api/users/{self.student.pk}/profile/")
+        self.assertEqual(response.data["profile"]["bio"], "Hi")
+
+    def test_cache_invalidated_on_changes(self):
+        self.client.get("/api/users/me/")
+        self.student.profile.bio = "Updated"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.profile.save()
+        self.assertEqual(
+            self.client.get("/api/users/me/").data["profile"]["bio"], "Updated"
+        )
+
+        course = self.courses[0]
+        course.title = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            course.save()
+        certificates = self.client.get("/api/users/me/").data["certificates"]
+        self.assertIn("Renamed", [c["course_title"] for c in certificates])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Certificate.objects.filter(course=course).delete()
+        self.assertEqual(len(self.client.get("/api/users/me/").data["certificates"]), 2)
+
+    @override_settings(USER_DETAIL_CACHE_TIMEOUT=0)
+    def test_cache_off_without_timeout(self):
+        self.client.get("/api/users/me/")
+        with self.assertNumQueries(2):
+            self.client.get("/api/users/me/")
+
+    def test_profile_of_other_user_forbidden(self):
+        other = self.courses[0].instructor
+        response = self.client.get(f"/api/users/{other.pk}/profile/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class UserDirectoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = User.objects.create_user(
+            username="staff", email="staff@example.com", is_staff=True
+        )
+        for i in range(5):
+            User.objects.create_user(
+                username=f"member{i}",
+                email=f"member{i}@example.com",
+                plan="enterprise" if i % 2 else "free",
+            )
+        self.client.force_authenticate(user=self.staff)
+
+    def test_directory_requires_staff(self):
+        self.client.force_authenticate(user=User.objects.get(username="member0"))
+        response = self.client.get("/api/users/directory/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_keyset_pages_cover_all_users(self):
+        seen = []
+        url = "/api/users/directory/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(seen, sorted(User.objects.values_list("id", flat=True))[::-1])
+
+    def test_filters(self):
+        response = self.client.get("/api/users/directory/?plan=enterprise")
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get(
+            "/api/users/directory/?role=STUDENT&is_active=true"
+            f"&date_joined__gte={timezone.now().date()}"
+        )
+        self.assertEqual(len(response.data["results"]), 6)
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get("/api/users/directory/export/?plan=enterprise")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "username", "email"])
+        self.assertEqual(len(lines), 3)
+
+    def test_csv_export_quotes_formulas(self):
+        User.objects.filter(username="member1").update(first_name="=HYPERLINK(1)")
+        response = self.client.get("/api/users/directory/export/?plan=enterprise")
+        rows = list(
+            csv.reader(b"".join(response.streaming_content).decode().splitlines())
+        )
+        self.assertEqual(rows[1][3], "'=HYPERLINK(1)")
+
+    async def test_csv_export_streams_asynchronously_under_asgi(self):
+        token = AccessToken.for_user(self.staff)
+        response = await self.async_client.get(
+            "/api/users/directory/export/?plan=enterprise",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(content.decode().splitlines()), 3)
+
+
+@override_settings(
+    THROTTLE_STORE={"BACKEND": "apps.accounts.throttling.DatabaseCounterStore"}
+)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        get_counter_store.cache_clear()
+        self.addCleanup(get_counter_store.cache_clear)
+
+    @mock.patch.object(AnonRateThrottle, "THROTTLE_RATES", {"anon": "3/min"})
+    def test_anon_limit_is_enforced_from_shared_counter(self):
+        codes = [self.client.get("/api/categories/").status_code for _ in range(5)]
+        self.assertEqual(codes, [200, 200, 200, 429, 429])
+        # Refused requests are not counted.
+        counter = ThrottleCounter.objects.get(key="throttle_anon_127.0.0.1")
+        self.assertEqual(counter.count, 3)
+
+    @mock.patch.object(AnonRateThrottle, "THROTTLE_RATES", {"anon": "3/min"})
+    def test_cache_store(self):
+        cache.clear()
+        config = {
+            "BACKEND": "apps.accounts.throttling.CacheCounterStore",
+            "OPTIONS": {"alias": "default"},
+        }
+        with (
+            self.settings(THROTTLE_STORE=config),
+            mock.patch.object(AnonRateThrottle, "timer", return_value=600.0),
+        ):
+            get_counter_store.cache_clear()
+            codes = [self.client.get("/api/categories/").status_code for _ in range(5)]
+        self.assertEqual(codes, [200, 200, 200, 429, 429])
+        self.assertFalse(ThrottleCounter.objects.exists())
+        self.assertEqual(cache.get("throttle:throttle_anon_127.0.0.1:600"), 3)
+
+    def test_previous_window_is_weighted(self):
+        throttle = AnonRateThrottle()
+        throttle.rate, throttle.num_requests, throttle.duration = "4/min", 4, 60
+        request = APIRequestFactory().get("/")
+        request.user = AnonymousUser()
+        with mock.patch.object(AnonRateThrottle, "timer", return_value=600.0):
+            for _ in range(4):
+                self.assertTrue(throttle.allow_request(request, None))
+            self.assertFalse(throttle.allow_request(request, None))
+        # The window is full: wait until a quarter of the previous 4 slid out.
+        self.assertEqual(throttle.wait(), 75)
+        # A quarter into the next window, 3 of the previous 4 still count.
+        with mock.patch.object(AnonRateThrottle, "timer", return_value=675.0):
+            self.assertTrue(throttle.allow_request(request, None))
+            self.assertFalse(throttle.allow_request(request, None))
+        self.assertEqual(throttle.wait(), 15)
+        counter = ThrottleCounter.objects.get()
+        self.assertEqual((counter.count, counter.previous_count), (1, 4))
+
+    def test_clear_expired_counters(self):
+        ThrottleCounter.objects.create(key="old", window_start=0, count=1, expires_at=1)
+        call_command("clear_throttle_counters", stdout=StringIO())
+        self.assertFalse(ThrottleCounter.objects.exists())
+
+
+class StudentImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = User.objects.create_user(
+            username="importer", email="importer@example.com", is_staff=True
+        )
+        self.instructor = User.objects.create_user(
+            username="prof", email="prof@example.com", role="INSTRUCTOR"
+        )
+        self.course = Course.objects.create(
+            title="Onboarding",
+            description="...",
+            instructor=self.instructor,
+            duration=10,
+            slug="onboarding",
+        )
+        self.client.force_authenticate(user=self.staff)
+
+    def test_csv_upload_reports_row_errors(self):
+        content = (
+            "username,email,first_name,last_name,course\n"
+            "ana,ana@corp.ao,Ana,Silva,onboarding\n"
+            "rui,rui@corp.ao,Rui,Costa,\n"
+            "importer,dup@corp.ao,,,\n"
+            "eva,not-an-email,,,\n"
+            "ana2,ana@corp.ao,,,\n"
+            "leo,leo@corp.ao,,,missing-course\n"
+        )
+        upload = SimpleUploadedFile("students.csv", content.encode(), "text/csv")
+        response = self.client.post(
+            "/api/users/import/", {"file": upload}, format="multipart"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["enrolled"], 1)
+        failed = {error["row"]: error["errors"] for error in response.data["errors"]}
+        self.assertEqual(sorted(failed), [4, 5, 6, 7])
+        self.assertIn("username", failed[4])
+        self.assertIn("email", failed[5])
+        self.assertIn("email", failed[6])
+        self.assertIn("course", failed[7])
+
+        ana = User.objects.get(username="ana")
+        self.assertEqual(ana.plan, "enterprise")
+        self.assertFalse(ana.has_usable_password())
+        self.assertTrue(UserProfile.objects.filter(user=ana).exists())
+        self.assertTrue(ana.enrollments.filter(course=self.course).exists())
+        self.assertEqual(
+            EmailOutbox.objects.filter(to_email__in=["ana@corp.ao", "rui@corp.ao"])
+            .filter(body__contains="/api/auth/password-reset-confirm/")
+            .count(),
+            2,
+        )
+
+    @override_settings(STUDENT_IMPORT_MAX_ROWS=2, STUDENT_IMPORT_MAX_PASSWORDS=1)
+    def test_upload_rejects_files_over_the_limits(self):
+        for rows in (
+            "a,a@corp.ao,\nb,b@corp.ao,\nc,c@corp.ao,\n",
+            "a,a@corp.ao,pw-a\nb,b@corp.ao,pw-b\n",
+        ):
+            upload = SimpleUploadedFile(
+                "students.csv", f"username,email,password\n{rows}".encode(), "text/csv"
+            )
+            response = self.client.post(
+                "/api/users/import/", {"file": upload}, format="multipart"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("import_students", response.data["file"][0])
+        self.assertFalse(User.objects.filter(username="a").exists())
+
+    def test_upload_rejects_unreadable_files(self):
+        for content, message in (
+            ("username,email\njoão,joao@corp.ao\n".encode("latin-1"), "UTF-8"),
+            (f"username,email\nana,{'a' * 200_000}\n".encode(), "Invalid CSV"),
+        ):
+            upload = SimpleUploadedFile("students.csv", content, "text/csv")
+            response = self.client.post(
+                "/api/users/import/", {"file": upload}, format="multipart"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(message, response.data["file"][0])
+
+    def test_command_rejects_files_that_are_not_utf8(self):
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False) as stream:
+            stream.write("username,email\njoão,joao@corp.ao\n".encode("latin-1"))
+        self.addCleanup(os.remove, stream.name)
+        with self.assertRaisesMessage(CommandError, "not UTF-8 encoded"):
+            call_command("import_students", stream.name, stdout=StringIO())
+
+    def test_concurrent_sign_up_only_fails_its_row(self):
+        content = "username,email\nana,ana@corp.ao\nrui,rui@corp.ao\n"
+        hash_passwords = StudentImporter._hash
+
+        def sign_up_then_hash(importer, passwords):
+            User.objects.create_user("rui", "other@example.com")
+            return hash_passwords(importer, passwords)
+
+        with mock.patch.object(StudentImporter, "_hash", sign_up_then_hash):
+            result = import_students(content.encode(), "csv")
+        self.assertEqual(result.created, 1)
+        self.assertEqual(
+            result.errors,
+            [
+                {
+                    "row": 3,
+                    "errors": {
+                        "username": ["A user with that username already exists."]
+                    },
+                }
+            ],
+        )
+        self.assertTrue(User.objects.filter(username="ana").exists())
+
+    def test_import_requires_staff(self):
+        self.client.force_authenticate(user=self.instructor)
+        response = self.client.post("/api/users/import/", {}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_ndjson_command_hashes_passwords_in_process_pool(self):
+        lines = [
+            json.dumps(
+                {"username": f"p{i}", "email": f"p{i}@corp.ao", "password": f"pw-{i}"}
+            )
+            for i in range(8)
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as stream:
+            stream.write("\n".join(lines + ["not json"]))
+        self.addCleanup(os.remove, stream.name)
+
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_students",
+            stream.name,
+            "--workers=2",
+            "--chunk-size=5",
+            stdout=out,
+            stderr=err,
+        )
+        self.assertIn("Created 8 student(s)", out.getvalue())
+        self.assertIn('"row": 9', err.getvalue())
+        self.assertTrue(User.objects.get(username="p7").check_password("pw-7"))
+
+    def test_bulk_queries_do_not_grow_with_rows(self):
+        rows = "".join(f"s{i},s{i}@corp.ao,,,onboarding\n" for i in range(50))
+        content = "username,email,first_name,last_name,course\n" + rows
+        # Duplicate check, course lookup, then users, profiles, enrollments and
+        # emails inside one transaction (savepoint + 4 inserts + release).
+        with self.assertNumQueries(8):
+            result = import_students(content.encode(), "csv")
+        self.assertEqual(result.created, 50)
@@ -0,0 +1,178 @@
+"""
+Rate throttles backed by a store shared across worker processes.
+
+DRF's default throttles keep a list of request timestamps per client in the
+default cache: a read-modify-write of the whole list on every request, in a
+LocMem cache that each gunicorn worker holds separately. These throttles use
+a sliding-window counter instead: the current and the previous fixed window
+counts, weighted by how far the current window has progressed. Each check is
+a single atomic increment in the configured store (``THROTTLE_STORE``),
+taken back when the request is refused.
+"""
+
+import functools
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+
+from core.metrics import record_throttle
+from .models import ThrottleCounter
+
+
+class DatabaseCounterStore:
+    """
+    Counters in the ``ThrottleCounter`` table, updated with one UPSERT per
+    check, so every worker and host sharing the database sees the same
+    counts. Every throttled request writes to the primary (on SQLite, taking
+    its single write lock), so it is only used when chosen with
+    ``THROTTLE_STORE=database``. Requires PostgreSQL or SQLite 3.35+.
+    Expired rows are deleted by ``manage.py clear_throttle_counters``.
+    """
+
+    def __init__(self):
+        qn = connection.ops.quote_name
+        table = qn(ThrottleCounter._meta.db_table)
+        key, start, count, previous, expires = map(
+            qn, ("key", "window_start", "count", "previous_count", "expires_at")
+        )
+        # SET expressions read the row as it was before the update.
+        self.sql = f"""
+            INSERT INTO {table} ({key}, {start}, {count}, {previous}, {expires})
+            VALUES (%s, %s, 1, 0, %s)
+            ON CONFLICT ({key}) DO UPDATE SET
+                {previous} = CASE
+                    WHEN {table}.{start} = excluded.{start}
+                        THEN {table}.{previous}
+                    WHEN {table}.{start} = excluded.{start} - %s
+                        THEN {table}.{count}
+                    ELSE 0
+                END,
+                {count} = CASE
+                    WHEN {table}.{start} = excluded.{start}
+                        THEN {table}.{count} + 1
+                    ELSE 1
+                END,
+                {start} = excluded.{start},
+                {expires} = excluded.{expires}
+            RETURNING {count}, {previous}
+        """
+
+    def hit(self, key, window_start, duration):
+        """
+        Count one request and return ``(current, previous)`` window counts.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self.sql, [key, window_start, window_start + 2 * duration, duration]
+            )
+            return cursor.fetchone()
+
+    def release(self, key, window_start):
+        """
+        Take back a request counted by ``hit()`` that was refused.
+        """
+        ThrottleCounter.objects.filter(
+            key=key, window_start=window_start, count__gt=0
+        ).update(count=F("count") - 1)
+
+    def clear_expired(self, now):
+        return ThrottleCounter.objects.filter(expires_at__lt=now).delete()[0]
+
+
+class CacheCounterStore:
+    """
+    Counters in a Django cache, the default store. Only shared and atomic
+    across processes when the alias points at a shared backend such as
+    Redis or Memcached; with LocMem each worker counts its own requests, as
+    DRF's throttles do.
+    """
+
+    def __init__(self, alias="default"):
+        self.cache = caches[alias]
+
+    def hit(self, key, window_start, duration):
+        current_key = f"throttle:{key}:{window_start}"
+        self.cache.add(current_key, 0, 2 * duration)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # Expired between add() and incr().
+            self.cache.set(current_key, 1, 2 * duration)
+            current = 1
+        previous = self.cache.get(f"throttle:{key}:{window_start - duration}", 0)
+        return current, previous
+
+    def release(self, key, window_start):
+        try:
+            self.cache.decr(f"throttle:{key}:{window_start}")
+        except ValueError:
+            pass
+
+    def clear_expired(self, now):
+        return 0
+
+
+@functools.cache
+def get_counter_store():
+    config = settings.THROTTLE_STORE
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+
+
+class SlidingWindowRateThrottleMixin:
+    """
+    Replaces ``SimpleRateThrottle``'s timestamp history with a shared
+    sliding-window counter. Subclasses keep DRF's rate and key logic.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        self.window_start = int(self.now // self.duration) * self.duration
+        store = get_counter_store()
+        self.current, self.previous = store.hit(
+            self.key, self.window_start, self.duration
+        )
+        elapsed = (self.now - self.window_start) / self.duration
+        if self.previous * (1 - elapsed) + self.current <= self.num_requests:
+            return True
+        # Like DRF's throttles, refused requests do not count against the
+        # client, so a burst does not keep it blocked into the next window.
+        store.release(self.key, self.window_start)
+        record_throttle(self.scope)
+        return False
+
+    def wait(self):
+        """
+        Seconds until the client may make another request, if it makes no
+        other until then: until enough of the previous window has slid out
+        of the estimate, or, when the current window is already over the
+        limit, until enough of it has slid out in the next one.
+        """
+        limit, duration = self.num_requests, self.duration
+        elapsed = (self.now - self.window_start) / duration
+        # The next request counts as the refused one would have.
+        if self.current <= limit:
+            # previous * (1 - at) + current <= limit
+            at = 1 - (limit - self.current) / self.previous
+            return max(0.0, (at - elapsed) * duration)
+        # (current - 1) * (1 - at) + 1 <= limit, ``at`` into the next window.
+        at = 1 - (limit - 1) / (self.current - 1)
+        return (1 - elapsed + at) * duration
+
+
+class AnonRateThrottle(SlidingWindowRateThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowRateThrottleMixin, throttling.UserRateThrottle):
+    pass
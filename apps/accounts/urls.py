@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from core.lazy import lazy_view
 from .views import (
     RegisterView,
     UserViewSet,
     ActivateAccountView,
-    SocialLoginView,
+    UserDirectoryView,
+    UserDirectoryExportView,
+    StudentImportView,
     RequestPasswordResetView,
     PasswordResetConfirmView,
     social_auth_success,
@@ -33,10 +36,22 @@ urlpatterns = [
         name="password_reset_confirm",
     ),
     # Social Login (placeholder)
-    path("auth/social-login/", SocialLoginView.as_view(), name="social_login"),
+    path(
+        "auth/social-login/",
+        lazy_view("apps.accounts.social_views.SocialLoginView", csrf_exempt=True),
+        name="social_login",
+    ),
     # OAuth2 Success
     path("auth/success/", social_auth_success, name="social_auth_success"),
     path("auth/error/", social_auth_error, name="social_auth_error"),
+    # Staff directory (before the router so "directory" is not read as a pk)
+    path("users/directory/", UserDirectoryView.as_view(), name="user_directory"),
+    path(
+        "users/directory/export/",
+        UserDirectoryExportView.as_view(),
+        name="user_directory_export",
+    ),
+    path("users/import/", StudentImportView.as_view(), name="student_import"),
     # User URLs
     path("", include(router.urls)),
 ]
@@ -1,17 +1,47 @@
-from rest_framework import generics, status, viewsets
+import csv
+import io
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import generics, pagination, status, viewsets
+from rest_framework.exceptions import Throttled
+from rest_framework.parsers import MultiPartParser
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from django.core.mail import send_mail
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from django.conf import settings
+from django.db import transaction
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
-from drf_social_oauth2.views import ConvertTokenView
-from .models import CustomUser, UserProfile
+from django.db.models import Prefetch
+from . import hashing
+from .caching import get_user_detail
+from .backends import EmailOrUsernameModelBackend
+from .emails import activation_email, enqueue_email
+from .importer import (
+    FORMATS,
+    ImportFileError,
+    StudentImporter,
+    detect_format,
+    parse_rows,
+)
+from .models import Certificate, CustomUser, UserProfile
 from .serializers import (
+    CustomTokenObtainPairSerializer,
     UserDetailSerializer,
+    UserDirectorySerializer,
     UserSerializer,
     ChangePasswordSerializer,
     RequestPasswordResetSerializer,
@@ -35,41 +65,21 @@ class RegisterView(generics.CreateAPIView):
         role = "STUDENT"
         is_approved = True
 
-        user = CustomUser.objects.create_user(
-            username=serializer.validated_data["username"],
-            email=serializer.validated_data["email"],
-            password=serializer.validated_data["password"],
-            role=role,
-            is_approved=is_approved,
-            is_active=False,
-        )
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(
+                username=serializer.validated_data["username"],
+                email=serializer.validated_data["email"],
+                password=serializer.validated_data["password"],
+                role=role,
+                is_approved=is_approved,
+                is_active=False,
+            )
 
-        # Create profile
-        UserProfile.objects.create(user=user)
+            # Create profile
+            UserProfile.objects.create(user=user)
 
-        # Send Activation Email
-        token = default_token_generator.make_token(user)
-        uid = urlsafe_base64_encode(force_bytes(user.pk))
-        activation_link = f"http://localhost:8000/api/auth/activate/{uid}/{token}/"
-        subject = "Activate your PyNerd Account"
-        message = f"Please click the link to activate: {activation_link}"
-        from_email = settings.EMAIL_HOST_USER
-        recipient_list = [user.email]
-
-        try:
-            send_mail(
-                subject,
-                message,
-                from_email,
-                recipient_list,
-                fail_silently=False,
-            )
-        except Exception as ex:
-            user.delete()  # Rollback user creation on email failure
-            return Response(
-                {"detail": "Failed to send activation email."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+            # Queue Activation Email (delivered by send_outbox_emails)
+            activation_email(user).save()
 
         return Response(
             {"detail": "User created. Please check email for activation."},
@@ -136,18 +146,40 @@ class UserViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    def get_queryset(self):
+        """
+        Load profiles and certificates (with course and instructor) up front
+        so serializing a user costs a fixed number of queries.
+        """
+        return CustomUser.objects.select_related("profile").prefetch_related(
+            Prefetch(
+                "certificates",
+                queryset=Certificate.objects.select_related("course__instructor"),
+            )
+        )
+
+    def get_user_detail(self, user_id):
+        """
+        Return the cached ``UserDetailSerializer`` payload for ``user_id``.
+        """
+        return get_user_detail(
+            user_id,
+            lambda: UserDetailSerializer(self.get_queryset().get(pk=user_id)).data,
+        )
+
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
     def profile(self, request, pk=None):
         """
         Retrieve the profile of the current user.
         """
+        if str(request.user.pk) == pk:
+            return Response(self.get_user_detail(request.user.pk))
         user = self.get_object()
         if request.user != user and not request.user.is_superuser:
             return Response(
                 {"detail": "Not authorized."}, status=status.HTTP_403_FORBIDDEN
             )
-        serializer = UserDetailSerializer(user)
-        return Response(serializer.data)
+        return Response(self.get_user_detail(user.pk))
 
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
     def change_password(self, request):
@@ -157,13 +189,16 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = ChangePasswordSerializer(data=request.data)
         if serializer.is_valid():
             user = request.user
-            if not user.check_password(serializer.data.get("old_password")):
+            if not hashing.check_password(user, serializer.data.get("old_password")):
                 return Response(
                     {"old_password": ["Wrong password."]},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            user.set_password(serializer.data.get("new_password"))
-            user.save()
+            hashing.set_password(user, serializer.data.get("new_password"))
+            # request.user may be a copy from the JWT user cache: write only
+            # the password, not its possibly stale other fields. The save
+            # drops the cached copy once committed (signals.py).
+            user.save(update_fields=["password"])
             return Response(
                 {"detail": "Password changed successfully."}, status=status.HTTP_200_OK
             )
@@ -174,8 +209,176 @@ class UserViewSet(viewsets.ModelViewSet):
         """
         Return the authenticated user's profile.
         """
-        serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
+        return Response(self.get_user_detail(request.user.pk))
+
+
+class UserDirectoryPagination(pagination.CursorPagination):
+    """
+    Keyset pagination on the primary key: every page is an index range scan,
+    however deep the client pages.
+    """
+
+    ordering = "-id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class UserDirectoryView(generics.ListAPIView):
+    """
+    Staff-only user directory with indexed filters.
+
+    Filters: ``role``, ``plan``, ``is_active``, ``date_joined__gte`` and
+    ``date_joined__lte``.
+    """
+
+    serializer_class = UserDirectorySerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = UserDirectoryPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {
+        "role": ["exact"],
+        "plan": ["exact"],
+        "is_active": ["exact"],
+        "date_joined": ["gte", "lte"],
+    }
+
+    def get_queryset(self):
+        return CustomUser.objects.only(*UserDirectorySerializer.Meta.fields)
+
+
+class _Echo:
+    """File-like object that returns what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+@extend_schema(responses={(200, "text/csv"): OpenApiTypes.BINARY})
+class UserDirectoryExportView(UserDirectoryView):
+    """
+    Stream the filtered user directory as CSV.
+
+    Rows are read with a server-side cursor in chunks and written to the
+    response as they are produced, so memory use does not grow with the
+    number of users. Under ASGI the rows come from an async iterator, which
+    Django streams; a sync one would be read whole before the first byte is
+    sent. Cells that a spreadsheet would run as a formula are quoted.
+    """
+
+    pagination_class = None
+    chunk_size = 2000
+
+    def list(self, request, *args, **kwargs):
+        fields = UserDirectorySerializer.Meta.fields
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .order_by("id")
+            .values_list(*fields)
+        )
+        rows = queryset.iterator(chunk_size=self.chunk_size)
+        writer = csv.writer(_Echo())
+        if isinstance(request._request, ASGIRequest):
+            content = _acsv_rows(writer, fields, rows, self.chunk_size)
+        else:
+            content = _csv_rows(writer, fields, rows)
+        response = StreamingHttpResponse(content, content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="users.csv"'
+        return response
+
+
+# Leading characters that make spreadsheets evaluate a cell as a formula.
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_rows(writer, header, rows):
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def _csv_chunk(writer, rows, size):
+    return "".join(
+        writer.writerow([_csv_cell(value) for value in row])
+        for row in islice(rows, size)
+    )
+
+
+async def _acsv_rows(writer, header, rows, chunk_size):
+    # QuerySet.aiterator() runs values_list() queries on the event loop, so
+    # the sync iterator is read a chunk at a time in a worker thread.
+    yield writer.writerow(header)
+    while chunk := await sync_to_async(_csv_chunk)(writer, rows, chunk_size):
+        yield chunk
+
+
+@extend_schema(
+    request={"multipart/form-data": OpenApiTypes.OBJECT},
+    responses={200: OpenApiTypes.OBJECT},
+)
+class StudentImportView(generics.GenericAPIView):
+    """
+    Staff-only bulk import of enterprise students.
+
+    Accepts a multipart upload in the ``file`` field, as CSV or NDJSON
+    (detected from the file name, or forced with ``format``), and reports
+    created users, enrollments and per-row errors. The import runs in the
+    request, so files over ``STUDENT_IMPORT_MAX_ROWS`` rows, or with more
+    than ``STUDENT_IMPORT_MAX_PASSWORDS`` passwords to hash, are rejected
+    before anything is written; they go through
+    ``python manage.py import_students``.
+    """
+
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+    serializer_class = None
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": ["This field is required."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        fmt = request.data.get("format") or detect_format(
+            upload.name, upload.content_type or ""
+        )
+        if fmt not in FORMATS:
+            return Response(
+                {"format": [f"Must be one of: {', '.join(FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        max_rows = settings.STUDENT_IMPORT_MAX_ROWS
+        try:
+            rows = list(islice(parse_rows(stream, fmt), max_rows + 1))
+        except ImportFileError as ex:
+            return Response({"file": [str(ex)]}, status=status.HTTP_400_BAD_REQUEST)
+        passwords = sum(1 for _, data in rows if data and data.get("password"))
+        if len(rows) > max_rows or passwords > settings.STUDENT_IMPORT_MAX_PASSWORDS:
+            return Response(
+                {
+                    "file": [
+                        f"At most {max_rows} rows, with up to "
+                        f"{settings.STUDENT_IMPORT_MAX_PASSWORDS} passwords, can be "
+                        "imported here. Use `python manage.py import_students` "
+                        "for larger files."
+                    ]
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        result = StudentImporter(chunk_size=settings.STUDENT_IMPORT_CHUNK_SIZE).run(
+            rows
+        )
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
 
 
 class RequestPasswordResetView(generics.GenericAPIView):
@@ -199,12 +402,11 @@ class RequestPasswordResetView(generics.GenericAPIView):
                 f"http://localhost:8000/api/auth/password-reset-confirm/{uid}/{token}/"
             )
 
-            send_mail(
+            enqueue_email(
                 subject="Reset your PyNerd Password",
                 message=f"Click the link to reset your password: {reset_link}",
-                from_email=settings.EMAIL_HOST_USER,
                 recipient_list=[email],
-                fail_silently=False,
+                from_email=settings.EMAIL_HOST_USER,
             )
         except CustomUser.DoesNotExist:
             # We do not want to reveal if a user exists or not
@@ -235,7 +437,7 @@ class PasswordResetConfirmView(generics.GenericAPIView):
             user = None
 
         if user is not None and default_token_generator.check_token(user, token):
-            user.set_password(serializer.validated_data["new_password"])
+            hashing.set_password(user, serializer.validated_data["new_password"])
             user.save()
             return Response(
                 {"detail": "Password reset successfully."}, status=status.HTTP_200_OK
@@ -246,12 +448,98 @@ class PasswordResetConfirmView(generics.GenericAPIView):
         )
 
 
-class SocialLoginView(ConvertTokenView):
+class LoginThrottles(APIView):
+    """
+    The throttles of ``TokenObtainPairView``, checked by ``AsyncLoginView``.
+    """
+
+    authentication_classes = ()
+    throttle_classes = TokenObtainPairView.throttle_classes
+
+    def check(self, request):
+        self.check_throttles(Request(request))
+
+
+def login_field_errors(data):
+    """
+    Validate the login body as ``TokenObtainPairSerializer`` does: an object
+    with string ``username`` and ``password``.
+    """
+    if not isinstance(data, dict):
+        return {
+            "non_field_errors": [
+                "Invalid data. Expected a dictionary, but got "
+                f"{type(data).__name__}."
+            ]
+        }
+    errors = {}
+    for field in ("username", "password"):
+        value = data.get(field)
+        if not value:
+            errors[field] = ["This field is required."]
+        elif not isinstance(value, str):
+            errors[field] = ["Not a valid string."]
+    return errors
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncLoginView(View):
     """
-    View to handle social login using drf-social-oauth2.
+    Async counterpart of ``TokenObtainPairView`` for ``api/auth/login/``.
+
+    Used when the app is served through ``core/asgi.py``. Password
+    verification awaits the hashing pool, so a burst of logins does not tie
+    up the event loop serving the rest of the API. Responses match the sync
+    view, and so do the throttles, checked in a worker thread before the
+    credentials.
     """
 
-    pass
+    backend_path = "apps.accounts.backends.EmailOrUsernameModelBackend"
+
+    async def post(self, request):
+        try:
+            await sync_to_async(LoginThrottles().check)(request)
+        except Throttled as ex:
+            response = JsonResponse({"detail": ex.detail}, status=ex.status_code)
+            if ex.wait is not None:
+                response["Retry-After"] = "%d" % ex.wait
+            return response
+
+        try:
+            if request.content_type == "application/json":
+                data = json.loads(request.body or b"{}")
+            else:
+                data = request.POST
+        except ValueError:
+            return JsonResponse(
+                {"detail": "JSON parse error."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        errors = login_field_errors(data)
+        if errors:
+            return JsonResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            user = await EmailOrUsernameModelBackend().aauthenticate(
+                request, username=data["username"], password=data["password"]
+            )
+        except hashing.PasswordHashingBusy as ex:
+            return JsonResponse({"detail": ex.detail}, status=ex.status_code)
+        if user is None:
+            return JsonResponse(
+                {"detail": "No active account found with the given credentials"},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        user.backend = self.backend_path
+
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
+        return JsonResponse(
+            {
+                "refresh": str(refresh),
+                "access": str(refresh.access_token),
+                "user": CustomTokenObtainPairSerializer.get_user_payload(user),
+            }
+        )
 
 
 @api_view(["GET"])
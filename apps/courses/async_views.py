@@ -0,0 +1,209 @@
+"""
+Async read endpoints served through ``core/asgi.py``.
+
+They answer GET requests on the same URLs and with the same responses as the
+DRF views in ``views.py``, and pass every other method through to those
+views. DRF still authenticates, checks permissions and throttles, and
+filters, all in a worker thread. The main queries use the async ORM, and
+serialization runs on the event loop over fully prefetched rows. Enabled by
+``ASYNC_READ_VIEWS``.
+"""
+
+from asgiref.sync import sync_to_async
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import generics, status
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from core.db_routers import ReplicaReadMixin
+from .caching import (
+    CATALOG_TAG,
+    CATEGORIES_TAG,
+    aget_payload,
+    catalog_cacheable,
+    payload_response,
+)
+from .models import Category
+from .serializers import CategorySerializer, CourseSerializer
+from .views import (
+    CategoryViewSet,
+    CourseViewSet,
+    StandardResultSetPagination,
+    StudentProgressView,
+    student_progress_querysets,
+    summarise_progress,
+    visible_courses,
+)
+
+
+class RequestChecks(ReplicaReadMixin, generics.GenericAPIView):
+    """
+    Runs the DRF request lifecycle for an ``AsyncReadView`` without the
+    handler.
+    """
+
+    # JSON only: the browsable API renderer needs a full view.
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES[:1]
+
+    def prepare(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.format_kwarg = None
+        self.request = self.initialize_request(request, *args, **kwargs)
+        self.headers = self.default_response_headers
+        self.initial(self.request, *args, **kwargs)
+        return self.request
+
+    def render(self, response):
+        response = self.finalize_response(self.request, response)
+        if isinstance(response, Response):
+            response.render()
+        return response
+
+    def render_exception(self, exc):
+        return self.render(self.handle_exception(exc))
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncReadView(View):
+    """
+    GET is served by the async ``get``. Other methods go to ``fallback``, the
+    sync DRF view for the same URL.
+    """
+
+    fallback = None
+    cache_tags = [CATALOG_TAG]
+    permission_classes = [AllowAny]
+    filter_backends = []
+    filterset_fields = None
+    search_fields = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            if self.fallback is None:
+                return self.http_method_not_allowed(request, *args, **kwargs)
+            return await sync_to_async(self.fallback)(request, *args, **kwargs)
+
+        self.checks = RequestChecks(
+            permission_classes=self.permission_classes,
+            filter_backends=self.filter_backends,
+            filterset_fields=self.filterset_fields,
+            search_fields=self.search_fields,
+        )
+        try:
+            request = await sync_to_async(self.checks.prepare)(request, *args, **kwargs)
+            response = await self.get(request, *args, **kwargs)
+        except Exception as exc:
+            return await sync_to_async(self.checks.render_exception)(exc)
+        return self.checks.render(response)
+
+    async def filter_queryset(self, queryset):
+        # Filter validation may query the database (e.g. ModelChoiceFilter).
+        return await sync_to_async(self.checks.filter_queryset)(queryset)
+
+    async def cached_response(self, name, request, build_data):
+        """
+        Async counterpart of ``CatalogCacheMixin.cached_response``:
+        ``build_data()`` is awaited on a miss for the response data.
+        """
+        if not catalog_cacheable(request):
+            return Response(await build_data())
+
+        async def render():
+            return request.accepted_renderer.render(
+                await build_data(),
+                request.accepted_media_type,
+                self.checks.get_renderer_context(),
+            )
+
+        return payload_response(
+            await aget_payload(name, request, self.cache_tags, render)
+        )
+
+
+class AsyncCourseListView(AsyncReadView):
+    fallback = staticmethod(CourseViewSet.as_view({"get": "list", "post": "create"}))
+    filter_backends = CourseViewSet.filter_backends
+    filterset_fields = CourseViewSet.filterset_fields
+    search_fields = CourseViewSet.search_fields
+
+    async def get(self, request):
+        async def build_data():
+            queryset = await self.filter_queryset(visible_courses(request.user))
+
+            paginator = StandardResultSetPagination()
+            paginator.request = request
+            paginator.limit = paginator.get_limit(request)
+            paginator.offset = paginator.get_offset(request)
+            paginator.count = await queryset.acount()
+            page = [
+                course
+                async for course in queryset[
+                    paginator.offset : paginator.offset + paginator.limit
+                ]
+            ]
+            return paginator.get_paginated_response(
+                CourseSerializer(page, many=True).data
+            ).data
+
+        return await self.cached_response("courses", request, build_data)
+
+
+class AsyncCourseDetailView(AsyncReadView):
+    fallback = staticmethod(
+        CourseViewSet.as_view(
+            {
+                "get": "retrieve",
+                "put": "update",
+                "patch": "partial_update",
+                "delete": "destroy",
+            }
+        )
+    )
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request, pk):
+        async def build_data():
+            course = await visible_courses(request.user).filter(pk=pk).afirst()
+            if course is None:
+                raise NotFound("No Course matches the given query.")
+            return CourseSerializer(course).data
+
+        return await self.cached_response("course", request, build_data)
+
+
+class AsyncCategoryListView(AsyncReadView):
+    fallback = staticmethod(CategoryViewSet.as_view({"get": "list"}))
+    cache_tags = [CATEGORIES_TAG]
+
+    async def get(self, request):
+        async def build_data():
+            categories = [
+                category async for category in Category.objects.filter(is_active=True)
+            ]
+            return CategorySerializer(categories, many=True).data
+
+        return await self.cached_response("categories", request, build_data)
+
+
+class AsyncStudentProgressView(AsyncReadView):
+    fallback = staticmethod(StudentProgressView.as_view())
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request, id):
+        if request.user.id != id and not request.user.is_superuser:
+            return Response(
+                {"detail": "Not authorized."}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        progress_data, total_data = student_progress_querysets(id)
+        return Response(
+            summarise_progress(
+                [item async for item in progress_data],
+                [item async for item in total_data],
+            )
+        )
@@ -0,0 +1,80 @@
+"""
+Cached JSON payloads for the published catalog (the course list and course
+detail with its curriculum), categories and quizzes.
+
+Entries hold the rendered bytes together with their gzip and brotli
+encodings (``core.compression.PrecompressedContent``), so a hit is served
+without serializing, rendering or compressing. They live in
+``payload_cache``, a ``core.caching.TieredCache``, tagged with what they
+show; the signal handlers in ``signals.py`` invalidate a tag once a change
+to a category, course, module, lesson, instructor name or quiz is
+committed. ``CATALOG_CACHE_TIMEOUT`` bounds staleness for changes made
+without signals, such as ``QuerySet.update()``, and for the enrollment
+counts.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from core.caching import TieredCache
+from core.compression import PrecompressedContent
+
+CATALOG_TAG = "catalog"
+CATEGORIES_TAG = "categories"
+QUIZZES_TAG = "quizzes"
+
+payload_cache = TieredCache("catalog")
+
+
+def catalog_cacheable(request):
+    """
+    Whether ``request`` gets the shared, JSON-rendered payloads. Instructors
+    also see their own drafts.
+    """
+    return request.accepted_renderer.format == "json" and not (
+        request.user.is_authenticated and request.user.role == "INSTRUCTOR"
+    )
+
+
+def invalidate_catalog():
+    payload_cache.invalidate_tags(CATALOG_TAG)
+
+
+def payload_cache_key(name, request):
+    # The absolute URL covers filters, pagination and the host in page links.
+    url = hashlib.md5(request.build_absolute_uri().encode(), usedforsecurity=False)
+    return f"{name}:{url.hexdigest()}"
+
+
+def get_payload(name, request, tags, render):
+    """
+    Return the cached payload for ``name`` and the request URL, or cache
+    the one built from ``render()``'s bytes. ``render()`` returns ``None``
+    for responses that must not be cached.
+    """
+
+    def build():
+        content = render()
+        return None if content is None else PrecompressedContent.build(content)
+
+    return payload_cache.get_or_set(
+        payload_cache_key(name, request), build, settings.CATALOG_CACHE_TIMEOUT, tags
+    )
+
+
+async def aget_payload(name, request, tags, render):
+    async def build():
+        return PrecompressedContent.build(await render())
+
+    return await payload_cache.aget_or_set(
+        payload_cache_key(name, request), build, settings.CATALOG_CACHE_TIMEOUT, tags
+    )
+
+
+def payload_response(payload):
+    response = HttpResponse(payload.content, content_type="application/json")
+    # Picked up by core.compression.CompressionMiddleware.
+    response.precompressed = payload.encoded
+    return response
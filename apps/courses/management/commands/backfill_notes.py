@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.courses.notes import backfill_client_ids, rebuild_note_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Give notes without a client_id their own and recount the per-lesson "
+        "note counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Notes updated per query.",
+        )
+
+    def handle(self, *args, **options):
+        updated = backfill_client_ids(options["batch_size"])
+        counters = rebuild_note_counts()
+        self.stdout.write(
+            f"Assigned {updated} client id(s), rebuilt {counters} note counter(s)."
+        )
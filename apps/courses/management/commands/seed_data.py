@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.seeding import DEFAULT_PASSWORD, Seeder, SeedVolumes
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic catalog, student, enrollment and progress data."
+
+    def add_arguments(self, parser):
+        defaults = SeedVolumes()
+        for name, help_text in [
+            ("categories", "Categories."),
+            ("instructors", "Instructors."),
+            ("courses", "Published courses."),
+            ("modules", "Modules per course."),
+            ("lessons", "Lessons per module."),
+            ("questions", "Questions per quiz (one quiz per module, 0 for none)."),
+            ("students", "Students."),
+            ("enrollments", "Enrollments per student."),
+        ]:
+            parser.add_argument(
+                f"--{name}", type=int, default=getattr(defaults, name), help=help_text
+            )
+        parser.add_argument(
+            "--completion",
+            type=float,
+            default=defaults.completion,
+            help="Average share of an enrolled course's lessons completed (0-1).",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix of seeded usernames, emails and slugs.",
+        )
+        parser.add_argument(
+            "--password",
+            default=DEFAULT_PASSWORD,
+            help="Password of every seeded user.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Students written per transaction.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk_create batch.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+
+    def handle(self, *args, **options):
+        volumes = SeedVolumes(
+            **{
+                name: options[name]
+                for name in SeedVolumes.__dataclass_fields__
+                if name in options
+            }
+        )
+        if not 0 <= volumes.completion <= 1:
+            raise CommandError("--completion must be between 0 and 1.")
+
+        seeder = Seeder(
+            volumes,
+            prefix=options["prefix"],
+            password=options["password"],
+            chunk_size=options["chunk_size"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+            log=self.stdout.write,
+        )
+        if seeder.exists():
+            raise CommandError(
+                f"Users prefixed '{options['prefix']}-' already exist; "
+                "pass another --prefix."
+            )
+
+        self.stdout.write(
+            f"Seeding about {volumes.expected_progress_rows():,} progress rows."
+        )
+        result = seeder.run()
+        self.stdout.write(
+            ", ".join(f"{count:,} {name}" for name, count in result.counts.items())
+        )
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.core.validators import URLValidator
@@ -65,6 +67,18 @@ class Course(models.Model):
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Published catalog, newest first (see visible_courses). Partial,
+            # because boolean filters compile to a bare ``WHERE is_published``
+            # that a leading boolean key cannot be searched with.
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(is_published=True),
+                name="course_published_created_idx",
+            ),
+        ]
+
     # Campos calculados
     @property
     def rating(self):
@@ -74,6 +88,9 @@ class Course(models.Model):
 
     @property
     def students_count(self):
+        # Course listings annotate the count instead of querying per course.
+        if hasattr(self, "enrollments_count"):
+            return self.enrollments_count
         return self.enrollments.count()
 
     @property
@@ -145,7 +162,7 @@ class Enrollment(models.Model):
         limit_choices_to={"role": "STUDENT"},
         on_delete=models.CASCADE,
         related_name="enrollments",
-        db_index=True,  # Added index
+        db_index=False,  # Leads both indexes in Meta
     )
     course = models.ForeignKey(
         Course,
@@ -158,6 +175,12 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ("student", "course")
+        indexes = [
+            # A student's courses, most recently enrolled first (my_courses)
+            models.Index(
+                fields=["student", "enrolled_at"], name="enrollment_student_date_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student.email} enrolled in {self.course.title}"
@@ -168,15 +191,24 @@ class Progress(models.Model):
         "accounts.CustomUser",
         on_delete=models.CASCADE,
         related_name="progress",
-        db_index=True,  # Added index
+        db_index=False,  # Leads both indexes in Meta
     )
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE)
-    is_completed = models.BooleanField(default=False, db_index=True)  # Added index
+    is_completed = models.BooleanField(default=False)
     # FIX: Removed auto_now_add=True to allow setting date on completion
     completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ("student", "lesson")
+        indexes = [
+            # Completed lessons per student (student progress, certificate
+            # checks); partial for the same reason as Course's index
+            models.Index(
+                fields=["student", "lesson"],
+                condition=models.Q(is_completed=True),
+                name="progress_student_done_idx",
+            ),
+        ]
 
     def clean(self):
         if not Enrollment.objects.filter(
@@ -232,12 +264,61 @@ class Option(models.Model):
 
 class Note(models.Model):
     student = models.ForeignKey(
-        "accounts.CustomUser", on_delete=models.CASCADE, related_name="notes"
+        "accounts.CustomUser",
+        on_delete=models.CASCADE,
+        related_name="notes",
+        db_index=False,  # Leads the index in Meta
     )
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="notes")
     content = models.TextField()
     timestamp = models.PositiveIntegerField(help_text="Position in video (seconds)")
+    # Chosen by the player for notes taken offline, so a re-sent batch
+    # updates the notes it created the first time. Assigned on save rather
+    # than by a field default: adding the column leaves existing notes NULL
+    # (a default would give them all the same UUID) until
+    # ``manage.py backfill_notes`` gives each its own.
+    client_id = models.UUIDField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # A student's notes on a lesson, in video order
+            models.Index(
+                fields=["student", "lesson", "timestamp"],
+                name="note_student_lesson_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["student", "client_id"], name="note_student_client_id_uniq"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.client_id is None:
+            self.client_id = uuid.uuid4()
+        super().save(*args, **kwargs)
+
+
+class NoteCount(models.Model):
+    """
+    Number of a student's notes on a lesson, kept up to date as notes are
+    added and removed (see ``apps.courses.notes``), so note counts are read
+    rather than counted.
+    """
+
+    student = models.ForeignKey(
+        "accounts.CustomUser",
+        on_delete=models.CASCADE,
+        related_name="note_counts",
+        db_index=False,  # Leads the unique index
+    )
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("student", "lesson")
 
 
 class Resource(models.Model):
@@ -254,7 +335,10 @@ class Resource(models.Model):
 
 class Bookmark(models.Model):
     student = models.ForeignKey(
-        "accounts.CustomUser", on_delete=models.CASCADE, related_name="bookmarks"
+        "accounts.CustomUser",
+        on_delete=models.CASCADE,
+        related_name="bookmarks",
+        db_index=False,  # Leads the unique index
     )
     lesson = models.ForeignKey(
         Lesson, on_delete=models.CASCADE, related_name="bookmarks"
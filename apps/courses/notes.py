@@ -0,0 +1,229 @@
+"""
+Student notes: per-lesson note counters and the batch sync of notes taken
+offline.
+
+``NoteCount`` holds the number of notes each student has on each lesson.
+Single notes adjust it from signals (``signals.py``); ``sync_notes`` writes
+whole batches, one INSERT for the new notes and one ``bulk_create`` UPSERT
+for the updated ones, and adjusts it once for the notes it inserted. Added
+notes increment it with one UPSERT for all their lessons; removed notes
+decrement it, and never insert, so a counter deleted together with its
+lesson or student stays deleted. ``manage.py backfill_notes`` gives notes
+created before ``client_id`` existed their own and recounts the counters.
+"""
+
+import uuid
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Lesson, Note, NoteCount
+from .serializers import NoteSyncItemSerializer
+
+
+def add_note_counts(student_id, counts):
+    """
+    Add ``counts`` (lesson id -> number of new notes) to the student's
+    counters. Requires PostgreSQL or SQLite 3.35+.
+    """
+    if not counts:
+        return
+    qn = connection.ops.quote_name
+    table = qn(NoteCount._meta.db_table)
+    student, lesson, count = map(qn, ("student_id", "lesson_id", "count"))
+    values = ", ".join(["(%s, %s, %s)"] * len(counts))
+    params = []
+    for lesson_id, added in counts.items():
+        params += [student_id, lesson_id, added]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} ({student}, {lesson}, {count})
+            VALUES {values}
+            ON CONFLICT ({student}, {lesson}) DO UPDATE SET
+                {count} = {table}.{count} + excluded.{count}
+            """,
+            params,
+        )
+
+
+def insert_new_notes(notes):
+    """
+    Insert ``notes``, skipping those whose ``client_id`` the student already
+    has (a concurrent sync created it first), and return the ``client_id``s
+    inserted. Requires PostgreSQL or SQLite 3.35+.
+    """
+    if not notes:
+        return set()
+    qn = connection.ops.quote_name
+    fields = [field for field in Note._meta.concrete_fields if not field.primary_key]
+    client_id = Note._meta.get_field("client_id")
+    row = "(%s)" % ", ".join(["%s"] * len(fields))
+    params = []
+    for note in notes:
+        params += [
+            field.get_db_prep_save(field.pre_save(note, True), connection)
+            for field in fields
+        ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {qn(Note._meta.db_table)}
+                ({", ".join(qn(field.column) for field in fields)})
+            VALUES {", ".join([row] * len(notes))}
+            ON CONFLICT ({qn("student_id")}, {qn(client_id.column)}) DO NOTHING
+            RETURNING {qn(client_id.column)}
+            """,
+            params,
+        )
+        return {client_id.to_python(value) for value, in cursor.fetchall()}
+
+
+def remove_note_count(student_id, lesson_id):
+    # A counter already at 0 (out of step with the notes) stays there rather
+    # than failing the deletion on its CHECK constraint.
+    NoteCount.objects.filter(
+        student_id=student_id, lesson_id=lesson_id, count__gt=0
+    ).update(count=F("count") - 1)
+
+
+def backfill_client_ids(batch_size=1000):
+    """
+    Give every note without a ``client_id`` its own. Return the number of
+    notes updated.
+    """
+    updated = 0
+    while notes := list(
+        Note.objects.filter(client_id__isnull=True).only("pk")[:batch_size]
+    ):
+        for note in notes:
+            note.client_id = uuid.uuid4()
+        Note.objects.bulk_update(notes, ["client_id"])
+        updated += len(notes)
+    return updated
+
+
+def rebuild_note_counts():
+    """
+    Recount every ``NoteCount`` from the notes, in one transaction. Return
+    the number of counters.
+    """
+    qn = connection.ops.quote_name
+    table = qn(NoteCount._meta.db_table)
+    student, lesson, count = map(qn, ("student_id", "lesson_id", "count"))
+    with transaction.atomic():
+        NoteCount.objects.all().delete()
+        with connection.cursor() as cursor:
+            # WHERE true: SQLite needs it before ON CONFLICT in INSERT ... SELECT.
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({student}, {lesson}, {count})
+                SELECT {student}, {lesson}, COUNT(*)
+                FROM {qn(Note._meta.db_table)}
+                WHERE true
+                GROUP BY {student}, {lesson}
+                ON CONFLICT ({student}, {lesson}) DO UPDATE SET
+                    {count} = excluded.{count}
+                """
+            )
+        return NoteCount.objects.count()
+
+
+def sync_notes(student, items):
+    """
+    Apply a batch of notes from the player, matched on ``client_id``: new
+    ones are created, known ones updated and ``deleted`` ones removed. An
+    item with an ``updated_at`` older than the stored note is skipped, so
+    an edit made since on another device wins. Invalid items are reported
+    by position and the rest are still applied.
+
+    Return the number of notes created, updated and deleted, the skipped
+    ``client_id``s, the errors and the resulting notes.
+    """
+    errors = []
+    # The last item wins when a batch repeats a client_id.
+    valid = {}
+    for index, item in enumerate(items):
+        serializer = NoteSyncItemSerializer(data=item)
+        if serializer.is_valid():
+            valid[serializer.validated_data["client_id"]] = (
+                index,
+                serializer.validated_data,
+            )
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+
+    allowed_lessons = set(
+        Lesson.objects.filter(
+            pk__in={item["lesson"] for _, item in valid.values() if "lesson" in item},
+            module__course__enrollments__student=student,
+        ).values_list("pk", flat=True)
+    )
+
+    created, updated, deleted, skipped = [], [], [], []
+    with transaction.atomic():
+        stored = {
+            note.client_id: note
+            for note in Note.objects.filter(student=student, client_id__in=valid).only(
+                "pk", "client_id", "lesson_id", "updated_at"
+            )
+        }
+        for client_id, (index, item) in valid.items():
+            note = stored.get(client_id)
+            if (
+                note is not None
+                and item.get("updated_at")
+                and note.updated_at > item["updated_at"]
+            ):
+                skipped.append(client_id)
+            elif item["deleted"]:
+                if note is not None:
+                    deleted.append(note.pk)
+            elif note is None and item["lesson"] not in allowed_lessons:
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": {"lesson": ["Not enrolled in this course."]},
+                    }
+                )
+            else:
+                # Notes stay on the lesson they were created on.
+                note = Note(
+                    student=student,
+                    client_id=client_id,
+                    lesson_id=item["lesson"] if note is None else note.lesson_id,
+                    content=item["content"],
+                    timestamp=item["timestamp"],
+                )
+                (created if client_id not in stored else updated).append(note)
+
+        # Only notes this sync inserted are counted: one a concurrent sync
+        # created since it was looked up above is updated instead.
+        inserted = insert_new_notes(created)
+        updated += [note for note in created if note.client_id not in inserted]
+        created = [note for note in created if note.client_id in inserted]
+        if updated:
+            Note.objects.bulk_create(
+                updated,
+                update_conflicts=True,
+                unique_fields=["student", "client_id"],
+                update_fields=["content", "timestamp", "updated_at"],
+            )
+        add_note_counts(student.pk, Counter(note.lesson_id for note in created))
+        if deleted:
+            # Each deletion decrements its counter through post_delete.
+            Note.objects.filter(pk__in=deleted).delete()
+
+    notes = Note.objects.filter(
+        student=student,
+        client_id__in=[note.client_id for note in created + updated] + skipped,
+    ).order_by("lesson", "timestamp")
+    return {
+        "created": len(created),
+        "updated": len(updated),
+        "deleted": len(deleted),
+        "skipped": skipped,
+        "errors": sorted(errors, key=lambda error: error["index"]),
+        "notes": notes,
+    }
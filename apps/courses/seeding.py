@@ -0,0 +1,324 @@
+"""
+Synthetic data at realistic scale, for load tests and query plans.
+
+``Seeder`` writes categories, instructors and published courses with their
+modules, lessons and quizzes, then students in chunks. Each chunk's users,
+profiles, enrollments and progress rows are written with ``bulk_create``
+in one transaction, so memory stays flat however many students are asked
+for. Students complete a random share of the lessons of each course they
+are enrolled in, in order, averaging ``completion``.
+
+Every seeded user gets the same password, hashed once. Usernames, emails
+and slugs start with ``prefix``, which keeps runs apart and lets the load
+test find the seeded students.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.accounts.models import CustomUser, UserProfile
+from .caching import CATALOG_TAG, CATEGORIES_TAG, QUIZZES_TAG, payload_cache
+from .models import (
+    Category,
+    Course,
+    Enrollment,
+    Lesson,
+    Module,
+    Option,
+    Progress,
+    Question,
+    Quiz,
+)
+
+DEFAULT_PASSWORD = "pynerd-load-test"
+LEVELS = [level for level, _ in Course.LEVEL_CHOICES]
+TOPICS = [
+    "Python",
+    "Django",
+    "Data Science",
+    "Machine Learning",
+    "Web",
+    "APIs",
+    "SQL",
+    "DevOps",
+    "Git",
+    "Algorithms",
+]
+
+
+@dataclass
+class SeedVolumes:
+    categories: int = 10
+    instructors: int = 20
+    courses: int = 100
+    modules: int = 6  # per course
+    lessons: int = 8  # per module
+    questions: int = 5  # per quiz, one quiz per module
+    students: int = 1000
+    enrollments: int = 3  # per student
+    completion: float = 0.5  # average share of a course's lessons completed
+
+    def expected_progress_rows(self):
+        return round(
+            self.students
+            * min(self.enrollments, self.courses)
+            * self.modules
+            * self.lessons
+            * self.completion
+        )
+
+
+@dataclass
+class SeedResult:
+    counts: dict = field(default_factory=dict)
+
+    def add(self, model, count):
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + count
+
+
+class Seeder:
+    def __init__(
+        self,
+        volumes,
+        prefix="seed",
+        password=DEFAULT_PASSWORD,
+        chunk_size=1000,
+        batch_size=5000,
+        seed=0,
+        log=None,
+    ):
+        self.volumes = volumes
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.result = SeedResult()
+        self._password = make_password(password)
+        self._now = timezone.now()
+        # Completion dates are drawn from a fixed pool: cheaper than one
+        # datetime per row.
+        self._dates = [self._now - timedelta(minutes=m) for m in range(0, 525600, 97)]
+        self._db_dates = [
+            connection.ops.adapt_datetimefield_value(date) for date in self._dates
+        ]
+
+    def exists(self):
+        return CustomUser.objects.filter(
+            username__startswith=f"{self.prefix}-"
+        ).exists()
+
+    def run(self):
+        start = time.perf_counter()
+        with transaction.atomic():
+            course_lessons = self.seed_catalog()
+        self.log(f"Catalog: {len(course_lessons)} courses")
+
+        for first in range(0, self.volumes.students, self.chunk_size):
+            last = min(first + self.chunk_size, self.volumes.students)
+            with transaction.atomic():
+                self.seed_students(range(first, last), course_lessons)
+            rows = self.result.counts.get(Progress.__name__, 0)
+            elapsed = time.perf_counter() - start
+            self.log(
+                f"Students {last}/{self.volumes.students}: {rows} progress rows "
+                f"({rows / elapsed:,.0f}/s)"
+            )
+
+        # bulk_create sends no signals.
+        payload_cache.invalidate_tags(CATALOG_TAG, CATEGORIES_TAG, QUIZZES_TAG)
+        return self.result
+
+    def bulk_create(self, model, objs):
+        objs = model.objects.bulk_create(objs, batch_size=self.batch_size)
+        self.result.add(model, len(objs))
+        return objs
+
+    def seed_catalog(self):
+        """
+        Create the catalog and return the lesson ids of each course, in
+        order.
+        """
+        volumes, prefix = self.volumes, self.prefix
+        categories = self.bulk_create(
+            Category,
+            [
+                Category(
+                    name=f"{TOPICS[i % len(TOPICS)]} {i}",
+                    slug=f"{prefix}-category-{i}",
+                    description=f"Courses about {TOPICS[i % len(TOPICS)]}.",
+                    icon="code",
+                    order=i,
+                )
+                for i in range(volumes.categories)
+            ],
+        )
+        instructors = self.bulk_create(
+            CustomUser,
+            [
+                CustomUser(
+                    username=f"{prefix}-instructor-{i}",
+                    email=f"{prefix}-instructor-{i}@example.com",
+                    first_name="Instructor",
+                    last_name=str(i),
+                    password=self._password,
+                    role="INSTRUCTOR",
+                    is_approved=True,
+                )
+                for i in range(volumes.instructors)
+            ],
+        )
+        courses = self.bulk_create(
+            Course,
+            [
+                Course(
+                    title=f"{self.random.choice(TOPICS)} course {i}",
+                    description="A hands-on course with exercises and projects. " * 3,
+                    instructor=self.random.choice(instructors),
+                    category=self.random.choice(categories) if categories else None,
+                    slug=f"{prefix}-course-{i}",
+                    level=self.random.choice(LEVELS),
+                    duration=volumes.modules * volumes.lessons * 10,
+                    price=self.random.choice(["0", "0", "29.90", "49.90", "99.90"]),
+                    is_published=True,
+                    is_featured=i % 10 == 0,
+                )
+                for i in range(volumes.courses)
+            ],
+        )
+        modules = self.bulk_create(
+            Module,
+            [
+                Module(course=course, title=f"Module {m + 1}", order=m + 1)
+                for course in courses
+                for m in range(volumes.modules)
+            ],
+        )
+        lessons = self.bulk_create(
+            Lesson,
+            [
+                Lesson(
+                    module=module,
+                    title=f"Lesson {n + 1}",
+                    video_url=f"https://youtube.com/watch?v={module.pk}-{n}",
+                    duration_seconds=self.random.randint(180, 1800),
+                )
+                for module in modules
+                for n in range(volumes.lessons)
+            ],
+        )
+        if volumes.questions and volumes.lessons:
+            self.seed_quizzes(lessons[volumes.lessons - 1 :: volumes.lessons])
+
+        course_lessons = {course.pk: [] for course in courses}
+        module_course = {module.pk: module.course_id for module in modules}
+        for lesson in lessons:
+            course_lessons[module_course[lesson.module_id]].append(lesson.pk)
+        return course_lessons
+
+    def seed_quizzes(self, lessons):
+        # One quiz on the last lesson of each module.
+        quizzes = self.bulk_create(
+            Quiz,
+            [Quiz(lesson=lesson, time_limit=600) for lesson in lessons],
+        )
+        questions = self.bulk_create(
+            Question,
+            [
+                Question(
+                    quiz=quiz,
+                    question=f"Question {q + 1} about lesson {quiz.lesson_id}?",
+                    type="multiple_choice",
+                )
+                for quiz in quizzes
+                for q in range(self.volumes.questions)
+            ],
+        )
+        self.bulk_create(
+            Option,
+            [
+                Option(question=question, text=f"Answer {o + 1}", is_correct=o == 0)
+                for question in questions
+                for o in range(4)
+            ],
+        )
+
+    def completion_share(self):
+        # Uniform around ``completion``, as wide as fits in [0, 1].
+        completion = self.volumes.completion
+        if completion <= 0.5:
+            return self.random.uniform(0, 2 * completion)
+        return self.random.uniform(2 * completion - 1, 1)
+
+    def seed_students(self, numbers, course_lessons):
+        prefix = self.prefix
+        students = self.bulk_create(
+            CustomUser,
+            [
+                CustomUser(
+                    username=f"{prefix}-student-{n}",
+                    email=f"{prefix}-student-{n}@example.com",
+                    first_name="Student",
+                    last_name=str(n),
+                    password=self._password,
+                    date_joined=self.random.choice(self._dates),
+                )
+                for n in numbers
+            ],
+        )
+        self.bulk_create(UserProfile, [UserProfile(user=user) for user in students])
+
+        course_ids = list(course_lessons)
+        per_student = min(self.volumes.enrollments, len(course_ids))
+        enrollments = []
+        progress = []
+        for student in students:
+            for course_id in self.random.sample(course_ids, per_student):
+                enrollments.append(
+                    Enrollment(student_id=student.pk, course_id=course_id)
+                )
+                lesson_ids = course_lessons[course_id]
+                share = self.completion_share()
+                for lesson_id in lesson_ids[: round(share * len(lesson_ids))]:
+                    progress.append(
+                        (
+                            student.pk,
+                            lesson_id,
+                            True,
+                            self.random.choice(self._db_dates),
+                        )
+                    )
+        self.bulk_create(Enrollment, enrollments)
+        self.insert_progress(progress)
+
+    def insert_progress(self, rows):
+        """
+        Insert ``(student_id, lesson_id, is_completed, completed_at)`` tuples
+        with multi-row INSERTs. At millions of rows, building a model
+        instance per row for ``bulk_create`` costs more than the writes.
+        """
+        fields = [
+            Progress._meta.get_field(name)
+            for name in ("student", "lesson", "is_completed", "completed_at")
+        ]
+        quote_name = connection.ops.quote_name
+        sql = "INSERT INTO {} ({}) VALUES ".format(
+            quote_name(Progress._meta.db_table),
+            ", ".join(quote_name(field.column) for field in fields),
+        )
+        placeholder = "({})".format(", ".join(["%s"] * len(fields)))
+        size = min(self.batch_size, connection.ops.bulk_batch_size(fields, rows))
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), size):
+                batch = rows[start : start + size]
+                cursor.execute(
+                    sql + ", ".join([placeholder] * len(batch)),
+                    [value for row in batch for value in row],
+                )
+        self.result.add(Progress, len(rows))
@@ -1,9 +1,12 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import (
     Course,
     Enrollment,
     Lesson,
     Module,
+    Note,
+    NoteCount,
     Progress,
     Quiz,
     Question,
@@ -116,3 +119,106 @@ class QuizSerializer(serializers.ModelSerializer):
     class Meta:
         model = Quiz
         fields = ["id", "lesson", "time_limit", "passing_score", "questions"]
+
+
+class NoteSerializer(serializers.ModelSerializer):
+    lesson = serializers.PrimaryKeyRelatedField(
+        queryset=Lesson.objects.non_polymorphic()
+    )
+    client_id = serializers.UUIDField(required=False)
+
+    class Meta:
+        model = Note
+        fields = [
+            "id",
+            "client_id",
+            "lesson",
+            "content",
+            "timestamp",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["created_at", "updated_at"]
+
+    def validate(self, attrs):
+        student = self.context["request"].user
+        if self.instance is not None:
+            for field in ("lesson", "client_id"):
+                if field in attrs and attrs[field] != getattr(self.instance, field):
+                    raise serializers.ValidationError({field: ["Cannot be changed."]})
+            return attrs
+
+        if not Enrollment.objects.filter(
+            student=student, course__modules__lessons=attrs["lesson"]
+        ).exists():
+            raise serializers.ValidationError(
+                {"lesson": ["Not enrolled in this course."]}
+            )
+        if (
+            "client_id" in attrs
+            and Note.objects.filter(
+                student=student, client_id=attrs["client_id"]
+            ).exists()
+        ):
+            raise serializers.ValidationError(
+                {"client_id": ["A note with this client_id already exists."]}
+            )
+        return attrs
+
+
+class NoteSyncItemSerializer(serializers.Serializer):
+    """
+    One note in a sync batch. Lessons are checked for the whole batch at
+    once (``apps.courses.notes.sync_notes``).
+    """
+
+    client_id = serializers.UUIDField()
+    lesson = serializers.IntegerField(min_value=1, required=False)
+    content = serializers.CharField(required=False)
+    timestamp = serializers.IntegerField(min_value=0, required=False)
+    updated_at = serializers.DateTimeField(required=False)
+    deleted = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if not attrs["deleted"]:
+            missing = {
+                field: ["This field is required."]
+                for field in ("lesson", "content", "timestamp")
+                if field not in attrs
+            }
+            if missing:
+                raise serializers.ValidationError(missing)
+        return attrs
+
+
+class NoteSyncSerializer(serializers.Serializer):
+    notes = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.NOTE_SYNC_MAX_BATCH,
+    )
+
+
+class NoteCountSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NoteCount
+        fields = ["lesson", "count"]
+
+
+class BookmarkToggleSerializer(serializers.Serializer):
+    # A plain id: bookmarking checks the lesson through the enrollment, and
+    # removing a bookmark needs no lookup.
+    lesson = serializers.IntegerField(min_value=1)
+    bookmarked = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        if attrs["bookmarked"] and not (
+            Enrollment.objects.filter(
+                student=self.context["request"].user,
+                course__modules__lessons=attrs["lesson"],
+            ).exists()
+        ):
+            raise serializers.ValidationError(
+                {"lesson": ["Not enrolled in this course."]}
+            )
+        return attrs
@@ -0,0 +1,91 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import (
+    CATALOG_TAG,
+    CATEGORIES_TAG,
+    QUIZZES_TAG,
+    invalidate_catalog,
+    payload_cache,
+)
+from .notes import add_note_counts, remove_note_count
+from .models import (
+    Category,
+    Course,
+    Lesson,
+    Module,
+    Note,
+    Option,
+    Question,
+    Quiz,
+)
+
+
+# Cached payloads are retired once the change is committed; retired earlier,
+# a concurrent request could cache the old rows again.
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, using, **kwargs):
+    # Course payloads embed their category.
+    transaction.on_commit(
+        partial(payload_cache.invalidate_tags, CATEGORIES_TAG, CATALOG_TAG),
+        using=using,
+    )
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_catalog_cache(sender, instance, using, **kwargs):
+    """
+    Retire the cached catalog payloads when something they show changes.
+    Enrollments do not: ``students_count`` may lag by up to
+    ``CATALOG_CACHE_TIMEOUT`` rather than every enrollment emptying the
+    catalog cache.
+    """
+    transaction.on_commit(invalidate_catalog, using=using)
+
+
+@receiver(post_save, sender="accounts.CustomUser")
+def invalidate_instructor_courses(
+    sender, instance, using, update_fields=None, **kwargs
+):
+    """
+    Course payloads embed the instructor's name; logins only save
+    ``last_login``.
+    """
+    if instance.role == "INSTRUCTOR" and (
+        update_fields is None or {"first_name", "last_name"} & set(update_fields)
+    ):
+        transaction.on_commit(invalidate_catalog, using=using)
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Option)
+@receiver(post_delete, sender=Option)
+def invalidate_quiz_cache(sender, instance, using, **kwargs):
+    transaction.on_commit(
+        partial(payload_cache.invalidate_tags, QUIZZES_TAG), using=using
+    )
+
+
+@receiver(post_save, sender=Note)
+def count_note(sender, instance, created, **kwargs):
+    if created:
+        add_note_counts(instance.student_id, {instance.lesson_id: 1})
+
+
+@receiver(post_delete, sender=Note)
+def uncount_note(sender, instance, **kwargs):
+    remove_note_count(instance.student_id, instance.lesson_id)
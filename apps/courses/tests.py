@@ -1,8 +1,27 @@
-from django.test import TestCase
+import gzip
+import re
+import uuid
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory, TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from drf_spectacular.generators import SchemaGenerator
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.courses.caching import (
+    CATALOG_TAG,
+    CATEGORIES_TAG,
+    QUIZZES_TAG,
+    payload_cache,
+)
 from apps.courses.models import (
     Course,
     Module,
@@ -11,8 +30,20 @@ from apps.courses.models import (
     Progress,
     Quiz,
     Category,
+    Note,
+    NoteCount,
+    Bookmark,
 )
 from apps.accounts.models import Certificate
+from apps.courses.async_views import (
+    AsyncCategoryListView,
+    AsyncCourseDetailView,
+    AsyncCourseListView,
+    AsyncStudentProgressView,
+)
+from apps.courses import notes
+from apps.courses.seeding import Seeder, SeedVolumes
+from apps.courses.views import student_progress_querysets, visible_courses
 
 User = get_user_model()
 
@@ -110,6 +141,8 @@ class CourseModelTests(TestCase):
 
 class CourseAPITests(TestCase):
     def setUp(self):
+        # Signals retire cached payloads on commit, which tests never reach.
+        payload_cache.invalidate_tags(CATALOG_TAG, CATEGORIES_TAG, QUIZZES_TAG)
         self.client = APIClient()
 
         # Create Verify Users
@@ -156,7 +189,7 @@ class CourseAPITests(TestCase):
         url = "/api/courses/"
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(len(response.json()["results"]), 1)
 
     def test_create_course_instructor(self):
         """Instructors can create courses"""
@@ -219,8 +252,8 @@ class CourseAPITests(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data["results"]), 1)
-        self.assertEqual(response.data["results"][0]["id"], quiz.id)
+        self.assertEqual(len(response.json()["results"]), 1)
+        self.assertEqual(response.json()["results"][0]["id"], quiz.id)
 
     def test_certificate_generation(self):
         """Certificate is generated when course is completed"""
@@ -240,3 +273,702 @@ class CourseAPITests(TestCase):
                 student=self.student, course=self.course
             ).exists()
         )
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        # Signals retire cached payloads on commit, which tests never reach.
+        payload_cache.invalidate_tags(CATALOG_TAG, CATEGORIES_TAG, QUIZZES_TAG)
+        self.client = APIClient()
+        self.instructor = User.objects.create_user(
+            username="instructor",
+            email="instructor@example.com",
+            password="pass",
+            role="INSTRUCTOR",
+        )
+        self.course = Course.objects.create(
+            title="Python Basic",
+            description="Intro",
+            instructor=self.instructor,
+            is_published=True,
+            duration=60,
+            slug="python-basic",
+        )
+        Course.objects.create(
+            title="Draft",
+            description="Intro",
+            instructor=self.instructor,
+            duration=60,
+            slug="draft",
+        )
+
+    def titles(self):
+        return [
+            course["title"]
+            for course in self.client.get("/api/courses/").json()["results"]
+        ]
+
+    def test_cached_until_catalog_changes(self):
+        self.assertEqual(self.titles(), ["Python Basic"])
+        # Changes made without signals are only seen once the entry expires.
+        Course.objects.filter(pk=self.course.pk).update(title="Updated")
+        self.assertEqual(self.titles(), ["Python Basic"])
+
+        self.course.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+        self.assertEqual(self.titles(), ["Updated"])
+
+    def test_enrollments_do_not_retire_the_catalog(self):
+        self.client.get("/api/courses/")
+        student = User.objects.create_user(username="student", password="pass")
+        with self.captureOnCommitCallbacks() as callbacks:
+            Enrollment.objects.create(student=student, course=self.course)
+        self.assertEqual(callbacks, [])
+
+    def test_instructors_see_their_drafts(self):
+        self.assertEqual(self.titles(), ["Python Basic"])
+        self.client.force_authenticate(self.instructor)
+        # Newest first.
+        self.assertEqual(self.titles(), ["Draft", "Python Basic"])
+
+    def test_quiz_cached_until_questions_change(self):
+        module = Module.objects.create(course=self.course, title="M", order=1)
+        lesson = Lesson.objects.create(
+            module=module,
+            title="L",
+            video_url="https://youtube.com/watch?v=1",
+            duration_seconds=60,
+        )
+        quiz = Quiz.objects.create(lesson=lesson, time_limit=300)
+        self.client.force_authenticate(
+            User.objects.create_user(username="student", password="pass")
+        )
+        url = f"/api/quizzes/{quiz.id}/"
+        self.assertEqual(self.client.get(url).json()["questions"], [])
+
+        Quiz.objects.filter(pk=quiz.pk).update(time_limit=60)
+        self.assertEqual(self.client.get(url).json()["time_limit"], 300)
+        with self.captureOnCommitCallbacks(execute=True):
+            quiz.questions.create(question="2 + 2?", type="multiple_choice")
+        response = self.client.get(url).json()
+        self.assertEqual(response["time_limit"], 60)
+        self.assertEqual(len(response["questions"]), 1)
+
+    def test_compressed_hit(self):
+        expected = self.client.get("/api/courses/").content
+        response = self.client.get("/api/courses/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), expected)
+
+
+class AsyncReadViewTests(TestCase):
+    """
+    The async views must answer exactly like the sync DRF views.
+    """
+
+    def setUp(self):
+        # Signals retire cached payloads on commit, which tests never reach.
+        payload_cache.invalidate_tags(CATALOG_TAG, CATEGORIES_TAG, QUIZZES_TAG)
+        self.client = APIClient()
+        self.instructor = User.objects.create_user(
+            username="instructor",
+            email="instructor@example.com",
+            password="pass",
+            role="INSTRUCTOR",
+            first_name="Ada",
+            is_approved=True,
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@example.com", password="pass"
+        )
+        self.category = Category.objects.create(name="Programming", slug="programming")
+        for i in range(3):
+            course = Course.objects.create(
+                title=f"Python {i}",
+                description="Intro to Python",
+                instructor=self.instructor,
+                category=self.category,
+                is_published=i < 2,
+                price=i * 10,
+                duration=100,
+                slug=f"python-{i}",
+            )
+            module = Module.objects.create(course=course, title="Basics", order=1)
+            for j in range(2):
+                lesson = Lesson.objects.create(
+                    module=module,
+                    title=f"Lesson {j}",
+                    video_url="https://youtube.com/watch?v=123",
+                    duration_seconds=600,
+                )
+            Enrollment.objects.create(student=self.student, course=course)
+        self.course = course
+        Progress.objects.create(student=self.student, lesson=lesson, is_completed=True)
+
+    def sync_get(self, path, user=None):
+        self.client.force_authenticate(user)
+        return self.client.get(path)
+
+    async def async_get(self, view, path, user=None, **kwargs):
+        headers = {}
+        if user is not None:
+            headers["Authorization"] = f"Bearer {AccessToken.for_user(user)}"
+        request = AsyncRequestFactory().get(path, headers=headers)
+        return await view.as_view()(request, **kwargs)
+
+    def assertSameResponse(self, expected, actual):
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.content, expected.content)
+
+    async def test_course_list(self):
+        for path, user in [
+            ("/api/courses/", None),
+            ("/api/courses/?limit=1&offset=1", None),
+            ("/api/courses/?search=Python&level=beginner", None),
+            ("/api/courses/", self.instructor),
+        ]:
+            expected = await sync_to_async(self.sync_get)(path, user)
+            actual = await self.async_get(AsyncCourseListView, path, user)
+            self.assertSameResponse(expected, actual)
+
+    async def test_course_list_invalid_filter(self):
+        path = "/api/courses/?category=999"
+        expected = await sync_to_async(self.sync_get)(path)
+        actual = await self.async_get(AsyncCourseListView, path)
+        self.assertEqual(actual.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertSameResponse(expected, actual)
+
+    async def test_course_detail(self):
+        for pk, user in [
+            (self.course.pk, self.instructor),
+            (self.course.pk, self.student),
+            (self.course.pk, None),
+        ]:
+            path = f"/api/courses/{pk}/"
+            expected = await sync_to_async(self.sync_get)(path, user)
+            actual = await self.async_get(AsyncCourseDetailView, path, user, pk=pk)
+            self.assertSameResponse(expected, actual)
+        self.assertEqual(actual.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_categories(self):
+        expected = await sync_to_async(self.sync_get)("/api/categories/")
+        actual = await self.async_get(AsyncCategoryListView, "/api/categories/")
+        self.assertSameResponse(expected, actual)
+
+    async def test_student_progress(self):
+        for user in (self.student, self.instructor):
+            path = f"/api/students/{self.student.id}/progress/"
+            expected = await sync_to_async(self.sync_get)(path, user)
+            actual = await self.async_get(
+                AsyncStudentProgressView, path, user, id=self.student.id
+            )
+            self.assertSameResponse(expected, actual)
+        self.assertEqual(actual.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_other_methods_use_sync_view(self):
+        request = AsyncRequestFactory().post(
+            "/api/courses/",
+            {
+                "title": "Async",
+                "description": "...",
+                "duration": 10,
+                "slug": "async",
+            },
+            content_type="application/json",
+            headers={
+                "Authorization": f"Bearer {AccessToken.for_user(self.instructor)}"
+            },
+        )
+        response = await AsyncCourseListView.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await Course.objects.filter(slug="async").aexists())
+
+
+class SeedDataCommandTests(TestCase):
+    def seed(self, **options):
+        out = StringIO()
+        call_command(
+            "seed_data",
+            categories=2,
+            instructors=2,
+            courses=4,
+            modules=2,
+            lessons=3,
+            questions=2,
+            enrollments=2,
+            chunk_size=10,
+            stdout=out,
+            **{"students": 25, **options},
+        )
+        return out.getvalue()
+
+    def test_seeds_requested_volumes(self):
+        output = self.seed()
+        # Two instructors and 25 students.
+        self.assertIn("27 CustomUser", output.splitlines()[-1])
+        self.assertEqual(Course.objects.filter(is_published=True).count(), 4)
+        self.assertEqual(Lesson.objects.count(), 4 * 2 * 3)
+        self.assertEqual(Quiz.objects.count(), 4 * 2)
+        self.assertEqual(Enrollment.objects.count(), 25 * 2)
+        student = User.objects.get(username="seed-student-7")
+        self.assertTrue(student.check_password("pynerd-load-test"))
+        self.assertTrue(hasattr(student, "profile"))
+
+        # Progress only for lessons of enrolled courses.
+        enrolled = set(Enrollment.objects.values_list("student_id", "course_id"))
+        progress = set(
+            Progress.objects.values_list("student_id", "lesson__module__course_id")
+        )
+        self.assertTrue(progress)
+        self.assertLessEqual(progress, enrolled)
+        self.assertFalse(Progress.objects.filter(completed_at__isnull=True).exists())
+
+    def test_refuses_existing_prefix(self):
+        self.seed(students=1)
+        with self.assertRaises(CommandError):
+            self.seed(students=1)
+        self.seed(students=1, prefix="other")
+
+
+class NoteAPITests(TestCase):
+    def setUp(self):
+        instructor = User.objects.create_user(
+            "instructor", "instructor@example.com", role="INSTRUCTOR"
+        )
+        self.student = User.objects.create_user("student", "student@example.com")
+        self.course = Course.objects.create(
+            title="Python 101",
+            description="Intro",
+            instructor=instructor,
+            is_published=True,
+            duration=100,
+            slug="python-101",
+        )
+        module = Module.objects.create(course=self.course, title="Basics", order=1)
+        self.lesson, self.other_lesson = [
+            Lesson.objects.create(
+                module=module,
+                title=title,
+                video_url="https://youtube.com/watch?v=123",
+                duration_seconds=600,
+            )
+            for title in ("Hello World", "Variables")
+        ]
+        Enrollment.objects.create(student=self.student, course=self.course)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def create(self, timestamp, lesson=None, **data):
+        return self.client.post(
+            "/api/notes/",
+            {
+                "lesson": (lesson or self.lesson).pk,
+                "content": f"At {timestamp}s",
+                "timestamp": timestamp,
+                **data,
+            },
+            format="json",
+        )
+
+    def counts(self, **params):
+        return {
+            item["lesson"]: item["count"]
+            for item in self.client.get("/api/notes/counts/", params).json()
+        }
+
+    def test_crud(self):
+        for timestamp in (90, 10, 45):
+            self.assertEqual(self.create(timestamp).status_code, 201)
+        self.create(5, self.other_lesson)
+
+        response = self.client.get("/api/notes/", {"lesson_id": self.lesson.pk})
+        self.assertEqual([note["timestamp"] for note in response.json()], [10, 45, 90])
+        self.assertEqual(self.client.get("/api/notes/").json()["count"], 4)
+
+        note = response.json()[0]
+        response = self.client.patch(
+            f"/api/notes/{note['id']}/", {"content": "Edited"}, format="json"
+        )
+        self.assertEqual(response.json()["content"], "Edited")
+        response = self.client.patch(
+            f"/api/notes/{note['id']}/",
+            {"lesson": self.other_lesson.pk},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(
+            self.client.delete(f"/api/notes/{note['id']}/").status_code, 204
+        )
+        self.assertEqual(self.counts(), {self.lesson.pk: 2, self.other_lesson.pk: 1})
+
+    def test_scoped_to_student(self):
+        other = User.objects.create_user("other", "other@example.com")
+        note = Note.objects.create(
+            student=other, lesson=self.lesson, content="Mine", timestamp=1
+        )
+        self.assertEqual(self.client.get("/api/notes/").json()["count"], 0)
+        self.assertEqual(self.client.get(f"/api/notes/{note.pk}/").status_code, 404)
+        self.assertEqual(self.counts(), {})
+
+    def test_requires_enrollment(self):
+        Enrollment.objects.all().delete()
+        response = self.create(10)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("lesson", response.json())
+        self.assertEqual(
+            self.client.get("/api/notes/", {"lesson_id": "x"}).status_code, 400
+        )
+
+    def test_counts_are_read_not_counted(self):
+        self.create(10)
+        self.create(20)
+        self.create(30, self.other_lesson)
+        with CaptureQueriesContext(connection) as queries:
+            counts = self.counts(course_id=self.course.pk)
+        self.assertEqual(counts, {self.lesson.pk: 2, self.other_lesson.pk: 1})
+        self.assertFalse(
+            [query for query in queries if "COUNT(" in query["sql"].upper()]
+        )
+        self.assertEqual(self.counts(course_id=self.course.pk + 1), {})
+
+        # Counters go with their lesson.
+        self.other_lesson.delete()
+        self.assertEqual(NoteCount.objects.count(), 1)
+
+    def test_sync(self):
+        stored = Note.objects.create(
+            student=self.student, lesson=self.lesson, content="Old", timestamp=5
+        )
+        edited = Note.objects.create(
+            student=self.student, lesson=self.lesson, content="Newer", timestamp=6
+        )
+        removed = Note.objects.create(
+            student=self.student, lesson=self.other_lesson, content="Gone", timestamp=7
+        )
+        new_id = str(uuid.uuid4())
+        batch = [
+            {
+                "client_id": new_id,
+                "lesson": self.other_lesson.pk,
+                "content": "Offline",
+                "timestamp": 12,
+            },
+            {
+                "client_id": str(stored.client_id),
+                "lesson": self.lesson.pk,
+                "content": "Updated",
+                "timestamp": 8,
+            },
+            {
+                # Edited on the server since.
+                "client_id": str(edited.client_id),
+                "lesson": self.lesson.pk,
+                "content": "Stale",
+                "timestamp": 6,
+                "updated_at": "2000-01-01T00:00:00Z",
+            },
+            {"client_id": str(removed.client_id), "deleted": True},
+            {"client_id": str(uuid.uuid4()), "lesson": self.lesson.pk},
+            {"client_id": "not-a-uuid", "deleted": True},
+        ]
+        response = self.client.post("/api/notes/sync/", {"notes": batch}, format="json")
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(
+            (result["created"], result["updated"], result["deleted"]), (1, 1, 1)
+        )
+        self.assertEqual(result["skipped"], [str(edited.client_id)])
+        self.assertEqual([error["index"] for error in result["errors"]], [4, 5])
+        self.assertEqual(
+            [(note["content"], note["timestamp"]) for note in result["notes"]],
+            [("Newer", 6), ("Updated", 8), ("Offline", 12)],
+        )
+        self.assertFalse(Note.objects.filter(pk=removed.pk).exists())
+        self.assertEqual(self.counts(), {self.lesson.pk: 2, self.other_lesson.pk: 1})
+
+        # Sending the batch again creates nothing new.
+        result = self.client.post(
+            "/api/notes/sync/", {"notes": batch[:1]}, format="json"
+        ).json()
+        self.assertEqual((result["created"], result["updated"]), (0, 1))
+        self.assertEqual(self.counts(), {self.lesson.pk: 2, self.other_lesson.pk: 1})
+
+    def test_note_created_by_a_concurrent_sync_is_counted_once(self):
+        client_id = uuid.uuid4()
+        insert_new_notes = notes.insert_new_notes
+
+        def concurrent_sync_first(new_notes):
+            # The other request commits the same note after this one looked
+            # its client_id up.
+            Note.objects.create(
+                student=self.student,
+                lesson=self.lesson,
+                client_id=client_id,
+                content="Other device",
+                timestamp=1,
+            )
+            return insert_new_notes(new_notes)
+
+        item = {
+            "client_id": str(client_id),
+            "lesson": self.lesson.pk,
+            "content": "This device",
+            "timestamp": 2,
+        }
+        with mock.patch.object(notes, "insert_new_notes", concurrent_sync_first):
+            result = self.client.post(
+                "/api/notes/sync/", {"notes": [item]}, format="json"
+            ).json()
+        self.assertEqual((result["created"], result["updated"]), (0, 1))
+        self.assertEqual(Note.objects.get().content, "This device")
+        self.assertEqual(self.counts(), {self.lesson.pk: 1})
+
+    def test_note_ids_are_integers_in_the_schema(self):
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+        (parameter,) = schema["paths"]["/api/notes/{id}/"]["get"]["parameters"]
+        self.assertEqual(parameter["schema"]["type"], "integer")
+
+    def test_deleting_a_note_never_takes_its_counter_below_zero(self):
+        note = Note.objects.create(
+            student=self.student, lesson=self.lesson, content="...", timestamp=1
+        )
+        NoteCount.objects.update(count=0)
+        note.delete()
+        self.assertEqual(NoteCount.objects.get().count, 0)
+
+    def test_backfill_notes(self):
+        for timestamp in (1, 2):
+            Note.objects.create(
+                student=self.student,
+                lesson=self.lesson,
+                content="...",
+                timestamp=timestamp,
+            )
+        # Notes from before client_id existed, and counters out of step.
+        Note.objects.update(client_id=None)
+        NoteCount.objects.update(count=7)
+        out = StringIO()
+        call_command("backfill_notes", stdout=out)
+        self.assertIn(
+            "Assigned 2 client id(s), rebuilt 1 note counter(s)", out.getvalue()
+        )
+        client_ids = set(Note.objects.values_list("client_id", flat=True))
+        self.assertEqual(len(client_ids), 2)
+        self.assertNotIn(None, client_ids)
+        self.assertEqual(NoteCount.objects.get().count, 2)
+
+    def test_sync_requires_enrollment(self):
+        other_course = Course.objects.create(
+            title="Other",
+            description="...",
+            instructor=self.course.instructor,
+            is_published=True,
+            duration=10,
+            slug="other",
+        )
+        module = Module.objects.create(course=other_course, title="M", order=1)
+        lesson = Lesson.objects.create(
+            module=module,
+            title="L",
+            video_url="https://youtube.com/watch?v=1",
+            duration_seconds=10,
+        )
+        item = {
+            "client_id": str(uuid.uuid4()),
+            "lesson": lesson.pk,
+            "content": "x",
+            "timestamp": 1,
+        }
+        result = self.client.post(
+            "/api/notes/sync/", {"notes": [item]}, format="json"
+        ).json()
+        self.assertEqual(result["created"], 0)
+        self.assertEqual(
+            result["errors"][0]["errors"], {"lesson": ["Not enrolled in this course."]}
+        )
+        self.assertFalse(Note.objects.exists())
+
+
+class BookmarkAPITests(TestCase):
+    def setUp(self):
+        instructor = User.objects.create_user(
+            "instructor", "instructor@example.com", role="INSTRUCTOR"
+        )
+        self.student = User.objects.create_user("student", "student@example.com")
+        self.courses = []
+        self.lessons = []
+        for i in range(2):
+            course = Course.objects.create(
+                title=f"Python {i}",
+                description="Intro",
+                instructor=instructor,
+                is_published=True,
+                duration=100,
+                slug=f"python-{i}",
+            )
+            module = Module.objects.create(course=course, title="Basics", order=1)
+            self.courses.append(course)
+            self.lessons += [
+                Lesson.objects.create(
+                    module=module,
+                    title=f"Lesson {j}",
+                    video_url="https://youtube.com/watch?v=123",
+                    duration_seconds=600,
+                )
+                for j in range(2)
+            ]
+            Enrollment.objects.create(student=self.student, course=course)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def toggle(self, lesson, bookmarked=True):
+        return self.client.post(
+            "/api/bookmarks/toggle/",
+            {"lesson": lesson.pk, "bookmarked": bookmarked},
+            format="json",
+        )
+
+    def test_toggle_is_idempotent(self):
+        lesson = self.lessons[0]
+        for _ in range(2):
+            response = self.toggle(lesson)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {"lesson": lesson.pk, "bookmarked": True})
+        self.assertEqual(Bookmark.objects.filter(student=self.student).count(), 1)
+
+        for _ in range(2):
+            response = self.toggle(lesson, False)
+            self.assertEqual(response.json()["bookmarked"], False)
+        self.assertFalse(Bookmark.objects.exists())
+
+    def test_requires_enrollment(self):
+        Enrollment.objects.filter(course=self.courses[0]).delete()
+        response = self.toggle(self.lessons[0])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("lesson", response.json())
+        # Removing needs no enrollment.
+        self.assertEqual(self.toggle(self.lessons[0], False).status_code, 200)
+
+    def test_lesson_ids_per_course(self):
+        for lesson in (self.lessons[1], self.lessons[0], self.lessons[3]):
+            self.toggle(lesson)
+        other = User.objects.create_user("other", "other@example.com")
+        Bookmark.objects.create(student=other, lesson=self.lessons[2])
+
+        response = self.client.get("/api/bookmarks/", {"course_id": self.courses[0].pk})
+        self.assertEqual(
+            response.json(), {"lessons": [self.lessons[0].pk, self.lessons[1].pk]}
+        )
+        response = self.client.get("/api/bookmarks/")
+        self.assertEqual(
+            response.json()["lessons"],
+            [self.lessons[0].pk, self.lessons[1].pk, self.lessons[3].pk],
+        )
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN the hot queries on seeded data. Fails when a plan reads a whole
+    table, or sorts rows that an index could return in order.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder(
+            SeedVolumes(
+                categories=3,
+                instructors=3,
+                courses=40,
+                modules=3,
+                lessons=4,
+                questions=1,
+                students=60,
+                enrollments=3,
+            )
+        ).run()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        cls.student = User.objects.get(username="seed-student-1")
+        cls.enrollment = cls.student.enrollments.select_related("course").first()
+        cls.lesson = Lesson.objects.filter(module__course=cls.enrollment.course)[0]
+        Note.objects.create(
+            student=cls.student, lesson=cls.lesson, content="...", timestamp=30
+        )
+
+    def assertIndexed(self, queryset, ordered=False):
+        if connection.vendor == "postgresql":
+            # Small tables are cheaper to read whole; ask for an index so a
+            # remaining sequential scan means that none applies.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+        # SQLite: "SCAN table" without "USING INDEX"; PostgreSQL: "Seq Scan".
+        self.assertNotRegex(plan, re.compile(r"\bSCAN \S+$|Seq Scan", re.M))
+        if ordered:
+            self.assertNotRegex(plan, r"TEMP B-TREE FOR ORDER BY|\bSort\b")
+
+    def test_published_catalog_page(self):
+        self.assertIndexed(visible_courses(AnonymousUser())[:20], ordered=True)
+
+    def test_student_progress(self):
+        for queryset in student_progress_querysets(self.student.pk):
+            self.assertIndexed(queryset)
+
+    def test_completed_lessons_of_course(self):
+        self.assertIndexed(
+            Progress.objects.filter(
+                student=self.student,
+                lesson__module__course=self.enrollment.course,
+                is_completed=True,
+            )
+        )
+
+    def test_my_courses(self):
+        self.assertIndexed(
+            Course.objects.filter(enrollments__student=self.student).order_by(
+                "-enrollments__enrolled_at"
+            ),
+            ordered=True,
+        )
+
+    def test_enrollment_check(self):
+        self.assertIndexed(
+            Enrollment.objects.filter(
+                student=self.student, course=self.enrollment.course
+            )
+        )
+
+    def test_certificates_of_users(self):
+        self.assertIndexed(
+            Certificate.objects.filter(student__in=[self.student]).select_related(
+                "course__instructor"
+            )
+        )
+
+    def test_note_counts(self):
+        self.assertIndexed(
+            NoteCount.objects.filter(student=self.student, count__gt=0).order_by(
+                "lesson"
+            ),
+            ordered=True,
+        )
+
+    def test_course_bookmarks(self):
+        self.assertIndexed(
+            Bookmark.objects.filter(
+                student=self.student, lesson__module__course=self.enrollment.course
+            )
+            .order_by("lesson")
+            .values_list("lesson", flat=True)
+        )
+
+    def test_lesson_notes(self):
+        self.assertIndexed(
+            Note.objects.filter(student=self.student, lesson=self.lesson).order_by(
+                "timestamp"
+            ),
+            ordered=True,
+        )
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from .views import (
@@ -6,6 +7,8 @@ from .views import (
     ProgressViewSet,
     QuizViewSet,
     CategoryViewSet,
+    NoteViewSet,
+    BookmarkViewSet,
 )
 
 router = DefaultRouter()
@@ -13,8 +16,35 @@ router.register(r"courses", CourseViewSet, basename="course")
 router.register(r"progress", ProgressViewSet, basename="progress")
 router.register(r"quizzes", QuizViewSet, basename="quiz")
 router.register(r"categories", CategoryViewSet, basename="category")
+router.register(r"notes", NoteViewSet, basename="note")
+router.register(r"bookmarks", BookmarkViewSet, basename="bookmark")
 
-urlpatterns = [
+urlpatterns = []
+
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import (
+        AsyncCategoryListView,
+        AsyncCourseDetailView,
+        AsyncCourseListView,
+        AsyncStudentProgressView,
+    )
+
+    # Ahead of the router so GET requests on these URLs are served async.
+    # Same names as the router's, for reverse() and metrics labels.
+    urlpatterns += [
+        path("courses/", AsyncCourseListView.as_view(), name="course-list"),
+        path(
+            "courses/<int:pk>/", AsyncCourseDetailView.as_view(), name="course-detail"
+        ),
+        path("categories/", AsyncCategoryListView.as_view(), name="category-list"),
+        path(
+            "students/<int:id>/progress/",
+            AsyncStudentProgressView.as_view(),
+            name="student-progress",
+        ),
+    ]
+
+urlpatterns += [
     path("", include(router.urls)),
     path(
         "students/<int:id>/progress/",
@@ -1,13 +1,35 @@
-from django.db.models import Count, Q
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework import pagination, viewsets, status, generics
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from drf_spectacular.utils import extend_schema, OpenApiTypes
 from rest_framework.filters import SearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Course, Enrollment, Progress, Lesson, Quiz, Category
+from core.db_routers import ReplicaReadMixin
+from .caching import (
+    CATALOG_TAG,
+    CATEGORIES_TAG,
+    QUIZZES_TAG,
+    catalog_cacheable,
+    get_payload,
+    payload_response,
+)
+from .models import (
+    Course,
+    Enrollment,
+    Progress,
+    Lesson,
+    Quiz,
+    Category,
+    Note,
+    NoteCount,
+    Bookmark,
+)
 from apps.accounts.models import Certificate
+from .notes import sync_notes
 from .permissions import IsInstructor
 from .serializers import (
     CourseSerializer,
@@ -15,22 +37,141 @@ from .serializers import (
     ProgressSerializer,
     QuizSerializer,
     CategorySerializer,
+    NoteCountSerializer,
+    NoteSerializer,
+    NoteSyncSerializer,
+    BookmarkToggleSerializer,
 )
 
 
+def visible_courses(user):
+    """
+    Courses ``user`` may see, with everything ``CourseSerializer`` reads.
+    """
+    # Counting in a correlated subquery rather than a JOIN with GROUP BY
+    # lets course_published_created_idx stop at the requested page instead
+    # of counting the enrollments of every course first.
+    enrollments_count = (
+        Enrollment.objects.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    queryset = (
+        Course.objects.select_related("instructor", "category")
+        .prefetch_related("modules__lessons")
+        .annotate(enrollments_count=Coalesce(Subquery(enrollments_count), 0))
+        .order_by("-created_at", "-id")
+    )
+
+    # FIX: Allow Instructors to see all published courses OR their own courses
+    if user.is_authenticated and user.role == "INSTRUCTOR":
+        # Show my courses (draft or published) + All published courses from others
+        return queryset.filter(Q(instructor=user) | Q(is_published=True)).distinct()
+
+    return queryset.filter(is_published=True)
+
+
+def student_progress_querysets(student_id):
+    """
+    Return the completed-lessons and total-lessons per course querysets
+    summarised by ``summarise_progress``.
+    """
+    progress_data = (
+        Progress.objects.filter(student_id=student_id, is_completed=True)
+        .select_related("lesson__module__course")
+        .values("lesson__module__course")
+        .annotate(completed=Count("id"))
+    )
+
+    total_data = (
+        Lesson.objects.filter(module__course__enrollments__student_id=student_id)
+        .values("module__course")
+        .annotate(total=Count("id"))
+    )
+    return progress_data, total_data
+
+
+def summarise_progress(progress_data, total_data):
+    course_progress = {}
+    for item in progress_data:
+        course_id = item["lesson__module__course"]
+        course_progress[course_id] = {"completed": item["completed"]}
+
+    for item in total_data:
+        course_id = item["module__course"]
+        if course_id in course_progress:
+            course_progress[course_id]["total"] = item["total"]
+        else:
+            course_progress[course_id] = {"completed": 0, "total": item["total"]}
+
+    return [
+        {
+            "course_id": course_id,
+            "completed_lessons": data["completed"],
+            "total_lessons": data["total"],
+        }
+        for course_id, data in course_progress.items()
+    ]
+
+
+class CatalogCacheMixin:
+    """
+    Serve a view's JSON responses from the payload cache (see
+    ``caching.py``), tagged with ``cache_tags``.
+    """
+
+    cache_tags = [CATALOG_TAG]
+
+    def cached_response(self, name, build_response):
+        """
+        Return the cached response for ``name`` and the request URL, or the
+        one from ``build_response()`` after caching it when it is a 200.
+        """
+        request = self.request
+        if not catalog_cacheable(request):
+            return build_response()
+
+        response = None
+
+        def render():
+            nonlocal response
+            response = build_response()
+            if response.status_code != status.HTTP_200_OK:
+                return None
+            return request.accepted_renderer.render(
+                response.data, request.accepted_media_type, self.get_renderer_context()
+            )
+
+        payload = get_payload(name, request, self.cache_tags, render)
+        if payload is None:
+            return response
+        return payload_response(payload)
+
+
 class StandardResultSetPagination(pagination.LimitOffsetPagination):
     default_limit = 20
     max_limit = 50
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(
+    CatalogCacheMixin, ReplicaReadMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
     pagination_class = None
+    cache_tags = [CATEGORIES_TAG]
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            "categories",
+            lambda: super(CategoryViewSet, self).list(request, *args, **kwargs),
+        )
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(CatalogCacheMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing course instances.
     """
@@ -59,21 +200,18 @@ class CourseViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
-        """
-        Optionally restricts the returned courses to a given user,
-        by filtering against a `username` query parameter in the URL.
-        """
-        user = self.request.user
-        queryset = Course.objects.select_related("instructor").prefetch_related(
-            "modules__lessons"
-        )
+        return visible_courses(self.request.user)
 
-        # FIX: Allow Instructors to see all published courses OR their own courses
-        if user.is_authenticated and user.role == "INSTRUCTOR":
-            # Show my courses (draft or published) + All published courses from others
-            return queryset.filter(Q(instructor=user) | Q(is_published=True)).distinct()
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            "courses", lambda: super(CourseViewSet, self).list(request, *args, **kwargs)
+        )
 
-        return queryset.filter(is_published=True)
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            "course",
+            lambda: super(CourseViewSet, self).retrieve(request, *args, **kwargs),
+        )
 
     def perform_create(self, serializer):
         """
@@ -124,7 +262,9 @@ class CourseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        enrolled_courses = Course.objects.filter(enrollments__student=request.user)
+        enrolled_courses = Course.objects.filter(
+            enrollments__student=request.user
+        ).order_by("-enrollments__enrolled_at")
         page = self.paginate_queryset(enrolled_courses)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -188,7 +328,7 @@ class ProgressViewSet(viewsets.ModelViewSet):
 
 
 @extend_schema(responses={200: OpenApiTypes.OBJECT})
-class StudentProgressView(generics.RetrieveAPIView):
+class StudentProgressView(ReplicaReadMixin, generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = None  # No serializer needed for this custom response
 
@@ -199,51 +339,19 @@ class StudentProgressView(generics.RetrieveAPIView):
                 {"detail": "Not authorized."}, status=status.HTTP_403_FORBIDDEN
             )
 
-        progress_data = (
-            Progress.objects.filter(student_id=student_id, is_completed=True)
-            .select_related("lesson__module__course")
-            .values("lesson__module__course")
-            .annotate(completed=Count("id"))
-        )
-
-        total_data = (
-            Lesson.objects.filter(module__course__enrollments__student_id=student_id)
-            .values("module__course")
-            .annotate(total=Count("id"))
-        )
-
-        course_progress = {}
-        for item in progress_data:
-            course_id = item["lesson__module__course"]
-            course_progress[course_id] = {"completed": item["completed"]}
+        progress_data, total_data = student_progress_querysets(student_id)
+        return Response(summarise_progress(progress_data, total_data))
 
-        for item in total_data:
-            course_id = item["module__course"]
-            if course_id in course_progress:
-                course_progress[course_id]["total"] = item["total"]
-            else:
-                course_progress[course_id] = {"completed": 0, "total": item["total"]}
 
-        result = [
-            {
-                "course_id": course_id,
-                "completed_lessons": data["completed"],
-                "total_lessons": data["total"],
-            }
-            for course_id, data in course_progress.items()
-        ]
-
-        return Response(result)
-
-
-class QuizViewSet(viewsets.ReadOnlyModelViewSet):
+class QuizViewSet(CatalogCacheMixin, ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     ReadOnly ViewSet for quizzes.
     """
 
-    queryset = Quiz.objects.all()
+    queryset = Quiz.objects.prefetch_related("questions__options")
     serializer_class = QuizSerializer
     permission_classes = [IsAuthenticated]
+    cache_tags = [QUIZZES_TAG]
 
     def get_queryset(self):
         """
@@ -253,3 +361,137 @@ class QuizViewSet(viewsets.ReadOnlyModelViewSet):
         if lesson_id:
             return self.queryset.filter(lesson_id=lesson_id)
         return self.queryset
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            "quizzes",
+            lambda: super(QuizViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            "quiz",
+            lambda: super(QuizViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
+
+def int_query_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: ["A valid integer is required."]})
+
+
+class NoteViewSet(viewsets.ModelViewSet):
+    """
+    The current student's notes on lessons of their courses.
+
+    ``?lesson_id=`` lists one lesson's notes, unpaginated and in video
+    order (``note_student_lesson_idx``). ``counts`` reads the per-lesson
+    counters and ``sync`` applies a batch of notes taken offline.
+    """
+
+    serializer_class = NoteSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            # Schema generation, with an anonymous user.
+            return Note.objects.none()
+        queryset = Note.objects.filter(student=self.request.user)
+        if self.action != "list":
+            return queryset
+        lesson_id = int_query_param(self.request, "lesson_id")
+        if lesson_id is None:
+            return queryset.order_by("lesson", "timestamp")
+        return queryset.filter(lesson=lesson_id).order_by("timestamp")
+
+    def paginate_queryset(self, queryset):
+        # The player loads all of a lesson's notes at once.
+        if "lesson_id" in self.request.query_params:
+            return None
+        return super().paginate_queryset(queryset)
+
+    def perform_create(self, serializer):
+        serializer.save(student=self.request.user)
+
+    @extend_schema(responses=NoteCountSerializer(many=True))
+    @action(detail=False)
+    def counts(self, request):
+        """
+        Number of notes per lesson, optionally for one ``?course_id=``.
+        Lessons without notes are left out.
+        """
+        queryset = NoteCount.objects.filter(student=request.user, count__gt=0)
+        course_id = int_query_param(request, "course_id")
+        if course_id is not None:
+            queryset = queryset.filter(lesson__module__course=course_id)
+        return Response(
+            NoteCountSerializer(queryset.order_by("lesson"), many=True).data
+        )
+
+    @extend_schema(request=NoteSyncSerializer, responses={200: OpenApiTypes.OBJECT})
+    @action(detail=False, methods=["post"])
+    def sync(self, request):
+        """
+        Create, update and delete notes by ``client_id`` in one request (see
+        ``apps.courses.notes.sync_notes``).
+        """
+        serializer = NoteSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = sync_notes(request.user, serializer.validated_data["notes"])
+        result["notes"] = NoteSerializer(
+            result["notes"], many=True, context=self.get_serializer_context()
+        ).data
+        return Response(result)
+
+
+class BookmarkViewSet(viewsets.GenericViewSet):
+    """
+    The current student's lesson bookmarks, as lesson ids.
+    """
+
+    serializer_class = BookmarkToggleSerializer
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def list(self, request):
+        """
+        ``{"lessons": [...]}``: ids of the bookmarked lessons, optionally of
+        one ``?course_id=``, so the player marks a whole curriculum at once.
+        """
+        queryset = Bookmark.objects.filter(student=request.user)
+        course_id = int_query_param(request, "course_id")
+        if course_id is not None:
+            queryset = queryset.filter(lesson__module__course=course_id)
+        return Response(
+            {
+                "lessons": list(
+                    queryset.order_by("lesson").values_list("lesson", flat=True)
+                )
+            }
+        )
+
+    @extend_schema(responses={200: BookmarkToggleSerializer})
+    @action(detail=False, methods=["post"])
+    def toggle(self, request):
+        """
+        Set whether ``lesson`` is bookmarked. Repeating a request changes
+        nothing: bookmarking inserts unless the row exists (in the same
+        statement, so concurrent requests cannot both insert) and removing
+        deletes whatever is there.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lesson_id = serializer.validated_data["lesson"]
+        if serializer.validated_data["bookmarked"]:
+            Bookmark.objects.bulk_create(
+                [Bookmark(student=request.user, lesson_id=lesson_id)],
+                ignore_conflicts=True,
+            )
+        else:
+            Bookmark.objects.filter(student=request.user, lesson_id=lesson_id).delete()
+        return Response(serializer.data)
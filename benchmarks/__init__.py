@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks for hot request paths.
+
+Run them from the repository root, e.g. ``python -m benchmarks.auth_overhead``.
+Each script builds a throwaway test database, so no data is touched.
+"""
@@ -0,0 +1,203 @@
+"""
+Sync vs async read endpoints under concurrent load, at the same worker count.
+
+Seeds a throwaway SQLite database, starts gunicorn with sync workers
+(``core.wsgi``) and then with uvicorn workers (``core.asgi``, async read
+views), and drives the catalog list, course detail and categories endpoints
+at increasing client concurrency. Reports throughput and latency
+percentiles for each server.
+
+    python -m benchmarks.async_reads --workers 2 --concurrency 1 16 64
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+from benchmarks.common import percentile, report
+
+SERVERS = {
+    "sync (gunicorn)": ["core.wsgi:application"],
+    "async (uvicorn)": [
+        "core.asgi:application",
+        "--worker-class",
+        "uvicorn_worker.UvicornWorker",
+    ],
+}
+
+
+def seed(courses):
+    """
+    Create the schema and ``courses`` published courses; return the paths to
+    request and an access token for a student.
+    """
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", run_syncdb=True, verbosity=0)
+
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from apps.accounts.models import CustomUser
+    from apps.courses.models import Category, Course, Lesson, Module
+
+    instructor = CustomUser.objects.create_user(
+        "bench-instructor", "instructor@example.com", role="INSTRUCTOR"
+    )
+    student = CustomUser.objects.create_user("bench-student", "student@example.com")
+    category = Category.objects.create(name="Programming", slug="programming")
+    for i in range(courses):
+        course = Course.objects.create(
+            title=f"Course {i}",
+            description="Benchmark course",
+            instructor=instructor,
+            category=category,
+            duration=60,
+            slug=f"course-{i}",
+            is_published=True,
+        )
+        for m in range(3):
+            module = Module.objects.create(course=course, title=f"M{m}", order=m)
+            Lesson.objects.bulk_create(
+                Lesson(
+                    module=module,
+                    title=f"Lesson {n}",
+                    video_url="https://youtube.com/watch?v=1",
+                    duration_seconds=300,
+                )
+                for n in range(5)
+            )
+    paths = ["/api/courses/", f"/api/courses/{course.id}/", "/api/categories/"]
+    return paths, str(AccessToken.for_user(student))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=5).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start: {url}")
+
+
+def run_load(base_url, paths, token, concurrency, requests):
+    def fetch(path):
+        request = urllib.request.Request(
+            base_url + path, headers={"Authorization": f"Bearer {token}"}
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+            ok = True
+        except OSError:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, islice(cycle(paths), requests)))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for latency, ok in results if ok]
+    return elapsed, latencies, len(results) - len(latencies)
+
+
+def bench_server(label, target, env, paths, token, args):
+    rows = []
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            *target,
+            "--workers",
+            str(args.workers),
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(base_url + "/api/categories/")
+        for concurrency in args.concurrency:
+            elapsed, latencies, errors = run_load(
+                base_url, paths, token, concurrency, args.requests
+            )
+            rows.append(
+                (
+                    label,
+                    concurrency,
+                    f"{len(latencies) / elapsed:.0f}",
+                    f"{percentile(latencies, 0.50) * 1000:.1f}",
+                    f"{percentile(latencies, 0.95) * 1000:.1f}",
+                    f"{percentile(latencies, 0.99) * 1000:.1f}",
+                    errors,
+                )
+            )
+    finally:
+        server.terminate()
+        server.wait()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--courses", type=int, default=20)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="pynerd-bench-")
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "core.settings",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret-key"),
+        "DEBUG": "False",
+        "ALLOWED_HOSTS": "127.0.0.1,localhost",
+        "DATABASE_URL": f"sqlite:///{directory}/bench.sqlite3",
+        "THROTTLE_ANON_RATE": "1000000/day",
+        "THROTTLE_USER_RATE": "1000000/day",
+    }
+    os.environ.update(env)
+    try:
+        paths, token = seed(args.courses)
+        rows = [
+            row
+            for label, target in SERVERS.items()
+            for row in bench_server(label, target, env, paths, token, args)
+        ]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report(
+        f"Read endpoints with {args.workers} worker(s)",
+        rows,
+        ("server", "clients", "req/s", "p50 ms", "p95 ms", "p99 ms", "errors"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Per-request authentication overhead by token type.
+
+Compares the previous chain of JWT, OAuth2 and social authentication classes
+with ``TokenDispatchAuthentication``, resolving ``request.user`` the same way
+DRF does for every API call. In the chain, opaque OAuth2 tokens are rejected
+by the JWT class before the OAuth2 class runs, so only the dispatcher
+authenticates them (and pays for the access-token lookup).
+
+    python -m benchmarks.auth_overhead
+"""
+
+from datetime import timedelta
+
+from benchmarks.common import measure, report, setup_django
+
+
+def main():
+    connection = setup_django()
+
+    from django.test.utils import CaptureQueriesContext
+    from django.utils import timezone
+    from drf_social_oauth2.authentication import SocialAuthentication
+    from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+    from oauth2_provider.models import AccessToken, Application
+    from rest_framework.exceptions import APIException
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import AccessToken as JWT
+
+    from apps.accounts.authentication import TokenDispatchAuthentication
+    from apps.accounts.models import CustomUser
+
+    user = CustomUser.objects.create_user("bench", "bench@example.com", "pass")
+    application = Application.objects.create(
+        name="bench",
+        client_type=Application.CLIENT_CONFIDENTIAL,
+        authorization_grant_type=Application.GRANT_PASSWORD,
+        user=user,
+    )
+    oauth_token = AccessToken.objects.create(
+        user=user,
+        application=application,
+        token="opaque-oauth2-access-token",
+        expires=timezone.now() + timedelta(hours=1),
+        scope="read write",
+    )
+
+    headers = {
+        "anonymous": None,
+        "jwt": f"Bearer {JWT.for_user(user)}",
+        "oauth2": f"Bearer {oauth_token.token}",
+    }
+    strategies = {
+        "chain": [JWTAuthentication, OAuth2Authentication, SocialAuthentication],
+        "dispatch": [TokenDispatchAuthentication],
+    }
+    factory = APIRequestFactory()
+
+    rows = []
+    for token_type, header in headers.items():
+        extra = {"HTTP_AUTHORIZATION": header} if header else {}
+        django_request = factory.get("/api/categories/", **extra)
+        for name, classes in strategies.items():
+
+            def resolve():
+                request = Request(
+                    django_request, authenticators=[cls() for cls in classes]
+                )
+                try:
+                    return request.user.is_authenticated
+                except APIException:
+                    return False
+
+            with CaptureQueriesContext(connection) as queries:
+                authenticated = resolve()
+            rows.append(
+                (
+                    token_type,
+                    name,
+                    "yes" if authenticated else "no",
+                    len(queries),
+                    f"{measure(resolve, number=500):.1f}",
+                )
+            )
+
+    report(
+        "Authentication overhead per request",
+        rows,
+        ("token", "strategy", "authenticated", "queries", "us/request"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Shared setup and timing helpers for the benchmark scripts.
+"""
+
+import os
+import statistics
+import time
+
+
+def setup_django(test_db=True):
+    """
+    Configure Django against a fresh test database and return its connection.
+    Pass ``test_db=False`` to use the configured database as is.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    if not test_db:
+        return connection
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    return connection
+
+
+def measure(func, number=1000, repeat=5):
+    """
+    Return the median time per call of ``func`` in microseconds.
+    """
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        runs.append((time.perf_counter() - start) / number)
+    return statistics.median(runs) * 1e6
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def report(title, rows, headers):
+    """
+    Print ``rows`` as an aligned plain-text table.
+    """
+    widths = [
+        max(len(str(value)) for value in column) for column in zip(headers, *rows)
+    ]
+    print(f"\n{title}")
+    for row in [headers, *rows]:
+        print("  ".join(str(value).ljust(width) for value, width in zip(row, widths)))
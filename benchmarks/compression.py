@@ -0,0 +1,174 @@
+"""
+Bandwidth and CPU trade-offs of gzip and brotli on typical API payloads.
+
+Seeds courses with modules and lessons, categories and a quiz, fetches the
+catalog page, one course detail (curriculum), the categories and the quiz
+through the API, then compresses each body at several levels. Reports the
+encoded size, compression and decompression time, and the transfer time
+saved on a ``--mbps`` link. A second table times whole catalog requests
+with the payload cache missing, hitting without compression, and hitting
+with the stored encodings.
+
+    python -m benchmarks.compression --courses 20 --mbps 5
+"""
+
+import argparse
+import gzip
+import os
+
+from benchmarks.common import measure, report, setup_django
+
+LEVELS = [("gzip", 1), ("gzip", 6), ("gzip", 9), ("br", 1), ("br", 4), ("br", 9)]
+
+
+def seed(args):
+    from apps.accounts.models import CustomUser
+    from apps.courses.models import (
+        Category,
+        Course,
+        Lesson,
+        Module,
+        Option,
+        Question,
+        Quiz,
+    )
+
+    instructor = CustomUser.objects.create_user(
+        "bench", "bench@example.com", role="INSTRUCTOR", first_name="Instrutor"
+    )
+    categories = [
+        Category.objects.create(
+            name=f"Categoria {i}",
+            slug=f"categoria-{i}",
+            description="Cursos de programação e ciência de dados.",
+            icon="code",
+        )
+        for i in range(12)
+    ]
+    for c in range(args.courses):
+        course = Course.objects.create(
+            title=f"Curso de Python {c} — do básico ao avançado",
+            description="Aprenda Python com exercícios práticos. " * 5,
+            instructor=instructor,
+            category=categories[c % len(categories)],
+            duration=600,
+            price="49.90",
+            slug=f"curso-{c}",
+            is_published=True,
+        )
+        for m in range(args.modules):
+            module = Module.objects.create(course=course, title=f"Módulo {m}", order=m)
+            Lesson.objects.bulk_create(
+                Lesson(
+                    module=module,
+                    title=f"Aula {n}: introdução ao tema",
+                    video_url=f"https://youtube.com/watch?v={c}{m}{n}",
+                    duration_seconds=600,
+                )
+                for n in range(args.lessons)
+            )
+    quiz = Quiz.objects.create(lesson=Lesson.objects.first(), time_limit=600)
+    for q in range(20):
+        question = Question.objects.create(
+            quiz=quiz,
+            question=f"Qual é o resultado da expressão {q}?",
+            type="multiple_choice",
+        )
+        Option.objects.bulk_create(
+            Option(question=question, text=f"Alternativa {o}") for o in range(4)
+        )
+    return instructor, course, quiz
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--modules", type=int, default=6)
+    parser.add_argument("--lessons", type=int, default=8)
+    parser.add_argument("--mbps", type=float, default=5.0)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("THROTTLE_USER_RATE", "1000000/day")
+    setup_django()
+
+    from django.core.cache import cache
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from core.compression import available_encodings, brotli, compress
+
+    instructor, course, quiz = seed(args)
+    student = type(instructor).objects.create_user("student", "student@example.com")
+    client = APIClient()
+    client.force_authenticate(student)
+    payloads = {
+        "catalog page": client.get("/api/courses/").content,
+        "curriculum": client.get(f"/api/courses/{course.pk}/").content,
+        "categories": client.get("/api/categories/").content,
+        "quiz": client.get(f"/api/quizzes/{quiz.pk}/").content,
+    }
+
+    rows = []
+    for name, body in payloads.items():
+        rows.append((name, "identity", len(body), "100%", "-", "-", "-"))
+        for encoding, level in LEVELS:
+            if encoding not in available_encodings():
+                continue
+            encoded = compress(body, encoding, level)
+            compress_us = measure(lambda: compress(body, encoding, level), args.number)
+            decompress = brotli.decompress if encoding == "br" else gzip.decompress
+            decompress_us = measure(lambda: decompress(encoded), args.number)
+            saved_ms = (len(body) - len(encoded)) * 8 / (args.mbps * 1e6) * 1000
+            rows.append(
+                (
+                    "",
+                    f"{encoding}-{level}",
+                    len(encoded),
+                    f"{len(encoded) / len(body):.0%}",
+                    f"{compress_us / 1000:.2f}",
+                    f"{decompress_us / 1000:.2f}",
+                    f"{saved_ms:.1f}",
+                )
+            )
+    report(
+        f"Payload compression ({args.courses} courses; transfer at {args.mbps} Mbit/s)",
+        rows,
+        (
+            "payload",
+            "encoding",
+            "bytes",
+            "ratio",
+            "compress ms",
+            "decompress ms",
+            "transfer saved ms",
+        ),
+    )
+
+    best = available_encodings()[0]
+    rows = []
+    for label, timeout, accept_encoding in [
+        ("miss: serialize, render, encode", 0, best),
+        ("hit, identity", 300, ""),
+        ("hit, stored encoding", 300, best),
+    ]:
+        cache.clear()
+        with override_settings(CATALOG_CACHE_TIMEOUT=timeout):
+            client.get("/api/courses/", HTTP_ACCEPT_ENCODING=accept_encoding)
+            response = client.get("/api/courses/", HTTP_ACCEPT_ENCODING=accept_encoding)
+            request_us = measure(
+                lambda: client.get(
+                    "/api/courses/", HTTP_ACCEPT_ENCODING=accept_encoding
+                ),
+                args.number,
+            )
+        rows.append((label, f"{request_us / 1000:.2f}", len(response.content)))
+    report(
+        "GET /api/courses/ through the test client",
+        rows,
+        ("request", "ms", "bytes sent"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+JSON rendering and parsing of a large course catalog payload.
+
+Serializes ``--courses`` courses (each with modules and lessons) through
+``CourseSerializer`` once, then times DRF's stdlib ``JSONRenderer`` against
+the orjson renderer on the result, along with parsing the rendered bytes
+back. The serializer time is reported alongside to show the share encoding
+takes.
+
+    python -m benchmarks.json_rendering --courses 50
+"""
+
+import argparse
+import io
+import time
+
+from benchmarks.common import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=50)
+    parser.add_argument("--modules", type=int, default=6)
+    parser.add_argument("--lessons", type=int, default=8)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from apps.accounts.models import CustomUser
+    from apps.courses.models import Category, Course, Lesson, Module
+    from apps.courses.serializers import CourseSerializer
+    from apps.courses.views import visible_courses
+    from core.parsers import ORJSONParser
+    from core.renderers import ORJSONRenderer
+
+    instructor = CustomUser.objects.create_user(
+        "bench", "bench@example.com", role="INSTRUCTOR", first_name="Instrutor"
+    )
+    category = Category.objects.create(name="Programação", slug="programacao")
+    for c in range(args.courses):
+        course = Course.objects.create(
+            title=f"Curso de Python {c} — do básico ao avançado",
+            description="Aprenda Python com exercícios práticos. " * 10,
+            instructor=instructor,
+            category=category,
+            duration=600,
+            price="49.90",
+            slug=f"curso-{c}",
+            is_published=True,
+        )
+        for m in range(args.modules):
+            module = Module.objects.create(course=course, title=f"Módulo {m}", order=m)
+            Lesson.objects.bulk_create(
+                Lesson(
+                    module=module,
+                    title=f"Aula {n}: introdução",
+                    video_url="https://youtube.com/watch?v=abc",
+                    duration_seconds=600,
+                )
+                for n in range(args.lessons)
+            )
+
+    courses = list(visible_courses(instructor))
+    start = time.perf_counter()
+    data = CourseSerializer(courses, many=True).data
+    serialize_ms = (time.perf_counter() - start) * 1000
+
+    stdlib, fast = JSONRenderer(), ORJSONRenderer()
+    body = stdlib.render(data)
+    assert fast.render(data) == body
+
+    rows = []
+    for label, renderer, json_parser in (
+        ("stdlib json", stdlib, JSONParser()),
+        ("orjson", fast, ORJSONParser()),
+    ):
+        render_us = measure(lambda: renderer.render(data), args.number)
+        parse_us = measure(lambda: json_parser.parse(io.BytesIO(body)), args.number)
+        rows.append(
+            (
+                label,
+                f"{render_us / 1000:.2f}",
+                f"{len(body) / render_us:.0f}",
+                f"{render_us / 1000 / (serialize_ms + render_us / 1000):.0%}",
+                f"{parse_us / 1000:.2f}",
+            )
+        )
+
+    report(
+        f"{args.courses} courses, {len(body) / 1024:.0f} KiB of JSON "
+        f"(CourseSerializer: {serialize_ms:.1f} ms)",
+        rows,
+        ("renderer", "render ms", "MB/s", "share of response", "parse ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
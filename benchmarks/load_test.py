@@ -0,0 +1,241 @@
+"""
+Replay a realistic mix of API traffic against a running server.
+
+Reads seeded students (``manage.py seed_data``), their progress rows and the
+quizzes of their courses from the configured database, then runs
+``--concurrency`` virtual users for ``--duration`` seconds. Each one logs in
+as a different student and keeps issuing requests drawn from ``--mix`` over
+a keep-alive connection. Reports throughput and latency percentiles per
+request type.
+
+    python manage.py seed_data --students 10000
+    THROTTLE_USER_RATE=100000000/day THROTTLE_ANON_RATE=100000000/day \\
+        gunicorn core.wsgi:application
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 32
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from benchmarks.common import percentile, report, setup_django
+
+MIX = {
+    "catalog": 40,
+    "course": 20,
+    "categories": 10,
+    "progress": 15,
+    "quiz": 10,
+    "login": 5,
+}
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in MIX:
+            raise argparse.ArgumentTypeError(f"Unknown request type: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def load_fixtures(prefix, users, rng):
+    """
+    Return the students the virtual users log in as, with the ids each one
+    requests, and the published course ids.
+    """
+    from apps.accounts.models import CustomUser
+    from apps.courses.models import Course, Progress, Quiz
+
+    students = CustomUser.objects.filter(username__startswith=f"{prefix}-student-")
+    total = students.count()
+    if total < users:
+        raise SystemExit(
+            f"Found {total} students prefixed '{prefix}-'; run "
+            f"`manage.py seed_data --prefix {prefix} --students {users}` or more."
+        )
+    usernames = [f"{prefix}-student-{n}" for n in rng.sample(range(total), users)]
+    fixtures = []
+    for user in CustomUser.objects.filter(username__in=usernames):
+        course_ids = list(user.enrollments.values_list("course_id", flat=True))
+        fixtures.append(
+            {
+                "username": user.username,
+                "progress": list(
+                    Progress.objects.filter(student=user).values_list("id", flat=True)[
+                        :200
+                    ]
+                ),
+                "quizzes": list(
+                    Quiz.objects.filter(
+                        lesson__module__course__in=course_ids
+                    ).values_list("id", flat=True)
+                ),
+            }
+        )
+    courses = list(
+        Course.objects.filter(is_published=True).values_list("id", flat=True)
+    )
+    return fixtures, courses
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, base_url, fixture, courses, args, rng, results):
+        super().__init__(daemon=True)
+        self.url = urlsplit(base_url)
+        self.fixture = fixture
+        self.courses = courses
+        self.args = args
+        self.rng = rng
+        self.results = results
+        self.token = None
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip, br"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    self.url.hostname, self.url.port, timeout=30
+                )
+            try:
+                self.connection.request(method, path, body, headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (OSError, http.client.HTTPException):
+                # The server may close idle keep-alive connections.
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    return 0, b""
+
+    def timed(self, name, method, path, body=None):
+        start = time.perf_counter()
+        status, content = self.request(method, path, body)
+        self.results[name].append((time.perf_counter() - start, status))
+        return status, content
+
+    def login(self):
+        status, content = self.timed(
+            "login",
+            "POST",
+            "/api/auth/login/",
+            {"username": self.fixture["username"], "password": self.args.password},
+        )
+        if status == 200:
+            self.token = json.loads(content)["access"]
+
+    def run(self):
+        self.login()
+        names, weights = zip(*self.args.mix.items())
+        deadline = time.monotonic() + self.args.duration
+        pages = max(len(self.courses) // 20, 1)
+        while time.monotonic() < deadline:
+            name = self.rng.choices(names, weights)[0]
+            if name == "login":
+                self.login()
+            elif name == "catalog":
+                # Early pages are far more popular.
+                page = min(int(self.rng.expovariate(0.5)), pages - 1)
+                self.timed(name, "GET", f"/api/courses/?limit=20&offset={page * 20}")
+            elif name == "course":
+                course = self.rng.choice(self.courses)
+                self.timed(name, "GET", f"/api/courses/{course}/")
+            elif name == "categories":
+                self.timed(name, "GET", "/api/categories/")
+            elif name == "progress" and self.fixture["progress"]:
+                progress = self.rng.choice(self.fixture["progress"])
+                self.timed(
+                    name, "PATCH", f"/api/progress/{progress}/", {"is_completed": True}
+                )
+            elif name == "quiz" and self.fixture["quizzes"]:
+                quiz = self.rng.choice(self.fixture["quizzes"])
+                self.timed(name, "GET", f"/api/quizzes/{quiz}/")
+        if self.connection is not None:
+            self.connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=MIX,
+        help="Weights per request type, e.g. catalog=40,course=20,login=5.",
+    )
+    parser.add_argument("--prefix", default="seed")
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django(test_db=False)
+
+    from apps.courses.seeding import DEFAULT_PASSWORD
+
+    args.password = args.password or DEFAULT_PASSWORD
+    rng = random.Random(args.seed)
+    fixtures, courses = load_fixtures(args.prefix, args.concurrency, rng)
+
+    results = defaultdict(list)
+    users = [
+        VirtualUser(
+            args.url,
+            fixture,
+            courses,
+            args,
+            random.Random(rng.random()),
+            results,
+        )
+        for fixture in fixtures
+    ]
+    start = time.perf_counter()
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    everything = []
+    for name in [*MIX, "total"]:
+        samples = everything if name == "total" else results.get(name, [])
+        if name != "total":
+            everything.extend(samples)
+        if not samples:
+            continue
+        latencies = [latency for latency, _ in samples]
+        errors = sum(1 for _, status in samples if not 200 <= status < 300)
+        rows.append(
+            (
+                name,
+                len(samples),
+                f"{len(samples) / elapsed:.1f}",
+                f"{percentile(latencies, 0.50) * 1000:.1f}",
+                f"{percentile(latencies, 0.95) * 1000:.1f}",
+                f"{percentile(latencies, 0.99) * 1000:.1f}",
+                errors,
+            )
+        )
+    report(
+        f"{args.concurrency} virtual users for {elapsed:.0f} s against {args.url}",
+        rows,
+        ("request", "count", "req/s", "p50 ms", "p95 ms", "p99 ms", "errors"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Time a log call costs the request thread, with and without the log queue.
+
+Logs JSON records from ``--threads`` threads to a stream whose writes take
+``--write-ms`` (a slow stdout pipe), once through a ``StreamHandler`` and
+once through ``core.logs.QueueHandler``, and reports the latency of the
+``logger.info()`` calls. With the queue, records the listener cannot write
+in time are dropped once ``--queue-size`` are waiting.
+
+    python -m benchmarks.logging_overhead --write-ms 1
+"""
+
+import argparse
+import io
+import logging
+import queue
+import threading
+import time
+
+from benchmarks.common import percentile, report, setup_django
+
+
+class SlowStream(io.StringIO):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return super().write(text)
+
+
+def run(handler, threads, calls):
+    logger = logging.getLogger("benchmarks.logging")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers = [handler]
+    barrier = threading.Barrier(threads)
+    latencies = []
+
+    def work():
+        barrier.wait()
+        for i in range(calls):
+            start = time.perf_counter()
+            logger.info("request %d", i, extra={"route": "course-list"})
+            latencies.append((time.perf_counter() - start) * 1e6)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies
+
+
+def summary(latencies):
+    return (
+        f"{percentile(latencies, 0.50):.1f}",
+        f"{percentile(latencies, 0.99):.1f}",
+        f"{max(latencies):.1f}",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--write-ms", type=float, default=1)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    setup_django(test_db=False)
+
+    from core.logs import JSONFormatter, QueueHandler, QueueListener
+
+    rows = []
+    stream = logging.StreamHandler(SlowStream(args.write_ms / 1000))
+    stream.setFormatter(JSONFormatter())
+    latencies = run(stream, args.threads, args.calls)
+    rows.append(("StreamHandler", 0) + summary(latencies))
+
+    output = logging.StreamHandler(SlowStream(args.write_ms / 1000))
+    output.setFormatter(JSONFormatter())
+    handler = QueueHandler(queue.Queue(args.queue_size))
+    handler.listener = QueueListener(handler.queue, output)
+    latencies = run(handler, args.threads, args.calls)
+    dropped = handler.dropped
+    handler.close()
+    rows.append(("QueueHandler", dropped) + summary(latencies))
+
+    report(
+        f"{args.threads} threads x {args.calls} calls, {args.write_ms} ms writes",
+        rows,
+        ("handler", "dropped", "p50 µs", "p99 µs", "max µs"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Login throughput of a single sync worker, password hashing included.
+
+Posts to ``/api/auth/login/`` sequentially with the configured password
+hasher and reports requests per second, latency percentiles and the share of
+time spent verifying the password. Multiply by the worker count to size login
+capacity.
+
+    python -m benchmarks.login_throughput --requests 200
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.common import percentile, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test import Client
+    from rest_framework_simplejwt.views import TokenObtainPairView
+
+    from apps.accounts.models import CustomUser
+
+    # Measure the login path itself, not the anonymous daily throttle.
+    TokenObtainPairView.throttle_classes = []
+
+    password = "bench-password-123"
+    user = CustomUser.objects.create_user("bench", "bench@example.com", password)
+    client = Client()
+
+    rows = []
+    for label, login in (("username", "bench"), ("email", "bench@example.com")):
+        latencies = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            response = client.post(
+                "/api/auth/login/",
+                {"username": login, "password": password},
+                content_type="application/json",
+            )
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.content
+        mean = statistics.mean(latencies)
+        rows.append(
+            (
+                label,
+                f"{1 / mean:.1f}",
+                f"{mean * 1000:.1f}",
+                f"{percentile(latencies, 0.95) * 1000:.1f}",
+            )
+        )
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        user.check_password(password)
+    hash_ms = (time.perf_counter() - start) / args.requests * 1000
+
+    report(
+        "Login throughput per worker",
+        rows,
+        ("login with", "req/s", "mean ms", "p95 ms"),
+    )
+    print(f"\nPassword verification alone: {hash_ms:.1f} ms per login")
+
+
+if __name__ == "__main__":
+    main()
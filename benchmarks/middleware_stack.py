@@ -0,0 +1,130 @@
+"""
+Per-request saving of skipping session, CSRF, auth and messages middleware.
+
+Times bearer-authenticated API requests through the four middleware alone
+(around a view that does nothing) and end to end through the test client,
+with Django's session, CSRF, authentication and messages middleware and
+with the ``core.middleware`` subclasses that skip them for such requests.
+Each runs with and without a session cookie in the request (a browser
+client that also uses the admin).
+
+    python -m benchmarks.middleware_stack --rounds 10
+"""
+
+import argparse
+import os
+
+from benchmarks.common import measure, report, setup_django
+
+DJANGO_CLASSES = {
+    "core.middleware.SessionMiddleware": (
+        "django.contrib.sessions.middleware.SessionMiddleware"
+    ),
+    "core.middleware.CsrfViewMiddleware": "django.middleware.csrf.CsrfViewMiddleware",
+    "core.middleware.AuthenticationMiddleware": (
+        "django.contrib.auth.middleware.AuthenticationMiddleware"
+    ),
+    "core.middleware.MessageMiddleware": (
+        "django.contrib.messages.middleware.MessageMiddleware"
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ.setdefault("THROTTLE_ANON_RATE", "100000000/day")
+    os.environ.setdefault("THROTTLE_USER_RATE", "100000000/day")
+    setup_django()
+
+    from django.conf import settings
+    from django.http import HttpResponse
+    from django.test import RequestFactory, override_settings
+    from django.utils.module_loading import import_string
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from apps.accounts.models import CustomUser
+    from apps.courses.models import Category
+
+    user = CustomUser.objects.create_user("student", "student@example.com")
+    Category.objects.create(name="Programming", slug="programming")
+    token = f"Bearer {AccessToken.for_user(user)}"
+    django_stack = [DJANGO_CLASSES.get(name, name) for name in settings.MIDDLEWARE]
+
+    def view(request):
+        return HttpResponse()
+
+    def chain(names):
+        handler = view
+        for name in reversed(names):
+            handler = import_string(name)(handler)
+        return handler
+
+    session = APIClient().session
+    session["seen"] = True
+    session.save()
+    factory = RequestFactory()
+    rows = []
+    for label, names in [
+        ("django", list(DJANGO_CLASSES.values())),
+        ("slim", list(DJANGO_CLASSES)),
+    ]:
+        handler = chain(names)
+        for cookie in (False, True):
+            headers = {"Authorization": token}
+            if cookie:
+                headers["Cookie"] = f"sessionid={session.session_key}"
+            per_request = measure(
+                lambda: handler(factory.get("/api/users/me/", headers=headers)),
+                args.number * 10,
+            )
+            rows.append(
+                (label + (", session cookie" if cookie else ""), f"{per_request:.1f}")
+            )
+    report("Session, CSRF, auth and messages middleware", rows, ("stack", "µs"))
+
+    configs = [
+        ("django", django_stack, False),
+        ("slim", settings.MIDDLEWARE, False),
+        ("django, session cookie", django_stack, True),
+        ("slim, session cookie", settings.MIDDLEWARE, True),
+    ]
+    rows = []
+    for path in ["/api/categories/", "/api/users/me/"]:
+        # Alternate the configurations and keep each one's best round.
+        best = {}
+        for _ in range(args.rounds):
+            for label, middleware, session in configs:
+                with override_settings(MIDDLEWARE=middleware):
+                    client = APIClient()
+                    if session:
+                        client.force_login(user)
+                    client.credentials(HTTP_AUTHORIZATION=token)
+                    assert client.get(path).status_code == 200
+                    per_request = measure(
+                        lambda: client.get(path), args.number, repeat=1
+                    )
+                best[label] = min(best.get(label, per_request), per_request)
+        for label, per_request in best.items():
+            baseline = best[label.replace("slim", "django")]
+            rows.append(
+                (
+                    path,
+                    label,
+                    f"{per_request:.0f}",
+                    f"{baseline - per_request:.0f}",
+                )
+            )
+    report(
+        "Bearer-authenticated API requests",
+        rows,
+        ("path", "middleware", "µs/request", "saved µs"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Cost of serving api/schema/ generated per request versus precomputed.
+
+Times ``SpectacularAPIView`` (what ``DEBUG`` still serves) against
+``core.schema.PrecomputedSchemaView`` for JSON and YAML, and a revalidation
+with ``If-None-Match`` that ends in a 304.
+
+    python -m benchmarks.openapi_schema --number 20
+"""
+
+import argparse
+import os
+
+from benchmarks.common import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("THROTTLE_ANON_RATE", "100000000/day")
+    os.environ.setdefault("THROTTLE_USER_RATE", "100000000/day")
+    setup_django()
+
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    rows = []
+    for accept in ("application/vnd.oai.openapi+json", "application/vnd.oai.openapi"):
+        with override_settings(DEBUG=True):
+            live = measure(
+                lambda: client.get("/api/schema/", HTTP_ACCEPT=accept), args.number
+            )
+        response = client.get("/api/schema/", HTTP_ACCEPT=accept)
+        assert response.status_code == 200
+        precomputed = measure(
+            lambda: client.get("/api/schema/", HTTP_ACCEPT=accept), args.number * 10
+        )
+        etag = response["ETag"]
+        revalidated = measure(
+            lambda: client.get(
+                "/api/schema/", HTTP_ACCEPT=accept, HTTP_IF_NONE_MATCH=etag
+            ),
+            args.number * 10,
+        )
+        rows.append(
+            (
+                accept,
+                f"{len(response.content):,}",
+                f"{live / 1000:.1f}",
+                f"{precomputed / 1000:.2f}",
+                f"{revalidated / 1000:.2f}",
+            )
+        )
+    report(
+        "GET api/schema/",
+        rows,
+        ("accept", "bytes", "generated ms", "precomputed ms", "304 ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Overhead of the per-request timing middleware.
+
+Times the same requests through the test client without the middleware,
+with ``REQUEST_TIMING`` off (Django drops it at startup), on, and on for a
+staff user who also gets the ``Server-Timing`` header.
+
+    python -m benchmarks.request_timing --rounds 10
+"""
+
+import argparse
+import os
+
+from benchmarks.common import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--courses", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("THROTTLE_ANON_RATE", "100000000/day")
+    os.environ.setdefault("THROTTLE_USER_RATE", "100000000/day")
+    setup_django()
+
+    from django.conf import settings
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from apps.accounts.models import CustomUser
+    from apps.courses.models import Category, Course
+
+    instructor = CustomUser.objects.create_user(
+        "instructor", "instructor@example.com", role="INSTRUCTOR"
+    )
+    staff = CustomUser.objects.create_user("staff", "staff@example.com", is_staff=True)
+    student = CustomUser.objects.create_user("student", "student@example.com")
+    category = Category.objects.create(name="Programming", slug="programming")
+    course = None
+    for i in range(args.courses):
+        course = Course.objects.create(
+            title=f"Course {i}",
+            description="Benchmark course",
+            instructor=instructor,
+            category=category,
+            duration=60,
+            slug=f"course-{i}",
+            is_published=True,
+        )
+    without_timing = [
+        name
+        for name in settings.MIDDLEWARE
+        if not name.startswith("core.instrumentation")
+    ]
+    paths = [
+        "/api/categories/",
+        f"/api/courses/{course.pk}/",
+        "/api/courses/my_courses/",
+    ]
+
+    configs = [
+        ("not installed", without_timing, False, student),
+        ("off", settings.MIDDLEWARE, False, student),
+        ("on", settings.MIDDLEWARE, True, student),
+        ("on, Server-Timing", settings.MIDDLEWARE, True, staff),
+    ]
+    rows = []
+    for path in paths:
+        # Alternate the configurations and keep each one's best round, so
+        # machine noise does not land on one of them.
+        best = {}
+        for _ in range(args.rounds):
+            for label, middleware, enabled, user in configs:
+                with override_settings(
+                    MIDDLEWARE=middleware,
+                    REQUEST_TIMING=enabled,
+                    REQUEST_TIMING_SLOW_MS=10**6,
+                ):
+                    client = APIClient()
+                    client.force_authenticate(user)
+                    client.get(path)
+                    per_request = measure(
+                        lambda: client.get(path), args.number, repeat=1
+                    )
+                best[label] = min(best.get(label, per_request), per_request)
+        baseline = best["not installed"]
+        for label, per_request in best.items():
+            rows.append(
+                (
+                    path,
+                    label,
+                    f"{per_request:.0f}",
+                    f"{(per_request - baseline) / baseline:+.1%}",
+                )
+            )
+    report(
+        "Request timing middleware overhead",
+        rows,
+        ("path", "REQUEST_TIMING", "µs/request", "vs not installed"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Lookup cost per tier of core.caching.TieredCache and its stampede protection.
+
+The first table times a hit in worker memory, a hit in the shared cache
+(``CACHE_URL``; LocMemCache by default) and a plain ``cache.get()`` for
+reference. The second has ``--threads`` callers ask for one key at the same
+moment, right after it expired and right after its tag was invalidated, with
+a builder that takes ``--build-ms``. It counts how often the value is
+rebuilt and reports the callers' latency, next to a naive get/build/set.
+
+    CACHE_URL=redis://localhost:6379/0 python -m benchmarks.tiered_cache
+"""
+
+import argparse
+import threading
+import time
+
+from benchmarks.common import measure, percentile, report, setup_django
+
+
+def stampede(threads, lookup):
+    """
+    Run ``lookup()`` in ``threads`` threads released together; return the
+    latencies in milliseconds.
+    """
+    barrier = threading.Barrier(threads)
+    latencies = []
+
+    def run():
+        barrier.wait()
+        start = time.perf_counter()
+        lookup()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--build-ms", type=float, default=100)
+    parser.add_argument("--size", type=int, default=20_000, help="Value bytes.")
+    args = parser.parse_args()
+
+    setup_django(test_db=False)
+
+    from django.core.cache import cache
+
+    from core.caching import TieredCache
+
+    cache.clear()
+    value = b"x" * args.size
+    tiered = TieredCache("bench", stale_timeout=60)
+    tiered.get_or_set("hot", lambda: value, 300)
+    cache.set("plain", value, 300)
+    shared_only = TieredCache("bench", local_timeout=0)
+    rows = [
+        ("local hit", f"{measure(lambda: tiered.get_or_set('hot', None, 300)):.1f}"),
+        (
+            "shared hit",
+            f"{measure(lambda: shared_only.get_or_set('hot', None, 300)):.1f}",
+        ),
+        ("cache.get()", f"{measure(lambda: cache.get('plain')):.1f}"),
+    ]
+    report(f"Lookup of a {args.size:,} byte value", rows, ("lookup", "µs"))
+
+    builds = 0
+
+    def build():
+        nonlocal builds
+        builds += 1
+        time.sleep(args.build_ms / 1000)
+        return value
+
+    def naive():
+        if cache.get("naive") is None:
+            cache.set("naive", build(), 300)
+
+    rows = []
+    scenarios = [
+        ("naive get/build/set", lambda: cache.delete("naive"), naive),
+        (
+            "tiered, expired",
+            lambda: (
+                tiered.get_or_set("key", build, 0, tags=["bench"]),
+                tiered.local.clear(),
+            ),
+            lambda: tiered.get_or_set("key", build, 300, tags=["bench"]),
+        ),
+        (
+            "tiered, tag invalidated",
+            lambda: tiered.invalidate_tags("bench"),
+            lambda: tiered.get_or_set("key", build, 300, tags=["bench"]),
+        ),
+    ]
+    for name, prepare, lookup in scenarios:
+        prepare()
+        builds = 0
+        latencies = stampede(args.threads, lookup)
+        rows.append(
+            (
+                name,
+                builds,
+                f"{percentile(latencies, 0.50):.1f}",
+                f"{percentile(latencies, 0.99):.1f}",
+            )
+        )
+    report(
+        f"{args.threads} concurrent callers, {args.build_ms:.0f} ms builder",
+        rows,
+        ("scenario", "builds", "p50 ms", "p99 ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
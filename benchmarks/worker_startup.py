@@ -0,0 +1,176 @@
+"""
+Gunicorn worker cold start and memory.
+
+First imports the app in a fresh interpreter and serves one request, with
+the OAuth and OpenAPI stacks loaded lazily (as shipped) and eagerly (as
+before), and reports start-up time, loaded modules and RSS. Then starts
+gunicorn with ``gunicorn.conf.py``, with and without ``preload_app``, and
+reports the time to the first response and each worker's RSS, PSS
+(proportional share of shared pages) and private memory. Linux only.
+
+    python -m benchmarks.worker_startup --workers 4
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.common import report
+
+EAGER_MODULES = [
+    "drf_spectacular.views",
+    "social_django.urls",
+    "drf_social_oauth2.urls",
+    "drf_social_oauth2.authentication",
+    "oauth2_provider.contrib.rest_framework",
+]
+
+COLD_START = """
+import importlib, json, sys, time
+start = time.perf_counter()
+from core.wsgi import application
+from django.test import Client
+for name in {eager}:
+    importlib.import_module(name)
+status = Client().get("/api/categories/").status_code
+elapsed = time.perf_counter() - start
+rss = int(open("/proc/self/statm").read().split()[1]) * 4096
+print(json.dumps([status, elapsed, len(sys.modules), rss]))
+"""
+
+
+def memory(pid):
+    """
+    Return ``(rss, pss, private)`` in bytes for ``pid``.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    private = values["Private_Clean"] + values["Private_Dirty"]
+    return values["Rss"], values["Pss"], private
+
+
+def worker_pids(master):
+    with open(f"/proc/{master}/task/{master}/children") as children:
+        return [int(pid) for pid in children.read().split()]
+
+
+def cold_start(env, eager):
+    output = subprocess.run(
+        [sys.executable, "-c", COLD_START.format(eager=eager)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def gunicorn(env, workers, preload, requests):
+    port = 8700 + preload
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "core.wsgi:application"],
+        env={
+            **env,
+            "GUNICORN_BIND": f"127.0.0.1:{port}",
+            "GUNICORN_WORKERS": str(workers),
+            "GUNICORN_PRELOAD": str(preload),
+        },
+    )
+    url = f"http://127.0.0.1:{port}/api/categories/"
+    try:
+        while True:
+            try:
+                urllib.request.urlopen(url, timeout=5).read()
+                break
+            except OSError:
+                if time.perf_counter() - start > 60:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.05)
+        first_response = time.perf_counter() - start
+        # Let every worker boot and serve some traffic.
+        time.sleep(2)
+        for _ in range(requests):
+            urllib.request.urlopen(url, timeout=5).read()
+        usage = [memory(pid) for pid in worker_pids(server.pid)]
+    finally:
+        server.terminate()
+        server.wait()
+    return first_response, usage
+
+
+def mib(value):
+    return f"{value / 2**20:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="pynerd-bench-")
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "core.settings",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret-key"),
+        "DEBUG": "False",
+        "ALLOWED_HOSTS": "127.0.0.1,localhost,testserver",
+        "DATABASE_URL": f"sqlite:///{directory}/bench.sqlite3",
+        "THROTTLE_ANON_RATE": "1000000/day",
+        "PYTHONPATH": os.getcwd(),
+    }
+    try:
+        subprocess.run(
+            [sys.executable, "manage.py", "migrate", "--run-syncdb", "-v", "0"],
+            env=env,
+            check=True,
+        )
+
+        rows = []
+        for label, eager in (("lazy", []), ("eager", EAGER_MODULES)):
+            # Best of three runs, to leave out disk cache effects.
+            runs = [cold_start(env, eager) for _ in range(3)]
+            status, elapsed, modules, rss = min(runs, key=lambda run: run[1])
+            assert status == 200, status
+            rows.append((label, f"{elapsed * 1000:.0f}", modules, mib(rss)))
+        report(
+            "Import and first request in one process",
+            rows,
+            ("OAuth/OpenAPI", "ms", "modules", "RSS MiB"),
+        )
+
+        rows = []
+        for preload in (False, True):
+            first_response, usage = gunicorn(env, args.workers, preload, args.requests)
+            rows.append(
+                (
+                    "on" if preload else "off",
+                    f"{first_response * 1000:.0f}",
+                    mib(sum(rss for rss, _, _ in usage) / len(usage)),
+                    mib(sum(pss for _, pss, _ in usage) / len(usage)),
+                    mib(sum(private for _, _, private in usage) / len(usage)),
+                    mib(sum(pss for _, pss, _ in usage)),
+                )
+            )
+        report(
+            f"gunicorn with {args.workers} workers (per worker, MiB)",
+            rows,
+            ("preload", "first response ms", "RSS", "PSS", "private", "total PSS"),
+        )
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
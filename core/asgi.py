@@ -12,5 +12,14 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+# Persistent connections are turned off unless the pool below is used.
+os.environ["ASGI"] = "True"
+# Serve logins with the async view so password hashing awaits the bounded
+# pool instead of blocking the event loop.
+os.environ.setdefault("ASYNC_LOGIN_VIEW", "True")
+# Serve the hot read endpoints with async views and the async ORM.
+os.environ.setdefault("ASYNC_READ_VIEWS", "True")
+# Use psycopg's connection pool instead of per-thread persistent connections.
+os.environ.setdefault("DATABASE_POOL", "True")
 
 application = get_asgi_application()
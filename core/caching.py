@@ -0,0 +1,291 @@
+"""
+Two-tier cache: a bounded in-process LRU in front of a shared Django cache.
+
+``TieredCache.get_or_set()`` looks in the worker's own memory first, then in
+the shared cache (``CACHES["default"]``; set ``CACHE_URL`` to a Redis or
+Memcached server to share it between workers and hosts), and calls the
+builder only when both miss.
+
+Entries are tagged. ``invalidate_tags()`` replaces the tags' versions in the
+shared cache, which retires every entry written under the old versions in
+all workers at once, and drops the tagged entries from this worker's memory.
+Other workers may serve their in-memory copy for up to
+``LOCAL_CACHE_TIMEOUT`` seconds more.
+
+Expired entries stay in the shared cache for ``CACHE_STALE_TIMEOUT`` seconds.
+When a popular entry expires, the first caller takes a lock in the shared
+cache and rebuilds it while everyone else keeps serving the stale value. An
+entry retired by a tag is never served; callers wait up to
+``CACHE_LOCK_TIMEOUT`` seconds for the lock holder's value instead of all
+rebuilding it.
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.metrics import record_cache
+
+TAG_KEY_PREFIX = "tiered-cache:tag:"
+
+
+@dataclass
+class Entry:
+    value: object
+    expires_at: float
+    tags: dict
+
+
+class LocalCache:
+    """
+    Thread-safe LRU of at most ``max_entries`` entries, each with its own
+    expiry.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, timeout):
+        if timeout <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (entry, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_tagged(self, tags):
+        tags = set(tags)
+        with self._lock:
+            for key in [
+                key
+                for key, (entry, _) in self._entries.items()
+                if tags.intersection(entry.tags)
+            ]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache:
+    """
+    A named cache of built values. ``name`` prefixes its keys and labels its
+    metrics; the other arguments default to the settings of the same name.
+    """
+
+    poll_interval = 0.05
+
+    def __init__(
+        self,
+        name,
+        alias="default",
+        local_timeout=None,
+        local_max_entries=None,
+        stale_timeout=None,
+        lock_timeout=None,
+    ):
+        self.name = name
+        self.alias = alias
+        self.local_timeout = (
+            settings.LOCAL_CACHE_TIMEOUT if local_timeout is None else local_timeout
+        )
+        self.stale_timeout = (
+            settings.CACHE_STALE_TIMEOUT if stale_timeout is None else stale_timeout
+        )
+        self.lock_timeout = (
+            settings.CACHE_LOCK_TIMEOUT if lock_timeout is None else lock_timeout
+        )
+        self.local = LocalCache(
+            settings.LOCAL_CACHE_MAX_ENTRIES
+            if local_max_entries is None
+            else local_max_entries
+        )
+        self.counts = Counter()
+        self._counts_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def get_or_set(self, key, build, timeout, tags=()):
+        """
+        Return the value cached under ``key``, or the result of ``build()``
+        after caching it for ``timeout`` seconds under ``tags``. ``None``
+        results are returned but not cached.
+        """
+        key = f"{self.name}:{key}"
+        entry = self.local.get(key)
+        if entry is not None:
+            self.record("local_hits")
+            return entry.value
+
+        tag_keys = [TAG_KEY_PREFIX + tag for tag in tags]
+        values = self.shared.get_many([key, *tag_keys])
+        versions = {tag: values.get(TAG_KEY_PREFIX + tag) for tag in tags}
+        entry = values.get(key)
+        stale = None
+        if entry is not None and entry.tags == versions:
+            if entry.expires_at > time.time():
+                self.set_local(key, entry)
+                self.record("shared_hits")
+                return entry.value
+            stale = entry
+
+        lock_key = f"{key}:lock"
+        if not self.shared.add(lock_key, 1, self.lock_timeout):
+            if stale is not None:
+                self.record("stale_hits")
+                return stale.value
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                entry = self.shared.get(key)
+                if entry is not None and entry.tags == versions:
+                    self.set_local(key, entry)
+                    self.record("wait_hits")
+                    return entry.value
+                if self.shared.get(lock_key) is None:
+                    break
+            # The lock holder failed or returned nothing cacheable.
+            return self.build(key, build, timeout, versions)
+        try:
+            return self.build(key, build, timeout, versions)
+        finally:
+            self.shared.delete(lock_key)
+
+    def build(self, key, build, timeout, versions):
+        self.record("misses")
+        value = build()
+        if value is not None:
+            versions = self.current_versions(versions)
+            entry = Entry(value, time.time() + timeout, versions)
+            self.shared.set(key, entry, timeout + self.stale_timeout)
+            self.set_local(key, entry)
+        return value
+
+    def current_versions(self, versions):
+        # Tags never invalidated (or evicted) get a version on first write.
+        for tag, version in versions.items():
+            if version is None:
+                self.shared.add(TAG_KEY_PREFIX + tag, time.time_ns(), None)
+                versions[tag] = self.shared.get(TAG_KEY_PREFIX + tag)
+        return versions
+
+    async def aget_or_set(self, key, build, timeout, tags=()):
+        """
+        Async counterpart of ``get_or_set()``; ``build()`` is awaited.
+        """
+        key = f"{self.name}:{key}"
+        entry = self.local.get(key)
+        if entry is not None:
+            self.record("local_hits")
+            return entry.value
+
+        tag_keys = [TAG_KEY_PREFIX + tag for tag in tags]
+        values = await self.shared.aget_many([key, *tag_keys])
+        versions = {tag: values.get(TAG_KEY_PREFIX + tag) for tag in tags}
+        entry = values.get(key)
+        stale = None
+        if entry is not None and entry.tags == versions:
+            if entry.expires_at > time.time():
+                self.set_local(key, entry)
+                self.record("shared_hits")
+                return entry.value
+            stale = entry
+
+        lock_key = f"{key}:lock"
+        if not await self.shared.aadd(lock_key, 1, self.lock_timeout):
+            if stale is not None:
+                self.record("stale_hits")
+                return stale.value
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                entry = await self.shared.aget(key)
+                if entry is not None and entry.tags == versions:
+                    self.set_local(key, entry)
+                    self.record("wait_hits")
+                    return entry.value
+                if await self.shared.aget(lock_key) is None:
+                    break
+            return await self.abuild(key, build, timeout, versions)
+        try:
+            return await self.abuild(key, build, timeout, versions)
+        finally:
+            await self.shared.adelete(lock_key)
+
+    async def abuild(self, key, build, timeout, versions):
+        self.record("misses")
+        value = await build()
+        if value is not None:
+            for tag, version in versions.items():
+                if version is None:
+                    await self.shared.aadd(TAG_KEY_PREFIX + tag, time.time_ns(), None)
+                    versions[tag] = await self.shared.aget(TAG_KEY_PREFIX + tag)
+            entry = Entry(value, time.time() + timeout, versions)
+            await self.shared.aset(key, entry, timeout + self.stale_timeout)
+            self.set_local(key, entry)
+        return value
+
+    def set_local(self, key, entry):
+        self.local.set(
+            key, entry, min(self.local_timeout, entry.expires_at - time.time())
+        )
+
+    def invalidate_tags(self, *tags):
+        self.shared.set_many(
+            {TAG_KEY_PREFIX + tag: time.time_ns() for tag in tags}, None
+        )
+        self.local.delete_tagged(tags)
+
+    def record(self, result):
+        with self._counts_lock:
+            self.counts[result] += 1
+        record_cache(self.name, result != "misses")
+
+    def stats(self):
+        """
+        Lookup counts by outcome, with the share served without building.
+        """
+        with self._counts_lock:
+            counts = {
+                result: self.counts[result]
+                for result in (
+                    "local_hits",
+                    "shared_hits",
+                    "stale_hits",
+                    "wait_hits",
+                    "misses",
+                )
+            }
+        lookups = sum(counts.values())
+        hits = lookups - counts["misses"]
+        return {
+            **counts,
+            "local_entries": len(self.local),
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,187 @@
+"""
+Response compression with gzip and, when the ``brotli`` package is installed
+(pip install ".[compression]"), brotli.
+
+``CompressionMiddleware`` encodes text and JSON responses of at least
+``COMPRESSION_MIN_SIZE`` bytes in the best encoding the client accepts.
+Dynamic responses use fast levels. Responses built from a
+``PrecompressedContent`` (the cached catalog payloads) carry encodings made
+once, at higher levels, when the entry was stored, so they are sent without
+compressing anything.
+
+Against BREACH, which recovers a secret in a compressed body from its
+length, dynamic gzip bodies carry up to ``GZIP_MAX_RANDOM_BYTES`` of random
+padding, as with Django's ``GZipMiddleware``. Brotli has no such padding, so
+it is only used for responses to requests without cookies that set none: an
+attacker cannot make a browser send those with its user's credentials.
+"""
+
+import gzip
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Levels for responses compressed on every request, and for content that is
+# compressed once and served many times (see benchmarks.compression).
+DYNAMIC_LEVELS = {"br": 4, "gzip": 6}
+STORED_LEVELS = {"br": 9, "gzip": 9}
+
+# Random bytes added to the gzip header of dynamic responses (Django's
+# GZipMiddleware default).
+GZIP_MAX_RANDOM_BYTES = 100
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/vnd.oai.openapi",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+
+def available_encodings():
+    """
+    Encodings this process can produce, in order of preference.
+    """
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(content, encoding, level):
+    if encoding == "br":
+        return brotli.compress(content, quality=level)
+    # mtime=0 keeps the output identical across calls.
+    return gzip.compress(content, compresslevel=level, mtime=0)
+
+
+def negotiate_encoding(accept_encoding, encodings=None):
+    """
+    Return the encoding from ``encodings`` (default: all available ones)
+    preferred by an ``Accept-Encoding`` header, or ``None`` for identity.
+    Ties go to the first one in ``encodings``.
+    """
+    if encodings is None:
+        encodings = available_encodings()
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+@dataclass
+class PrecompressedContent:
+    """
+    A response body together with its encodings at ``STORED_LEVELS``.
+
+    Bodies under ``COMPRESSION_MIN_SIZE`` are stored without encodings, as
+    the middleware would not compress them either.
+    """
+
+    content: bytes
+    encoded: dict = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, content):
+        encoded = {}
+        if len(content) >= settings.COMPRESSION_MIN_SIZE:
+            encoded = {
+                encoding: compress(content, encoding, STORED_LEVELS[encoding])
+                for encoding in available_encodings()
+            }
+        return cls(content, encoded)
+
+
+def compress_dynamic(content, encoding):
+    if encoding == "gzip":
+        # Level 6, as DYNAMIC_LEVELS.
+        return compress_string(content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+    return compress(content, encoding, DYNAMIC_LEVELS[encoding])
+
+
+def may_carry_credentials(request, response):
+    """
+    Whether the body may hold a secret an attacker could have the user's
+    browser fetch repeatedly: the request sent cookies (a session or CSRF
+    token) or the response sets some.
+    """
+    return bool(request.COOKIES) or bool(response.cookies)
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses for clients sending a matching ``Accept-Encoding``.
+
+    Place it above any middleware that reads or changes the response body.
+    Streaming responses, responses that already have a ``Content-Encoding``
+    and bodies under ``COMPRESSION_MIN_SIZE`` bytes are left alone.
+    """
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or not is_compressible(response)
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        precompressed = getattr(response, "precompressed", None)
+        if precompressed is not None:
+            # Built once for every client, so it holds no one's secrets.
+            encodings = tuple(precompressed)
+        elif may_carry_credentials(request, response):
+            encodings = ("gzip",)
+        else:
+            encodings = available_encodings()
+        encoding = negotiate_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), encodings
+        )
+        if encoding is None:
+            return response
+
+        if precompressed is not None:
+            compressed = precompressed[encoding]
+        else:
+            compressed = compress_dynamic(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # The encoded body differs from the one a strong ETag was made for.
+        etag = response.get("ETag")
+        if etag and not etag.startswith("W/"):
+            response["ETag"] = f"W/{etag}"
+        return response
@@ -0,0 +1,142 @@
+"""
+Primary/replica database routing.
+
+Every query goes to the primary unless the view opts in with
+``ReplicaReadMixin``. For those views, safe requests read from a replica
+listed in ``DATABASE_REPLICAS``, except:
+
+* once anything in the request is written, the rest of the request reads
+  from the primary;
+* for ``DATABASE_REPLICA_LAG`` seconds after an authenticated user's request
+  wrote something, that user's reads stay on the primary so they see their
+  own changes despite replication lag.
+
+``ReplicaRoutingMiddleware`` holds the per-request state and records the
+lag window in the cache.
+"""
+
+import random
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = "default"
+
+
+@dataclass
+class RoutingState:
+    use_replica: bool = False
+    wrote: bool = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+def primary_pin_key(user_id):
+    return f"db:primary-pin:{user_id}"
+
+
+def recently_wrote(user):
+    """
+    Return whether ``user`` wrote within the replica lag window.
+    """
+    return user.is_authenticated and cache.get(primary_pin_key(user.pk)) is not None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return None
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Track writes per request and keep writers on the primary for the lag
+    window. Does nothing when no replica is configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and settings.DATABASE_REPLICA_LAG:
+            self.pin_to_primary(request)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            # Sync views get a copy of the context, with the same state.
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and settings.DATABASE_REPLICA_LAG:
+            # May load request.user and writes to the cache.
+            await sync_to_async(self.pin_to_primary)(request)
+        return response
+
+    def pin_to_primary(self, request):
+        # DRF stores the user it authenticated on the Django request.
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            cache.set(primary_pin_key(user.pk), 1, settings.DATABASE_REPLICA_LAG)
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe requests of a view from a read replica.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        state = _state.get()
+        if (
+            state is not None
+            and request.method in SAFE_METHODS
+            and not recently_wrote(request.user)
+        ):
+            state.use_replica = True
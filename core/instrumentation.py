@@ -0,0 +1,261 @@
+"""
+Per-request timings: database queries, view, serializer and render time, and
+response size.
+
+``RequestTimingMiddleware`` is enabled by ``REQUEST_TIMING``; otherwise
+Django drops it at startup and requests pay nothing. When enabled it adds a
+``Server-Timing`` header (shown by browser dev tools) for staff users and
+when ``DEBUG`` is on, and logs requests slower than ``REQUEST_TIMING_SLOW_MS``
+together with their most repeated SQL statements, which usually point at an
+N+1 query.
+"""
+
+import functools
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_timing", default=None)
+
+_in_list_re = re.compile(r"\bIN \((?:%s, )*%s\)")
+_literal_re = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def sql_fingerprint(sql):
+    """
+    Reduce ``sql`` to its shape, so the same query with different values or
+    ``IN`` list lengths counts as one.
+    """
+    return _literal_re.sub("?", _in_list_re.sub("IN (...)", sql))
+
+
+_query_wrappers = ContextVar("query_wrappers", default=())
+
+
+def _run_query_wrappers(execute, sql, params, many, context):
+    for wrapper in reversed(_query_wrappers.get()):
+        execute = functools.partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def install_query_wrappers(connection, **kwargs):
+    """
+    Let ``wrap_queries()`` see the queries of ``connection``. Connected to
+    ``connection_created`` for connections opened in any thread.
+    """
+    if _run_query_wrappers not in connection.execute_wrappers:
+        # First in the list: execute_wrapper() blocks pop the last one.
+        connection.execute_wrappers.insert(0, _run_query_wrappers)
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """
+    Run ``wrapper`` (an ``execute_wrapper()`` function) around the queries
+    made on any database alias in the current context, including sync code
+    it calls through ``sync_to_async``, whose worker threads have their own
+    connections.
+    """
+    token = _query_wrappers.set(_query_wrappers.get() + (wrapper,))
+    try:
+        yield
+    finally:
+        _query_wrappers.reset(token)
+
+
+connection_created.connect(install_query_wrappers)
+for _connection in connections.all(initialized_only=True):
+    install_query_wrappers(_connection)
+
+
+@dataclass
+class RequestTiming:
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db: float = 0.0
+    view: float = 0.0
+    serialize: float = 0.0
+    render: float = 0.0
+    total: float = 0.0
+    size: int = 0
+    statements: Counter = field(default_factory=Counter)
+    view_started: float = None
+    view_ended: float = None
+    serializing: bool = False
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def repeated_statements(self, limit=3):
+        """
+        Return the ``limit`` most repeated SQL fingerprints run more than
+        once, as ``(count, fingerprint)`` pairs.
+        """
+        fingerprints = Counter()
+        for sql, count in self.statements.items():
+            fingerprints[sql_fingerprint(sql)] += count
+        return [
+            (count, fingerprint)
+            for fingerprint, count in fingerprints.most_common(limit)
+            if count > 1
+        ]
+
+    def server_timing(self):
+        metrics = [
+            ("db", self.db, f"{self.queries} queries"),
+            ("view", self.view, None),
+            ("serialize", self.serialize, None),
+            ("render", self.render, None),
+            ("total", self.total, f"{self.size} bytes"),
+        ]
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.1f}" + (f';desc="{desc}"' if desc else "")
+            for name, seconds, desc in metrics
+        )
+
+
+def _timed(prop):
+    """
+    Wrap a serializer ``data`` property to add its time to the current
+    request's ``serialize`` total. Nested accesses are counted once.
+    """
+    fget = prop.fget
+
+    def data(self):
+        timing = _current.get()
+        if timing is None or timing.serializing:
+            return fget(self)
+        timing.serializing = True
+        start = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            timing.serializing = False
+            timing.serialize += time.perf_counter() - start
+
+    data.timed = True
+    return property(data)
+
+
+def time_serializers():
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(cls.data.fget, "timed", False):
+            cls.data = _timed(cls.data)
+
+
+class RequestTimingMiddleware:
+    """
+    Collect a ``RequestTiming`` for each request. Place it first so the
+    total covers the other middleware and the size is what is sent.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django would run sync view hooks in a worker thread.
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+        time_serializers()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            with wrap_queries(timing.execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, timing, time.perf_counter())
+        return response
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            with wrap_queries(timing.execute_wrapper):
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        # Reads request.user, which may still have to be loaded.
+        await sync_to_async(self.finish)(request, response, timing, time.perf_counter())
+        return response
+
+    def finish(self, request, response, timing, end):
+        timing.total = end - timing.started
+        if timing.view_started is not None:
+            # DRF responses are rendered after the view returns.
+            view_ended = timing.view_ended or end
+            timing.view = view_ended - timing.view_started
+            timing.render = end - view_ended
+        if not response.streaming:
+            timing.size = len(response.content)
+
+        # DRF stores the user it authenticated on the Django request.
+        user = getattr(request, "user", None)
+        if settings.DEBUG or (user is not None and user.is_staff):
+            response["Server-Timing"] = timing.server_timing()
+        if timing.total * 1000 >= settings.REQUEST_TIMING_SLOW_MS:
+            self.log_slow_request(request, response, timing)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _current.get().view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        _current.get().view_ended = time.perf_counter()
+        return response
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        _current.get().view_started = time.perf_counter()
+
+    async def aprocess_template_response(self, request, response):
+        _current.get().view_ended = time.perf_counter()
+        return response
+
+    def log_slow_request(self, request, response, timing):
+        repeated = "; ".join(
+            f"{count}x {fingerprint}"
+            for count, fingerprint in timing.repeated_statements()
+        )
+        logger.warning(
+            "Slow request: %s %s %s in %.0f ms (%d queries in %.0f ms, "
+            "view %.0f ms, serialize %.0f ms, render %.0f ms, %d bytes)%s",
+            request.method,
+            request.get_full_path(),
+            response.status_code,
+            timing.total * 1000,
+            timing.queries,
+            timing.db * 1000,
+            timing.view * 1000,
+            timing.serialize * 1000,
+            timing.render * 1000,
+            timing.size,
+            f"; repeated SQL: {repeated}" if repeated else "",
+        )
@@ -0,0 +1,62 @@
+"""
+URL helpers that postpone importing a view until it is first requested.
+
+The OAuth (django-oauth-toolkit, drf-social-oauth2, social-auth) and OpenAPI
+(drf-spectacular) stacks are large and most workers never serve them. Keeping
+them out of ``core.urls`` saves start-up time and per-worker memory.
+"""
+
+import functools
+
+from django.utils.module_loading import import_string
+
+
+class LazyView:
+    """
+    View that imports the class-based view at ``view_path`` and calls
+    ``as_view(**initkwargs)`` on its first request.
+
+    The schema generator reads the view's ``cls``, ``initkwargs`` and
+    ``actions``, which are looked up on the built view (importing it).
+    Anything else, ``csrf_exempt`` included, is not, so the CSRF middleware
+    and URL resolver leave the import for the first request.
+    """
+
+    view_attributes = ("cls", "initkwargs", "actions")
+
+    def __init__(self, view_path, csrf_exempt=False, **initkwargs):
+        self.lazy_view_path = view_path
+        self.lazy_initkwargs = initkwargs
+        if csrf_exempt:
+            self.csrf_exempt = True
+
+    @functools.cached_property
+    def view(self):
+        return import_string(self.lazy_view_path).as_view(**self.lazy_initkwargs)
+
+    def __getattr__(self, name):
+        if name in self.view_attributes:
+            return getattr(self.view, name)
+        raise AttributeError(name)
+
+    def __call__(self, request, *args, **kwargs):
+        return self.view(request, *args, **kwargs)
+
+
+def lazy_view(view_path, csrf_exempt=False, **initkwargs):
+    """
+    Return a ``LazyView`` for the class-based view at ``view_path``.
+
+    The CSRF middleware only sees the ``LazyView``, so pass
+    ``csrf_exempt=True`` for views that are exempt themselves (every DRF
+    ``APIView``).
+    """
+    return LazyView(view_path, csrf_exempt, **initkwargs)
+
+
+def lazy_include(urlconf, namespace):
+    """
+    Like ``include()``, but the URLconf module is imported the first time
+    a request path enters its prefix (or ``reverse()`` walks the tree).
+    """
+    return (urlconf, namespace, namespace)
@@ -0,0 +1,262 @@
+"""
+JSON logging through a queue, so request threads never wait on stderr.
+
+``LOGGING`` sends records to ``QueueHandler``, which puts them on a bounded
+in-memory queue. A ``QueueListener`` thread takes them off and writes them
+with ``JSONFormatter``, one JSON object per line. When the queue is full
+(the output cannot keep up) records are dropped instead of blocking the
+request.
+
+``RequestLogMiddleware`` gives each request an id (``X-Request-ID``, taken
+from the proxy when it sends a valid one). Records logged while the request
+is handled carry its id, the authenticated user's id and the route name.
+With ``REQUEST_LOG`` on it also logs one ``core.requests`` record per
+request with the status and duration.
+
+``SamplingFilter`` keeps a fraction of the debug records of chatty loggers
+(``social``: ``LOG_DEBUG_SAMPLE_RATE``).
+"""
+
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import time
+import uuid
+import weakref
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.functional import LazyObject, empty
+
+from core.metrics import route_name
+
+request_logger = logging.getLogger("core.requests")
+
+_current_request = ContextVar("log_request", default=None)
+
+_request_id_re = re.compile(r"^[\w.:-]{1,64}$")
+
+# Attributes of every LogRecord; anything else was passed in ``extra``.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+}
+
+_JSON_TYPES = (str, int, float, bool, type(None), list, tuple, dict)
+
+
+def request_id(request):
+    header = request.headers.get("X-Request-ID", "")
+    if _request_id_re.match(header):
+        return header
+    return uuid.uuid4().hex
+
+
+def user_id(request):
+    """
+    Id of the user DRF or Django's authentication set on ``request``, or
+    ``None``. A session user that was not loaded yet is not loaded for a log
+    line.
+    """
+    user = request.__dict__.get("user")
+    if isinstance(user, LazyObject):
+        user = None if user._wrapped is empty else user._wrapped
+    return getattr(user, "pk", None)
+
+
+def request_context(request):
+    return {
+        "request_id": request.request_id,
+        "user_id": user_id(request),
+        "route": route_name(request),
+    }
+
+
+class RequestLogMiddleware:
+    """
+    Set the request context for log records. Place it first in
+    ``MIDDLEWARE`` so the duration covers the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.request_id = request_id(request)
+        token = _current_request.set(request)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            self.log(request, response, time.perf_counter() - start)
+        finally:
+            _current_request.reset(token)
+        response["X-Request-ID"] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        request.request_id = request_id(request)
+        token = _current_request.set(request)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            self.log(request, response, time.perf_counter() - start)
+        finally:
+            _current_request.reset(token)
+        response["X-Request-ID"] = request.request_id
+        return response
+
+    def log(self, request, response, duration):
+        if settings.REQUEST_LOG:
+            request_logger.info(
+                "%s %s %s",
+                request.method,
+                request.get_full_path(),
+                response.status_code,
+                extra={
+                    **request_context(request),
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                },
+            )
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a ``rate`` fraction of the records at or below ``level`` from
+    ``loggers`` (and their children). Other records all pass.
+    """
+
+    def __init__(self, rate, loggers=(), level="DEBUG"):
+        super().__init__()
+        self.rate = rate
+        self.prefixes = tuple(loggers)
+        self.level = logging.getLevelNamesMapping()[level]
+
+    def filter(self, record):
+        if record.levelno > self.level or not any(
+            record.name == prefix or record.name.startswith(prefix + ".")
+            for prefix in self.prefixes
+        ):
+            return True
+        return random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created, datetime.UTC
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records without blocking, with the context of the request being
+    handled. Configured in ``LOGGING`` with ``"handlers"`` and
+    ``"listener": "core.logs.QueueListener"``.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+        handler = weakref.ref(self)
+
+        def reset():
+            running = handler()
+            if running is not None:
+                running.reset_after_fork()
+
+        os.register_at_fork(after_in_child=reset)
+
+    def reset_after_fork(self):
+        """
+        Give a forked child (gunicorn workers, when the app is preloaded in
+        the master) its own queue and listener thread. The parent's queue
+        still lists the parent's listener thread as waiting on it, and that
+        thread does not exist in the child: records put on it would wake
+        nobody, and ``listener.stop()`` would wait for good at shutdown.
+        """
+        self.queue = type(self.queue)(self.queue.maxsize)
+        if self.listener is not None:
+            self.listener.queue = self.queue
+            if self.listener._thread is not None:
+                self.listener._thread = None
+                self.listener.start()
+
+    def prepare(self, record):
+        # Runs in the thread that logs: resolve the message, traceback and
+        # request context here, but keep the traceback apart from the
+        # message for the formatter.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        # django.request logs errors after the middleware has returned, with
+        # the request in ``extra``.
+        request = _current_request.get() or getattr(record, "request", None)
+        if hasattr(request, "request_id"):
+            for key, value in request_context(request).items():
+                if not hasattr(record, key):
+                    setattr(record, key, value)
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not isinstance(value, _JSON_TYPES):
+                setattr(record, key, str(value))
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        # Flush the queue through the listener before the handlers close.
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+class QueueListener(logging.handlers.QueueListener):
+    """
+    Started when ``LOGGING`` is configured. ``QueueHandler`` starts it again,
+    on a new queue, in forked children.
+    """
+
+    def __init__(self, queue, *handlers, respect_handler_level=False):
+        super().__init__(queue, *handlers, respect_handler_level=respect_handler_level)
+        self.start()
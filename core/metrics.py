@@ -0,0 +1,210 @@
+"""
+Prometheus metrics, served at ``/metrics`` when ``prometheus_client`` is
+installed (pip install ".[metrics]"), ``METRICS`` is on and
+``METRICS_TOKEN`` is set.
+
+Requests are counted and timed per route name, method and status, together
+with the number of queries each one ran. Application code reports cache hits
+and misses, throttle rejections and the password hashing pool's load
+through the ``record_*`` functions; the email outbox depth is read from the
+database at scrape time.
+
+Under gunicorn each worker is a separate process. ``gunicorn.conf.py`` sets
+``PROMETHEUS_MULTIPROC_DIR`` so that workers write their samples to files
+in that directory, and the scrape, whichever worker answers it, adds them up.
+"""
+
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models import Count
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from core.instrumentation import wrap_queries
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram, multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    prometheus_client = None
+
+if prometheus_client is not None:
+    REQUESTS = Counter(
+        "pynerd_http_requests_total",
+        "HTTP requests.",
+        ["route", "method", "status"],
+    )
+    REQUEST_DURATION = Histogram(
+        "pynerd_http_request_duration_seconds",
+        "Time spent answering HTTP requests.",
+        ["route", "method", "status"],
+    )
+    REQUEST_QUERIES = Histogram(
+        "pynerd_http_request_db_queries",
+        "Database queries per HTTP request.",
+        ["route", "method"],
+        buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, float("inf")),
+    )
+    CACHE_REQUESTS = Counter(
+        "pynerd_cache_requests_total",
+        "Application cache lookups.",
+        ["cache", "result"],
+    )
+    THROTTLE_REJECTIONS = Counter(
+        "pynerd_throttle_rejections_total",
+        "Requests rejected by a throttle.",
+        ["scope"],
+    )
+    PASSWORD_HASHING_JOBS = Gauge(
+        "pynerd_password_hashing_jobs",
+        "Password hashing jobs running or queued in the pool.",
+        ["state"],
+        # Summed over the live workers under PROMETHEUS_MULTIPROC_DIR.
+        multiprocess_mode="livesum",
+    )
+    PASSWORD_HASHING_REJECTIONS = Counter(
+        "pynerd_password_hashing_rejections_total",
+        "Password hashing jobs refused because the pool's queue was full.",
+    )
+
+
+class OutboxCollector:
+    """
+    Number of outbox messages per status, queried when scraped.
+    """
+
+    def describe(self):
+        # Lets the registry check names without querying the database.
+        yield self.family()
+
+    def family(self):
+        return GaugeMetricFamily(
+            "pynerd_email_outbox_messages",
+            "Messages in the email outbox.",
+            labels=["status"],
+        )
+
+    def collect(self):
+        from apps.accounts.models import EmailOutbox
+
+        family = self.family()
+        counts = dict.fromkeys(("pending", "sent", "failed"), 0)
+        counts.update(
+            EmailOutbox.objects.values_list("status").annotate(Count("id")).order_by()
+        )
+        for status, count in counts.items():
+            family.add_metric([status], count)
+        yield family
+
+
+def record_cache(cache, hit):
+    if settings.METRICS:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_throttle(scope):
+    if settings.METRICS:
+        THROTTLE_REJECTIONS.labels(scope or "").inc()
+
+
+def record_password_hashing(running, queued):
+    if settings.METRICS:
+        PASSWORD_HASHING_JOBS.labels("running").set(running)
+        PASSWORD_HASHING_JOBS.labels("queued").set(queued)
+
+
+def record_password_hashing_rejection():
+    if settings.METRICS:
+        PASSWORD_HASHING_REJECTIONS.inc()
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        # Keep unknown URLs from adding a label value each.
+        return "unmatched"
+    return match.view_name or match.route
+
+
+class MetricsMiddleware:
+    """
+    Count and time every request. Place it near the top of ``MIDDLEWARE``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with wrap_queries(counter):
+            response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start, counter.count)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with wrap_queries(counter):
+            response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start, counter.count)
+        return response
+
+    def observe(self, request, response, duration, queries):
+        route = route_name(request)
+        status = str(response.status_code)
+        REQUESTS.labels(route, request.method, status).inc()
+        REQUEST_DURATION.labels(route, request.method, status).observe(duration)
+        REQUEST_QUERIES.labels(route, request.method).observe(queries)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def scrape_registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return prometheus_client.REGISTRY
+    registry = prometheus_client.CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(OutboxCollector())
+    return registry
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Requires ``Authorization: Bearer
+    <METRICS_TOKEN>``; ``core.urls`` does not mount it without a token.
+    """
+    if not settings.METRICS_TOKEN or not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        prometheus_client.generate_latest(scrape_registry()),
+        content_type=prometheus_client.CONTENT_TYPE_LATEST,
+    )
+
+
+if prometheus_client is not None and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    prometheus_client.REGISTRY.register(OutboxCollector())
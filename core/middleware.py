@@ -0,0 +1,64 @@
+"""
+Session, CSRF, authentication and messages middleware that step aside for
+token-authenticated API requests.
+
+API clients send ``Authorization: Bearer ...`` and are authenticated by DRF
+(``TokenDispatchAuthentication``), never by the session. For those requests
+under ``TOKEN_API_PREFIX`` these subclasses call the next middleware
+directly: no session cookie parsing, session load or save, ``Vary: Cookie``,
+CSRF cookie handling, lazy ``request.user`` or message storage. The admin,
+``social_django`` flows and anything else, including API requests without a
+bearer token, get the full Django behaviour.
+
+They replace Django's classes in ``MIDDLEWARE`` one for one, so the admin's
+system checks, which look for subclasses, still pass.
+"""
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import csrf
+
+
+def is_token_api_request(request):
+    """
+    Whether ``request`` targets the API with a bearer token. Computed once
+    per request.
+    """
+    try:
+        return request._token_api_request
+    except AttributeError:
+        request._token_api_request = (
+            request.path_info.startswith(settings.TOKEN_API_PREFIX)
+            and request.headers.get("Authorization", "")[:7].lower() == "bearer "
+        )
+        return request._token_api_request
+
+
+class SkipForTokenAPIMixin:
+    def __call__(self, request):
+        if is_token_api_request(request):
+            # Under ASGI this returns the coroutine for the caller to await.
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(SkipForTokenAPIMixin, sessions.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SkipForTokenAPIMixin, csrf.CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # Django runs view hooks outside __call__.
+        if is_token_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(SkipForTokenAPIMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(SkipForTokenAPIMixin, messages.MessageMiddleware):
+    pass
@@ -0,0 +1,48 @@
+"""
+orjson-backed JSON renderer, used when orjson is installed (see FAST_JSON in
+settings).
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in ``JSONRenderer`` producing the same bytes with orjson.
+
+    Dates, times and anything orjson does not know natively (Decimal,
+    lazy translations, querysets...) go through DRF's ``JSONEncoder``, so
+    they are rendered as before. Requests for indented output, and settings
+    other than DRF's compact, unicode and strict defaults, fall back to the
+    stdlib renderer. Floats that need an exponent are written without the
+    ``+`` and leading zeros (``1e16`` instead of ``1e+16``), which is the
+    same number.
+    """
+
+    options = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=self.options
+        )
+        # Same escaping of U+2028 and U+2029 as JSONRenderer.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -0,0 +1,74 @@
+"""
+OpenAPI schema served from a file generated at build time.
+
+Generating the schema introspects every view and serializer, which takes
+hundreds of milliseconds, and Swagger UI and redoc fetch it on each page
+load. The Docker build writes it once:
+
+    python manage.py spectacular --format openapi-json --file openapi.json
+
+``PrecomputedSchemaView`` reads ``OPENAPI_SCHEMA_FILE`` on its first request
+(or generates the schema then, if the file is missing), renders it once per
+format and answers with an ``ETag``, so clients revalidate with a 304. With
+``DEBUG`` on it generates the schema on every request, as
+``SpectacularAPIView`` does, so changes show up without a rebuild. The
+``lang`` and ``version`` query parameters only apply in that mode.
+"""
+
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+from core.compression import PrecompressedContent
+
+
+@functools.cache
+def load_schema():
+    try:
+        with open(settings.OPENAPI_SCHEMA_FILE, "rb") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+        return generator.get_schema(request=None, public=True)
+
+
+@functools.cache
+def render_schema(renderer_class):
+    """
+    Return the schema rendered by ``renderer_class`` as a
+    ``PrecompressedContent`` and its ETag.
+    """
+    content = renderer_class().render(load_schema())
+    etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+    return PrecompressedContent.build(content), etag
+
+
+class PrecomputedSchemaView(SpectacularAPIView):
+    # Documented (or left out, with SERVE_INCLUDE_SCHEMA off) as the parent.
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if settings.DEBUG:
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        payload, etag = render_schema(type(renderer))
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        response = HttpResponse(payload.content, content_type=content_type)
+        response["Content-Disposition"] = (
+            f'inline; filename="{self._get_filename(request, None)}"'
+        )
+        response["ETag"] = etag
+        # Always revalidate: a deploy changes the schema under the same URL.
+        response["Cache-Control"] = "no-cache"
+        # Picked up by core.compression.CompressionMiddleware.
+        response.precompressed = payload.encoded
+        return get_conditional_response(request, etag=etag, response=response)
@@ -1,8 +1,12 @@
+import importlib.util
+import logging
 import os
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 
+from core.database import is_shared_cache, parse_cache_url, parse_database_url
+
 load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,16 +56,25 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "core.logs.RequestLogMiddleware",
+    "core.instrumentation.RequestTimingMiddleware",
+    "core.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "core.compression.CompressionMiddleware",
+    # Django's session, CSRF, auth and messages middleware, skipped for
+    # bearer-token requests under TOKEN_API_PREFIX (see core/middleware.py)
+    "core.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "core.middleware.CsrfViewMiddleware",
+    "core.middleware.AuthenticationMiddleware",
+    "core.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.db_routers.ReplicaRoutingMiddleware",
 ]
 
+TOKEN_API_PREFIX = "/api/"
+
 ROOT_URLCONF = "core.urls"
 
 TEMPLATES = [
@@ -86,23 +99,79 @@ WSGI_APPLICATION = "core.wsgi.application"
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": parse_database_url(
+        os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
+    )
 }
 
-# On Prodution
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': os.getenv('DB_NAME', 'your_db_name'),
-#         'USER': os.getenv('DB_USER', 'your_db_user'),
-#         'PASSWORD': os.getenv('DB_PASSWORD', 'your_db_password'),
-#         'HOST': os.getenv('DB_HOST', 'localhost'),
-#         'PORT': os.getenv('DB_PORT', '5432'),
-#     }
-# }
+# Read replica used by views with ReplicaReadMixin (see core/db_routers.py).
+# Point both URLs at two SQLite files to try the routing locally.
+if os.getenv("DATABASE_REPLICA_URL"):
+    DATABASES["replica"] = parse_database_url(os.getenv("DATABASE_REPLICA_URL"))
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["core.db_routers.PrimaryReplicaRouter"]
+
+# Cache shared by every worker when CACHE_URL points at Redis
+# (pip install ".[redis]") or Memcached; otherwise each process has its own.
+CACHES = {"default": parse_cache_url(os.getenv("CACHE_URL", "locmem://"))}
+
+# core.caching.TieredCache: entries also kept in each worker's memory (at most
+# LOCAL_CACHE_MAX_ENTRIES, for LOCAL_CACHE_TIMEOUT seconds), expired entries
+# served for CACHE_STALE_TIMEOUT seconds while one caller rebuilds them, and
+# callers waiting up to CACHE_LOCK_TIMEOUT seconds for an entry being built
+LOCAL_CACHE_TIMEOUT = int(os.getenv("LOCAL_CACHE_TIMEOUT", "5"))
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "1000"))
+CACHE_STALE_TIMEOUT = int(os.getenv("CACHE_STALE_TIMEOUT", "60"))
+CACHE_LOCK_TIMEOUT = int(os.getenv("CACHE_LOCK_TIMEOUT", "10"))
+
+# Seconds a user's reads stay on the primary after they wrote something, to
+# cover replication lag. Needs a cache shared by all workers.
+DATABASE_REPLICA_LAG = int(os.getenv("DATABASE_REPLICA_LAG", "5"))
+
+# Set by core/asgi.py.
+ASGI = os.getenv("ASGI", "False").lower() == "true"
+
+# Under ASGI every request may run in a different thread, so persistent
+# connections are replaced by psycopg 3's connection pool when available
+# (pip install "psycopg[binary,pool]"). core/asgi.py turns this on.
+DATABASE_POOL = os.getenv("DATABASE_POOL", "False").lower() == "true"
+
+if DATABASE_POOL and any(
+    database["ENGINE"] == "django.db.backends.postgresql"
+    for database in DATABASES.values()
+):
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        DATABASE_POOL = False
+        logging.getLogger(__name__).warning(
+            "DATABASE_POOL is on but psycopg_pool cannot be imported; %s. "
+            'Install "psycopg[binary,pool]".',
+            (
+                "opening a connection per request"
+                if ASGI
+                else "keeping persistent connections"
+            ),
+        )
+
+for _database in DATABASES.values():
+    # Keep connections open between requests and check them before reuse.
+    _database["CONN_MAX_AGE"] = int(os.getenv("DATABASE_CONN_MAX_AGE", "60"))
+    _database["CONN_HEALTH_CHECKS"] = True
+    if DATABASE_POOL and _database["ENGINE"] == "django.db.backends.postgresql":
+        # Django requires CONN_MAX_AGE = 0 with a pool.
+        _database["CONN_MAX_AGE"] = 0
+        _database["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", "10")),
+        }
+    elif ASGI:
+        # Persistent connections belong to the thread that opened them, and
+        # ASGI runs sync code in threads that come and go, so they would
+        # pile up instead of being reused.
+        _database["CONN_MAX_AGE"] = 0
 
 
 # Password validation
@@ -124,6 +193,21 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing pool (see apps/accounts/hashing.py)
+PASSWORD_HASHING_WORKERS = int(
+    os.getenv("PASSWORD_HASHING_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+PASSWORD_HASHING_MAX_QUEUE = int(os.getenv("PASSWORD_HASHING_MAX_QUEUE", "16"))
+PASSWORD_HASHING_TIMEOUT = float(os.getenv("PASSWORD_HASHING_TIMEOUT", "10"))
+
+# Serve api/auth/login/ with the async view (set by core/asgi.py)
+ASYNC_LOGIN_VIEW = os.getenv("ASYNC_LOGIN_VIEW", "False").lower() == "true"
+
+# Serve GET on the catalog, course detail, categories and student progress
+# with the async views in apps/courses/async_views.py (set by core/asgi.py)
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "False").lower() == "true"
+
+
 # Custom User Model
 AUTH_USER_MODEL = "accounts.CustomUser"
 
@@ -145,7 +229,8 @@ AUTHENTICATION_BACKENDS = (
     "social_core.backends.google.GoogleOAuth2",
     "social_core.backends.github.GithubOAuth2",
     "drf_social_oauth2.backends.DjangoOAuth2",
-    "django.contrib.auth.backends.ModelBackend",
+    # Resolves a username or an email in one query
+    "apps.accounts.backends.EmailOrUsernameModelBackend",
 )
 
 # Social Auth Settings
@@ -186,7 +271,7 @@ SOCIAL_AUTH_GOOGLE_OAUTH2_SCOPE = ["email", "profile"]
 
 # OAuth2 Client Configuration
 OAUTH2_PROVIDER = {
-    "SCOPES": ["read", "write"],
+    "SCOPES": {"read": "Read scope", "write": "Write scope"},
     "ACCESS_TOKEN_EXPIRE_SECONDS": 3600,
     "REFRESH_TOKEN_EXPIRE_SECONDS": 3600 * 24 * 7,
 }
@@ -207,11 +292,16 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Dajngo REST Framework
+# Render and parse JSON with orjson when it is installed
+# (pip install ".[fast-json]"); output is byte-compatible with DRF's.
+FAST_JSON = os.getenv("FAST_JSON", "True").lower() == "true" and bool(
+    importlib.util.find_spec("orjson")
+)
+
 REST_FRAMEWORK = {
+    # Dispatches to JWT, OAuth2 or social authentication from the header shape
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-        "oauth2_provider.contrib.rest_framework.OAuth2Authentication",
-        "drf_social_oauth2.authentication.SocialAuthentication",
+        "apps.accounts.authentication.TokenDispatchAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -219,25 +309,60 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        (
+            "core.renderers.ORJSONRenderer"
+            if FAST_JSON
+            else "rest_framework.renderers.JSONRenderer"
+        ),
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        (
+            "core.parsers.ORJSONParser"
+            if FAST_JSON
+            else "rest_framework.parsers.JSONParser"
+        ),
         "rest_framework.parsers.FormParser",
         "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Sliding-window counters in THROTTLE_STORE
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "apps.accounts.throttling.AnonRateThrottle",
+        "apps.accounts.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
-        "anon": "200/day",
-        "user": "1000/day",
+        "anon": os.getenv("THROTTLE_ANON_RATE", "200/day"),
+        "user": os.getenv("THROTTLE_USER_RATE", "1000/day"),
     },
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
 }
 
+# Notes sent at once to api/notes/sync/
+NOTE_SYNC_MAX_BATCH = int(os.getenv("NOTE_SYNC_MAX_BATCH", "500"))
+
+# Bulk student import (api/users/import/ and `manage.py import_students`). The
+# API hashes passwords in the request (about 0.5 s each), so it takes files of
+# up to STUDENT_IMPORT_MAX_ROWS rows of which STUDENT_IMPORT_MAX_PASSWORDS carry
+# a password, to finish well within the gunicorn timeout; larger files go
+# through the management command.
+STUDENT_IMPORT_CHUNK_SIZE = int(os.getenv("STUDENT_IMPORT_CHUNK_SIZE", "1000"))
+STUDENT_IMPORT_MAX_ROWS = int(os.getenv("STUDENT_IMPORT_MAX_ROWS", "2000"))
+STUDENT_IMPORT_MAX_PASSWORDS = int(os.getenv("STUDENT_IMPORT_MAX_PASSWORDS", "20"))
+
+# Throttle counter store: the default cache (shared by all workers when
+# CACHE_URL points at Redis or Memcached), or with THROTTLE_STORE=database the
+# ThrottleCounter table, which costs a write on the primary per throttled
+# request and needs `python manage.py clear_throttle_counters` run periodically
+THROTTLE_STORE = {
+    "cache": {
+        "BACKEND": "apps.accounts.throttling.CacheCounterStore",
+        "OPTIONS": {"alias": "default"},
+    },
+    "database": {
+        "BACKEND": "apps.accounts.throttling.DatabaseCounterStore",
+    },
+}[os.getenv("THROTTLE_STORE", "cache")]
+
 # Spectacular Settings
 SPECTACULAR_SETTINGS = {
     "TITLE": "PyNerd API",
@@ -246,6 +371,11 @@ SPECTACULAR_SETTINGS = {
     "SERVE_INCLUDE_SCHEMA": False,
 }
 
+# Schema written at build time and served by api/schema/ (see core/schema.py)
+OPENAPI_SCHEMA_FILE = os.getenv(
+    "OPENAPI_SCHEMA_FILE", os.path.join(BASE_DIR, "openapi.json")
+)
+
 # Simple JWT Configuration
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
@@ -274,6 +404,43 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=7),
 }
 
+# Cache resolved JWT users for this many seconds (0 disables the cache). Needs
+# a cache shared by all workers for deactivations to apply on the next request.
+JWT_USER_CACHE_TIMEOUT = int(os.getenv("JWT_USER_CACHE_TIMEOUT", "0"))
+JWT_USER_CACHE_ALIAS = "default"
+
+# Cache users/me and users/{id}/profile payloads for this many seconds. Off by
+# default with a per-process cache, where an edit would only drop the entry
+# of the worker that handled it.
+USER_DETAIL_CACHE_TIMEOUT = int(
+    os.getenv(
+        "USER_DETAIL_CACHE_TIMEOUT",
+        "300" if is_shared_cache(CACHES["default"]) else "0",
+    )
+)
+
+# Cache the published catalog (courses, course detail, categories) and quizzes
+# with their compressed encodings for this many seconds
+# (see apps/courses/caching.py)
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", "300"))
+
+# gzip/brotli response compression (brotli needs pip install ".[compression]")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Per-request timings (core/instrumentation.py): a Server-Timing header for
+# staff users and DEBUG, and a warning for requests slower than the threshold
+REQUEST_TIMING = os.getenv("REQUEST_TIMING", "False").lower() == "true"
+REQUEST_TIMING_SLOW_MS = int(os.getenv("REQUEST_TIMING_SLOW_MS", "1000"))
+
+# Prometheus metrics (core/metrics.py), off unless METRICS is on and
+# prometheus_client is installed (pip install ".[metrics]"). /metrics is only
+# mounted when METRICS_TOKEN is set, and requires
+# "Authorization: Bearer <token>" from the scraper.
+METRICS = os.getenv("METRICS", "False").lower() == "true" and bool(
+    importlib.util.find_spec("prometheus_client")
+)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 # CORS Settings (adjust according to your needs)
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "http://localhost:3000").split(
     ","
@@ -282,21 +449,56 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Logging Configuration
 # settings.py - Adicione logging
+# Logging: JSON lines written by a background thread (see core/logs.py).
+# REQUEST_LOG adds one record per request; LOG_DEBUG_SAMPLE_RATE is the
+# fraction of social-auth debug records kept.
+REQUEST_LOG = os.getenv("REQUEST_LOG", "False").lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "filters": {
+        "sample_debug": {
+            "()": "core.logs.SamplingFilter",
+            "rate": LOG_DEBUG_SAMPLE_RATE,
+            "loggers": ["social"],
+        },
+    },
+    "formatters": {
+        "json": {
+            "()": "core.logs.JSONFormatter",
+        },
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
+            "formatter": "json",
+        },
+        "queue": {
+            "class": "core.logs.QueueHandler",
+            "handlers": ["console"],
+            "queue": {"()": "queue.Queue", "maxsize": LOG_QUEUE_SIZE},
+            "listener": "core.logs.QueueListener",
+            "filters": ["sample_debug"],
         },
     },
     "loggers": {
         "social": {
-            "handlers": ["console"],
+            "handlers": ["queue"],
             "level": "DEBUG",
         },
         "django": {
-            "handlers": ["console"],
+            "handlers": ["queue"],
+            "level": "INFO",
+        },
+        "core": {
+            "handlers": ["queue"],
+            "level": "INFO",
+        },
+        "apps": {
+            "handlers": ["queue"],
             "level": "INFO",
         },
     },
@@ -312,10 +514,20 @@ LOGGING = {
 #     SECURE_SSL_REDIRECT = True
 #     SESSION_COOKIE_SECURE = True
 # Email Configuration
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
+
+# Email Outbox (delivered by `python manage.py send_outbox_emails`)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+EMAIL_OUTBOX_RETRY_BACKOFF = int(os.getenv("EMAIL_OUTBOX_RETRY_BACKOFF", "60"))
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", "5"))
+# Seconds a claimed batch stays hidden from other workers while it is sent.
+EMAIL_OUTBOX_CLAIM_TIMEOUT = int(os.getenv("EMAIL_OUTBOX_CLAIM_TIMEOUT", "300"))
@@ -1,12 +1,17 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshSlidingView
 from apps.accounts.serializers import CustomTokenObtainPairSerializer
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from apps.accounts.views import AsyncLoginView
+from core.lazy import lazy_include, lazy_view
+
+if settings.ASYNC_LOGIN_VIEW:
+    login_view = AsyncLoginView.as_view()
+else:
+    login_view = TokenObtainPairView.as_view(
+        serializer_class=CustomTokenObtainPairSerializer
+    )
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -14,25 +19,31 @@ urlpatterns = [
     path("api/", include("apps.accounts.urls")),
     path("api/", include("apps.courses.urls")),
     # JWT Authentication
-    path(
-        "api/auth/login/",
-        TokenObtainPairView.as_view(serializer_class=CustomTokenObtainPairSerializer),
-        name="token_obtain_pair",
-    ),
+    path("api/auth/login/", login_view, name="token_obtain_pair"),
     path("api/auth/refresh/", TokenRefreshSlidingView.as_view(), name="token_refresh"),
     # OAuth2 URLs - INCLUÍDAS DIRETAMENTE AQUI
-    path("auth/", include("social_django.urls", namespace="social")),
-    path("auth/", include("drf_social_oauth2.urls", namespace="drf")),
+    # (imported on first use, see core/lazy.py)
+    path("auth/", lazy_include("social_django.urls", namespace="social")),
+    path("auth/", lazy_include("drf_social_oauth2.urls", namespace="drf")),
     # Schema & Docs
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path(
+        "api/schema/",
+        lazy_view("core.schema.PrecomputedSchemaView"),
+        name="schema",
+    ),
     path(
         "api/schema/swagger-ui/",
-        SpectacularSwaggerView.as_view(url_name="schema"),
+        lazy_view("drf_spectacular.views.SpectacularSwaggerView", url_name="schema"),
         name="swagger-ui",
     ),
     path(
         "api/schema/redoc/",
-        SpectacularRedocView.as_view(url_name="schema"),
+        lazy_view("drf_spectacular.views.SpectacularRedocView", url_name="schema"),
         name="redoc",
     ),
 ]
+
+if settings.METRICS and settings.METRICS_TOKEN:
+    from core.metrics import metrics_view
+
+    urlpatterns.append(path("metrics", metrics_view, name="metrics"))
@@ -0,0 +1,77 @@
+"""
+Gunicorn settings, read automatically from the working directory.
+
+    gunicorn core.wsgi:application
+    gunicorn core.asgi:application -k uvicorn_worker.UvicornWorker
+
+Each value can be overridden with a ``GUNICORN_*`` environment variable or on
+the command line.
+"""
+
+import gc
+import glob
+import os
+import shutil
+import tempfile
+
+# os.process_cpu_count() (which respects CPU affinity) is new in Python 3.13.
+cpu_count = getattr(os, "process_cpu_count", os.cpu_count)() or 1
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Sync views spend much of their time waiting on the database, so run two
+# processes per core with a few threads each.
+workers = int(os.getenv("GUNICORN_WORKERS", cpu_count * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+# Import Django once in the master; workers share those pages copy-on-write.
+preload_app = os.getenv("GUNICORN_PRELOAD", "True").lower() == "true"
+
+# Recycle workers to bound slow memory growth, staggered so they do not all
+# restart at once.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Set to "-" to log requests to stdout.
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")
+errorlog = "-"
+
+# With METRICS on, workers write their Prometheus samples to files in this
+# directory, which the /metrics view adds up (see core/metrics.py).
+metrics_dir = None
+created_metrics_dir = False
+if os.getenv("METRICS", "False").lower() == "true":
+    metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        # Samples left by a previous run would be added to this one's.
+        for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+            os.remove(path)
+    else:
+        metrics_dir = tempfile.mkdtemp(prefix="pynerd-metrics-")
+        created_metrics_dir = True
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+
+def pre_fork(server, worker):
+    # Move the preloaded objects out of the garbage collector's reach, so
+    # collections in the workers do not write to (and copy) shared pages.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    # Never share database connections opened in the master.
+    from django.db import connections
+
+    connections.close_all()
+
+
+def on_exit(server):
+    if created_metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)